@@ -0,0 +1,322 @@
+import argparse
+import datetime
+import json
+import os
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+
+from Benchmarks.Gerador import gerar
+from Dados.Conexao import GerenciadorConexoes
+from Dados.Dicionarios import construir_dicionarios
+from Dados.Dimensoes import IndiceGeografico
+from Dados.Motor import INDICADORES, formatador
+from Dados.Rollups import construir_rollups
+
+MODOS = ["direto", "rollup", "codificado"]
+
+
+def caminhos(gerenciador, indice):
+    """
+    Todas as consultas que o app faz, como (rótulo, indicador, filtros):
+    cada seção de Demografias e a votação por Brasil / UF / município x
+    turno x cargo.
+    """
+    ufs = indice.ufs("tse_genero")
+    uf = "SP" if "SP" in ufs else ufs[0]
+    municipio = indice.municipios("tse_genero", uf)[0]
+    ufs_pnad = gerenciador.executar("SELECT DISTINCT UF FROM pnad_renda ORDER BY UF")['UF'].tolist()
+    uf_pnad = "São Paulo" if "São Paulo" in ufs_pnad else ufs_pnad[0]
+    regioes = gerenciador.executar(
+        'SELECT DISTINCT "Região" FROM pnad_renda ORDER BY 1')['Região'].tolist()
+
+    lista = []
+    for indicador in ["sexo", "idade"]:
+        lista.append((f"demografias/{indicador}/brasil", indicador, {}))
+        lista.append((f"demografias/{indicador}/uf", indicador, {"uf": uf}))
+        lista.append((f"demografias/{indicador}/municipio", indicador,
+                      {"uf": uf, "municipio": municipio}))
+    for indicador in ["renda", "escolaridade"]:
+        lista.append((f"demografias/{indicador}/brasil", indicador, {"regioes": regioes}))
+        lista.append((f"demografias/{indicador}/uf_capital", indicador,
+                      {"uf": uf_pnad, "regioes": ["Capital"]}))
+
+    municipio_eleicoes = indice.nome_no_dataset("eleicoes", uf, municipio)
+    niveis = [("brasil", {}), ("uf", {"uf": uf}),
+              ("municipio", {"uf": uf, "municipio": municipio_eleicoes})]
+    anos = indice.anos("eleicoes")
+    for turno in indice.turnos("eleicoes"):
+        for cargo in indice.cargos("eleicoes"):
+            for nivel, filtros in niveis:
+                lista.append((f"eleicoes/{nivel}/turno{turno}/{cargo.lower()}", "votacao",
+                              dict(filtros, turno=turno, cargo=cargo, ano=anos[0])))
+    if indice.tem_zonas("eleicoes"):
+        for nivel, filtros in niveis[1:]:
+            lista.append((f"eleicoes/zonas/{nivel}", "zonas",
+                          dict(filtros, turno=1, cargo="Senador", ano=anos[0],
+                               top=3, ordem="votos", pagina=0, por_pagina=50)))
+    if len(anos) > 1:
+        for nivel, filtros in niveis:
+            lista.append((f"eleicoes/comparacao/{nivel}", "comparacao",
+                          dict(filtros, turno=1, cargo="Presidente", anos=anos[:2])))
+    return lista
+
+
+def _opcoes(modo):
+    return {"rollup": modo == "rollup", "codificado": modo == "codificado"}
+
+
+def _executar(gerenciador, indicador, filtros, modo):
+    # Mesma composição de consulta + formatação do motor, sem o cache
+    _, consulta, _ = INDICADORES[indicador]
+    formatar = formatador(indicador)
+    query, params = consulta(**filtros, **_opcoes(modo))
+    inicio = time.perf_counter()
+    df = formatar(gerenciador.executar(query, params))
+    duracao = time.perf_counter() - inicio
+    return duracao, 0 if df is None else len(df)
+
+
+def leitura(gerenciador, indicador, filtros, modo):
+    """
+    Linhas e arquivos Parquet lidos pela consulta filtrada do caminho, do
+    perfil JSON do DuckDB ("operator_rows_scanned" e "Total Files Read" das
+    leituras), em uma execução separada para não somar o custo do perfil à
+    latência. Os arquivos mostram as partições (SG_UF=XX, ANO_ELEICAO=AAAA)
+    puladas pelo filtro. O DuckDB conta as linhas dos arquivos abertos antes
+    de pular os row groups pelas estatísticas; essa poda aparece na latência.
+    """
+    _, consulta, _ = INDICADORES[indicador]
+    query, params = consulta(**filtros, **_opcoes(modo))
+    with tempfile.TemporaryDirectory() as diretorio:
+        saida = os.path.join(diretorio, "perfil.json")
+        cursor = gerenciador.cursor()
+        try:
+            cursor.execute("PRAGMA enable_profiling = 'json'")
+            cursor.execute(f"PRAGMA profiling_output = '{saida}'")
+            cursor.execute(query, params).fetchall()
+            with open(saida) as arquivo:
+                perfil = json.load(arquivo)
+        finally:
+            cursor.close()
+
+    def somar(no):
+        linhas = int(no.get("operator_rows_scanned") or 0)
+        arquivos = int(no.get("extra_info", {}).get("Total Files Read", 0))
+        for filho in no.get("children", []):
+            linhas_filho, arquivos_filho = somar(filho)
+            linhas += linhas_filho
+            arquivos += arquivos_filho
+        return linhas, arquivos
+
+    return somar(perfil)
+
+
+def _rss_mb(campo):
+    # VmRSS (atual) ou VmHWM (pico) do processo, em KB no /proc
+    try:
+        with open("/proc/self/status") as arquivo:
+            for linha in arquivo:
+                if linha.startswith(campo + ":"):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+class PicoRSS:
+    """
+    Pico de memória residente de um trecho do benchmark. O pico do processo
+    é zerado na entrada (clear_refs, Linux 4.0+), então cada caminho mede o
+    próprio pico, e não o maior desde o início da execução. `acrescimo_mb`
+    desconta a memória que já estava em uso na entrada (conexão, caches e o
+    que sobrou dos caminhos anteriores). Sem suporte do sistema, os dois
+    ficam None.
+    """
+
+    def __enter__(self):
+        try:
+            with open("/proc/self/clear_refs", "w") as arquivo:
+                arquivo.write("5")
+            self._inicial = _rss_mb("VmRSS")
+        except OSError:
+            self._inicial = None
+        self.pico_mb = self.acrescimo_mb = None
+        return self
+
+    def __exit__(self, *excecao):
+        pico = _rss_mb("VmHWM") if self._inicial is not None else None
+        if pico is not None:
+            self.pico_mb = round(pico, 1)
+            self.acrescimo_mb = round(pico - self._inicial, 1)
+        return False
+
+
+def _resumo(caminho, modo, cache, duracoes, linhas, lidos, rss):
+    ms = np.array(duracoes) * 1000
+    linhas_lidas, arquivos_lidos = lidos if lidos is not None else (None, None)
+    return {
+        "caminho": caminho,
+        "modo": modo,
+        "cache": cache,
+        "amostras": len(duracoes),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "linhas_retornadas": linhas,
+        "linhas_lidas": linhas_lidas,
+        "arquivos_lidos": arquivos_lidos,
+        "pico_rss_mb": rss.pico_mb,
+        "acrescimo_rss_mb": rss.acrescimo_mb,
+    }
+
+
+def medir(dados, repeticoes=5, modos=MODOS):
+    """
+    Mede cada caminho de consulta em cada modo, com cache frio (conexão
+    nova a cada amostra, sem metadados nem buffers do DuckDB) e quente
+    (mesma conexão, depois de uma execução de aquecimento). O cache de
+    páginas do sistema operacional não é limpo entre as amostras. O pico de
+    memória é o de cada caminho, com as amostras frias e quentes.
+    """
+    resultados = []
+
+    # Inicialização e montagem do índice dos seletores
+    inicializacao, indices = [], []
+    with PicoRSS() as rss:
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            gerenciador = GerenciadorConexoes(data_dir=dados)
+            inicializacao.append(time.perf_counter() - inicio)
+            inicio = time.perf_counter()
+            indice = IndiceGeografico(gerenciador)
+            indices.append(time.perf_counter() - inicio)
+            gerenciador.fechar()
+    resultados.append(_resumo("inicializacao", "-", "frio", inicializacao, None, None, rss))
+    resultados.append(_resumo("seletores/indice", "-", "frio", indices, None, None, rss))
+
+    gerenciador = GerenciadorConexoes(data_dir=dados)
+    indice = IndiceGeografico(gerenciador)
+    quentes = []
+    with PicoRSS() as rss:
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            IndiceGeografico(gerenciador)
+            quentes.append(time.perf_counter() - inicio)
+    resultados.append(_resumo("seletores/indice", "-", "quente", quentes, None, None, rss))
+
+    lista = caminhos(gerenciador, indice)
+    for modo in modos:
+        for caminho, indicador, filtros in lista:
+            with PicoRSS() as rss:
+                frias = []
+                for _ in range(repeticoes):
+                    novo = GerenciadorConexoes(data_dir=dados)
+                    duracao, linhas = _executar(novo, indicador, filtros, modo)
+                    frias.append(duracao)
+                    novo.fechar()
+
+                _executar(gerenciador, indicador, filtros, modo)
+                quentes = []
+                for _ in range(repeticoes):
+                    duracao, linhas = _executar(gerenciador, indicador, filtros, modo)
+                    quentes.append(duracao)
+
+            lidos = leitura(gerenciador, indicador, filtros, modo)
+            resultados.append(_resumo(caminho, modo, "frio", frias, linhas, lidos, rss))
+            resultados.append(_resumo(caminho, modo, "quente", quentes, linhas, lidos, rss))
+    gerenciador.fechar()
+    return resultados
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(base, atual, limiar=0.2):
+    """
+    Compara o p50 de dois arquivos de resultado e retorna as regressões
+    acima de `limiar` (fração).
+    """
+    def indexar(resultado):
+        return {(r["caminho"], r["modo"], r["cache"]): r for r in resultado["resultados"]}
+
+    antes, depois = indexar(base), indexar(atual)
+    regressoes = []
+    for chave, novo in sorted(depois.items()):
+        antigo = antes.get(chave)
+        if antigo is None or not antigo["p50_ms"]:
+            continue
+        variacao = novo["p50_ms"] / antigo["p50_ms"] - 1
+        marcador = " <-- regressão" if variacao > limiar else ""
+        print(f"{'/'.join(chave):70s} {antigo['p50_ms']:10.2f} {novo['p50_ms']:10.2f} "
+              f"{variacao:+8.1%}{marcador}")
+        if variacao > limiar:
+            regressoes.append(chave)
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mede a latência das consultas do painel sobre dados sintéticos.")
+    parser.add_argument("--dados", default=os.path.join("Benchmarks", "dados"),
+                        help="Diretório com os arquivos (gerados se não existirem)")
+    parser.add_argument("--escala", type=float, default=1.0)
+    parser.add_argument("--zonas", type=int, default=4)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--modos", default=",".join(MODOS))
+    parser.add_argument("--saida", default=None,
+                        help="Arquivo JSON de resultados (padrão: Benchmarks/resultados/)")
+    parser.add_argument("--comparar", default=None,
+                        help="Resultado anterior para comparar com esta execução")
+    parser.add_argument("--limiar", type=float, default=0.2,
+                        help="Aumento do p50 considerado regressão (padrão: 20%%)")
+    args = parser.parse_args()
+
+    parametros = {"escala": args.escala, "zonas": args.zonas, "repeticoes": args.repeticoes}
+    if not os.path.exists(os.path.join(args.dados, "eleitores_por_genero.parquet")):
+        parametros.update(gerar(args.dados, args.escala, args.zonas))
+    modos = args.modos.split(",")
+    if "rollup" in modos:
+        gerenciador = GerenciadorConexoes(data_dir=args.dados)
+        construir_rollups(gerenciador, os.path.join(args.dados, "rollups"))
+        gerenciador.fechar()
+    if "codificado" in modos:
+        gerenciador = GerenciadorConexoes(data_dir=args.dados)
+        construir_dicionarios(gerenciador)
+        gerenciador.fechar()
+
+    resultados = medir(args.dados, args.repeticoes, modos)
+    for r in resultados:
+        print(f"{r['caminho']:45s} {r['modo']:7s} {r['cache']:6s} "
+              f"p50={r['p50_ms']:9.2f}ms p95={r['p95_ms']:9.2f}ms "
+              f"lidas={r['linhas_lidas']} arquivos={r['arquivos_lidos']} "
+              f"rss={r['pico_rss_mb']}MB "
+              f"(+{r['acrescimo_rss_mb']}MB)")
+
+    commit = _commit()
+    saida = args.saida
+    if saida is None:
+        carimbo = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        saida = os.path.join("Benchmarks", "resultados", f"{carimbo}-{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(saida) or ".", exist_ok=True)
+    atual = {"commit": commit, "data": datetime.datetime.now().isoformat(timespec="seconds"),
+             "parametros": parametros, "resultados": resultados}
+    with open(saida, "w", encoding="utf-8") as arquivo:
+        json.dump(atual, arquivo, ensure_ascii=False, indent=2)
+    print(f"Resultados gravados em {saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            base = json.load(arquivo)
+        if comparar(base, atual, args.limiar):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+import argparse
+import json
+import os
+
+import duckdb
+import numpy as np
+
+from Dados.Conexao import DATASETS, MULTIANUAIS
+from Dados.Dimensoes import CODIGOS_UF
+
+# Número de municípios brasileiros, usado como escala 1.0
+MUNICIPIOS_BRASIL = 5570
+
+UFS = [uf for uf in CODIGOS_UF if uf != "ZZ"]
+
+# Nomes dos estados na PNAD, na mesma ordem de UFS
+UFS_PNAD = [
+    "Rondônia", "Acre", "Amazonas", "Roraima", "Pará", "Amapá", "Tocantins",
+    "Maranhão", "Piauí", "Ceará", "Rio Grande do Norte", "Paraíba",
+    "Pernambuco", "Alagoas", "Sergipe", "Bahia", "Minas Gerais",
+    "Espírito Santo", "Rio de Janeiro", "São Paulo", "Paraná",
+    "Santa Catarina", "Rio Grande do Sul", "Mato Grosso do Sul",
+    "Mato Grosso", "Goiás", "Distrito Federal",
+]
+
+REGIOES = [
+    "Capital",
+    "Resto da RM (Região Metropolitana, excluindo a capital)",
+    "Resto da RIDE (Região Integrada de Desenvolvimento Econômico, excluindo a capital)",
+    "Resto da UF  (Unidade da Federação, excluindo a região metropolitana e a RIDE)",
+]
+GENEROS = ["FEMININO", "MASCULINO", "NÃO INFORMADO"]
+FAIXAS = ["16 a 24 anos", "25 a 34 anos", "35 a 44 anos", "45 a 59 anos", "60 anos ou mais"]
+RENDAS = ["Até R$ 2000", "R$ 2000 a R$ 3000", "R$ 3000 a R$ 5000",
+          "R$ 5000 a R$ 10000", "Acima de R$ 10000"]
+ESCOLARIDADES = ["Ensino Fundamental", "Ensino Médio", "Ensino Superior"]
+
+# Linhas por row group, o mesmo padrão da ingestão (Dados/Ingestao.py). Como
+# lá, as linhas são gravadas ordenadas por UF e município, para que o filtro
+# de UF pule os row groups das outras UFs
+LINHAS_POR_GRUPO = 50000
+
+
+def _lista(valores):
+    return "[" + ", ".join(f"'{valor}'" for valor in valores) + "]"
+
+
+def _aleatorio(semente, maximo):
+    # Inteiro pseudoaleatório determinístico em [0, maximo), sem estado
+    return f"(hash({semente}) % {int(maximo)})"
+
+
+def gerar_malha(municipios, caminho, vertices=64):
+    """
+    Malha municipal sintética em GeoJSON, com as propriedades da malha do
+    IBGE (CD_MUN, NM_MUN, SIGLA_UF): cada UF ocupa um bloco de 6 x 6 graus e
+    cada município (UF, nome, código do TSE) é um polígono irregular de
+    `vertices` pontos no bloco. Retorna os pares (código do TSE, código do
+    IBGE) da correspondência entre os dois.
+    """
+    feicoes = []
+    correspondencia = []
+    angulos = np.linspace(0, 2 * np.pi, vertices, endpoint=False)
+    for posicao_uf, uf in enumerate(UFS):
+        codigos = dict(sorted((nome, codigo) for sigla, nome, codigo in municipios
+                              if sigla == uf))
+        nomes = list(codigos)
+        lado = int(np.ceil(np.sqrt(len(nomes)))) or 1
+        celula = 6.0 / lado
+        origem = (-74.0 + 6.0 * (posicao_uf % 6), -34.0 + 6.0 * (posicao_uf // 6))
+        for posicao, nome in enumerate(nomes):
+            centro_x = origem[0] + celula * (posicao % lado + 0.5)
+            centro_y = origem[1] + celula * (posicao // lado + 0.5)
+            raio = 0.45 * celula * (1 + 0.15 * np.sin(5 * angulos + posicao))
+            anel = np.column_stack([centro_x + raio * np.cos(angulos),
+                                    centro_y + raio * np.sin(angulos)])
+            anel = np.vstack([anel, anel[:1]]).round(5).tolist()
+            codigo_ibge = CODIGOS_UF[uf] * 100000 + posicao + 1
+            correspondencia.append((codigos[nome], codigo_ibge))
+            feicoes.append({
+                "type": "Feature",
+                "properties": {"CD_MUN": str(codigo_ibge), "NM_MUN": nome, "SIGLA_UF": uf},
+                "geometry": {"type": "Polygon", "coordinates": [anel]},
+            })
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump({"type": "FeatureCollection", "features": feicoes}, arquivo)
+    return correspondencia
+
+
+def gerar(destino, escala=1.0, zonas=4, presidente=11, governador=8, senador=8,
+          anos=None, malha=False, linhas_por_grupo=LINHAS_POR_GRUPO):
+    """
+    Gera versões sintéticas dos cinco arquivos de `data/`, com o esquema e a
+    ordem de linhas da ingestão (inclusive o código do município,
+    CD_MUNICIPIO), em `destino`. `escala` multiplica os 5.570 municípios;
+    cada município recebe de 1 a `zonas` zonas eleitorais, e cada zona
+    recebe uma linha por candidato de cada cargo e turno, como no arquivo
+    munzona.
+
+    Com `anos`, a votação é gravada por eleição em
+    `eleicoes/ANO_ELEICAO=AAAA/SG_UF=XX/`, como na ingestão. Com `malha`,
+    grava também `municipios.geojson` para `python -m Dados.Geometria` e a
+    correspondência entre os códigos do TSE e do IBGE.
+    """
+    os.makedirs(destino, exist_ok=True)
+    municipios = max(len(UFS), int(MUNICIPIOS_BRASIL * escala))
+    conn = duckdb.connect(database=':memory:')
+    try:
+        conn.execute(f"""
+            CREATE TABLE municipios AS
+            SELECT i,
+                   {_lista(UFS)}[(i % {len(UFS)}) + 1] AS SG_UF,
+                   CAST(10000 + i AS INTEGER) AS CD_MUNICIPIO,
+                   'MUNICIPIO ' || lpad(CAST(i AS VARCHAR), 5, '0') AS NM_MUNICIPIO,
+                   CAST(1 + {_aleatorio('i', zonas)} AS BIGINT) AS zonas
+            FROM range({municipios}) t(i)
+        """)
+
+        opcoes = f"FORMAT parquet, COMPRESSION zstd, ROW_GROUP_SIZE {int(linhas_por_grupo)}"
+
+        def gravar(nome, consulta, ordem="SG_UF, NM_MUNICIPIO"):
+            caminho = os.path.join(destino, DATASETS[nome])
+            conn.execute(
+                f"COPY (SELECT * FROM ({consulta}) ORDER BY {ordem}) "
+                f"TO '{caminho}' ({opcoes})")
+            return caminho
+
+        gravar("tse_genero", f"""
+            SELECT SG_UF, CD_MUNICIPIO, NM_MUNICIPIO, DS_GENERO,
+                   CAST(10 + {_aleatorio("i || DS_GENERO", 50000)} AS BIGINT) AS QT_ELEITORES_PERFIL
+            FROM municipios, unnest({_lista(GENEROS)}) g(DS_GENERO)
+        """)
+        gravar("tse_idade", f"""
+            SELECT SG_UF, CD_MUNICIPIO, NM_MUNICIPIO, DS_FAIXA_ETARIA,
+                   CAST(10 + {_aleatorio("i || DS_FAIXA_ETARIA", 30000)} AS BIGINT) AS QT_ELEITORES_PERFIL
+            FROM municipios, unnest({_lista(FAIXAS)}) f(DS_FAIXA_ETARIA)
+        """)
+        for nome, dimensao, valores in [("pnad_renda", "Renda", RENDAS),
+                                        ("pnad_escolaridade", "Escolaridade", ESCOLARIDADES)]:
+            semente = f'UF || "Região" || {dimensao}'
+            gravar(nome, f"""
+                SELECT UF, "Região", {dimensao},
+                       CAST(1000 + {_aleatorio(semente, 1000000)} AS DOUBLE) AS Total
+                FROM unnest({_lista(UFS_PNAD)}) u(UF),
+                     unnest({_lista(REGIOES)}) r("Região"),
+                     unnest({_lista(valores)}) d({dimensao})
+            """, ordem='UF, "Região"')
+
+        # Candidatos: Presidente é nacional, Governador e Senador por UF; o
+        # segundo turno tem dois candidatos em todas as UFs
+        conn.execute(f"""
+            CREATE TABLE candidatos AS
+            SELECT 1 AS NR_TURNO, NULL AS SG_UF, 'Presidente' AS DS_CARGO, k
+            FROM range({presidente}) t(k)
+            UNION ALL SELECT 2, NULL, 'Presidente', k FROM range(2) t(k)
+            UNION ALL SELECT 1, SG_UF, 'Governador', k
+            FROM unnest({_lista(UFS)}) u(SG_UF), range({governador}) t(k)
+            UNION ALL SELECT 2, SG_UF, 'Governador', k
+            FROM unnest({_lista(UFS)}) u(SG_UF), range(2) t(k)
+            UNION ALL SELECT 1, SG_UF, 'Senador', k
+            FROM unnest({_lista(UFS)}) u(SG_UF), range({senador}) t(k)
+        """)
+
+        def votacao(ano):
+            semente = f"m.i || z || c.DS_CARGO || c.k || c.NR_TURNO || {ano}"
+            return f"""
+                SELECT c.NR_TURNO, m.SG_UF, m.CD_MUNICIPIO, m.NM_MUNICIPIO,
+                       CAST(z AS INTEGER) AS NR_ZONA, c.DS_CARGO,
+                       upper(c.DS_CARGO) || ' ' || COALESCE(c.SG_UF || ' ', '') || lpad(CAST(c.k AS VARCHAR), 2, '0') AS NM_URNA_CANDIDATO,
+                       'P' || CAST((c.k + {ano}) % 30 AS VARCHAR) AS SG_PARTIDO,
+                       CAST({_aleatorio(semente, 5000)} AS BIGINT) AS QT_VOTOS_NOMINAIS
+                FROM municipios m, range(1, m.zonas + 1) r(z), candidatos c
+                WHERE c.SG_UF IS NULL OR c.SG_UF = m.SG_UF
+            """
+
+        if anos:
+            base = os.path.join(destino, MULTIANUAIS["eleicoes"])
+            os.makedirs(base, exist_ok=True)
+            for ano in anos:
+                conn.execute(
+                    f"COPY (SELECT * FROM ({votacao(ano)}) ORDER BY SG_UF, NM_MUNICIPIO) "
+                    f"TO '{os.path.join(base, f'ANO_ELEICAO={int(ano)}')}' "
+                    f"({opcoes}, PARTITION_BY (SG_UF), OVERWRITE_OR_IGNORE)")
+            origem = f"{base}/**/*.parquet"
+        else:
+            origem = gravar("eleicoes", votacao(2022))
+
+        linhas = conn.execute(
+            f"SELECT COUNT(*) FROM read_parquet('{origem}')"
+        ).fetchone()[0]
+
+        if malha:
+            correspondencia = gerar_malha(
+                conn.execute("SELECT SG_UF, NM_MUNICIPIO, CD_MUNICIPIO FROM municipios").fetchall(),
+                os.path.join(destino, "municipios.geojson"))
+            conn.execute("CREATE TABLE correspondencia "
+                         "(CD_MUNICIPIO INTEGER, CD_MUNICIPIO_IBGE INTEGER)")
+            conn.executemany("INSERT INTO correspondencia VALUES (?, ?)", correspondencia)
+            gravar("municipios_ibge", "SELECT * FROM correspondencia", ordem="CD_MUNICIPIO")
+    finally:
+        conn.close()
+    return {"municipios": municipios, "linhas_votacao": linhas}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Gera dados sintéticos do TSE e da PNAD com o esquema de data/.")
+    parser.add_argument("--destino", default=os.path.join("Benchmarks", "dados"))
+    parser.add_argument("--escala", type=float, default=1.0,
+                        help="Fração dos 5.570 municípios (1.0 = Brasil inteiro)")
+    parser.add_argument("--zonas", type=int, default=4,
+                        help="Máximo de zonas eleitorais por município")
+    parser.add_argument("--presidente", type=int, default=11)
+    parser.add_argument("--governador", type=int, default=8)
+    parser.add_argument("--senador", type=int, default=8)
+    parser.add_argument("--anos", default=None,
+                        help="Eleições separadas por vírgula (ex.: 2018,2022) para "
+                             "gravar a votação particionada por ano")
+    parser.add_argument("--malha", action="store_true",
+                        help="Grava também uma malha municipal sintética em GeoJSON")
+    parser.add_argument("--linhas-por-grupo", type=int, default=LINHAS_POR_GRUPO,
+                        help="Linhas por row group dos Parquet gerados")
+    args = parser.parse_args()
+
+    anos = [int(ano) for ano in args.anos.split(",")] if args.anos else None
+    info = gerar(args.destino, args.escala, args.zonas, args.presidente,
+                 args.governador, args.senador, anos, args.malha, args.linhas_por_grupo)
+    print(f"{info['municipios']} municípios, {info['linhas_votacao']} linhas "
+          f"de votação em {args.destino}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import os
+import sys
+import threading
+
+from Dados.Dimensoes import REGIOES_PNAD
+from Dados.Instrumentacao import iniciar_execucao, medir
+from Dados.Motor import Motor, carregar_em_paralelo, get_motor
+
+# Script do Streamlit iniciado por `python -m Dados.Aquecimento`
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def pedidos_padrao(indice):
+    """
+    Indicadores exibidos ao abrir cada página, com os mesmos filtros que os
+    seletores mandam no primeiro rerun: Brasil, todas as regiões da PNAD e a
+    eleição, o turno e o cargo que aparecem primeiro nas listas.
+    """
+    regioes = next(iter(REGIOES_PNAD.values()))
+    pedidos = {
+        "sexo": dict(uf=None, municipio="Todos"),
+        "idade": dict(uf=None, municipio="Todos"),
+        "renda": dict(uf=None, regioes=regioes),
+        "escolaridade": dict(uf=None, regioes=regioes),
+    }
+    anos = indice.anos("eleicoes")
+    turnos = indice.turnos("eleicoes")
+    cargos = indice.cargos("eleicoes")
+    if anos and turnos and cargos:
+        pedidos["votacao"] = dict(uf=None, municipio="Todos", turno=turnos[0],
+                                  cargo=cargos[0], ano=anos[0])
+        if len(anos) > 1:
+            pedidos["comparacao"] = dict(uf=None, municipio="Todos", turno=turnos[0],
+                                         cargo=cargos[0], anos=sorted(anos[:2]))
+    return pedidos
+
+
+def aquecer(gerenciador=None, motor=None, app=True):
+    """
+    Prepara o processo antes da primeira sessão: registra os conjuntos de
+    dados (e lê os metadados dos Parquet), monta o índice dos seletores e
+    calcula as telas iniciais de cada página no cache de resultados. Com
+    `app`, também monta o cruzamento padrão e carrega a malha dos mapas, que
+    só o processo do Streamlit usa. Com o motor remoto (ATLAS_MOTOR_URL), a
+    conexão é a do serviço e o aquecimento só traz o índice e as telas
+    iniciais dele. Retorna as etapas do aquecimento com o tempo de cada uma;
+    a falha de um indicador fica registrada na etapa, sem interromper as
+    demais.
+    """
+    etapas = iniciar_execucao()
+    with medir("aquecimento", parte="conexao"):
+        if motor is None:
+            motor = Motor(gerenciador) if gerenciador is not None else get_motor()
+        if not motor.remoto:
+            # Registra os conjuntos de dados do processo
+            motor.gerenciador
+    with medir("aquecimento", parte="indice"):
+        indice = motor.indice()
+
+    pedidos = {nome: filtros for nome, filtros in pedidos_padrao(indice).items()
+               if motor.disponivel(nome)}
+    with medir("aquecimento", parte="indicadores", indicadores=list(pedidos)) as registro:
+        falhas = {}
+        for nome, futuro in carregar_em_paralelo(motor, pedidos):
+            try:
+                futuro.result()
+            except Exception as e:
+                falhas[nome] = str(e)
+        if falhas:
+            registro["falha"] = falhas
+
+    if app:
+        _aquecer_app(motor, indice)
+    # As consultas e a formatação dos indicadores também ficam registradas
+    # no contexto; só as etapas do aquecimento são retornadas
+    return [etapa for etapa in etapas if etapa["etapa"] == "aquecimento"]
+
+
+def _aquecer_app(motor, indice):
+    anos = indice.anos("eleicoes")
+    if anos and (indice.disponivel("tse_genero") or indice.disponivel("tse_idade")):
+        # Importado aqui para que o serviço HTTP não carregue o cruzamento
+        from Dados.Cruzamento import get_cruzamento
+        with medir("aquecimento", parte="cruzamento") as registro:
+            try:
+                get_cruzamento(motor, indice).correlacoes(
+                    anos[0], indice.turnos("eleicoes")[0], indice.cargos("eleicoes")[0])
+            except Exception as e:
+                registro["falha"] = str(e)
+
+    from Dados.Geometria import get_geometria
+    with medir("aquecimento", parte="geometria"):
+        get_geometria()
+
+
+class Prontidao:
+    """
+    Estado do aquecimento do processo, usado pelo sinal de prontidão
+    (`/pronto`, em Dados/Servico.py) do serviço HTTP e do app: o processo só
+    está pronto depois que `aquecer` termina.
+    """
+
+    def __init__(self):
+        self._evento = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.etapas = []
+        self.erro = None
+
+    def iniciar(self, gerenciador=None, motor=None, app=True, esperar=False):
+        """
+        Dispara o aquecimento em uma thread, uma única vez por processo; as
+        chamadas seguintes não aquecem de novo. Com `esperar`, só retorna
+        quando o aquecimento (desta ou de uma chamada anterior) termina.
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._aquecer, args=(gerenciador, motor, app),
+                    name="atlas-aquecimento", daemon=True)
+                self._thread.start()
+        if esperar:
+            self._evento.wait()
+
+    def _aquecer(self, gerenciador, motor, app):
+        try:
+            self.etapas = aquecer(gerenciador, motor, app)
+        except Exception as e:
+            self.erro = f"{type(e).__name__}: {e}"
+        finally:
+            self._evento.set()
+
+    def pronto(self):
+        return self._evento.is_set() and self.erro is None
+
+    def estado(self):
+        """
+        Resumo para o endpoint de prontidão: pronto, erro e tempo de cada
+        etapa do aquecimento.
+        """
+        return {
+            "pronto": self.pronto(),
+            "erro": self.erro,
+            "etapas": [dict(etapa) for etapa in self.etapas],
+        }
+
+
+_prontidao = Prontidao()
+
+
+def get_prontidao():
+    """
+    Retorna o estado de aquecimento do processo.
+    """
+    return _prontidao
+
+
+def main():
+    """
+    Aquece o processo e inicia o Streamlit nele mesmo, com os argumentos
+    recebidos repassados ao `streamlit run`. Como o servidor só começa a
+    ouvir depois do aquecimento, o `/_stcore/health` do Streamlit só responde
+    quando a instância já está quente; com ATLAS_PRONTIDAO_PORTA, o `/pronto`
+    já responde (503) durante o aquecimento.
+    """
+    # Com `python -m`, este arquivo roda como __main__ e o app.py importa
+    # outra cópia dele (Dados.Aquecimento): o estado de prontidão tem que ser
+    # o dessa cópia, senão o app aquece tudo de novo
+    from Dados.Aquecimento import get_prontidao as prontidao_do_app
+    from Dados.Servico import servir_prontidao
+    prontidao = prontidao_do_app()
+    servir_prontidao(prontidao)
+    prontidao.iniciar(esperar=True)
+    if prontidao.erro:
+        print(f"Aquecimento falhou: {prontidao.erro}")
+    for etapa in prontidao.etapas:
+        falha = f" (falha: {etapa['falha']})" if "falha" in etapa else ""
+        print(f"Aquecimento: {etapa['parte']} em {etapa['ms']:,.1f} ms{falha}")
+
+    from streamlit.web import cli
+    sys.argv = ["streamlit", "run", APP_PATH] + sys.argv[1:]
+    sys.exit(cli.main())
+
+
+if __name__ == "__main__":
+    main()
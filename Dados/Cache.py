@@ -0,0 +1,173 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+import pyarrow as pa
+
+from Dados.Instrumentacao import resumir_sql
+
+
+def tamanho_bytes(valor):
+    """
+    Estimativa do espaço ocupado por um resultado em cache.
+    """
+    if valor is None:
+        return 0
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(deep=True).sum())
+    if isinstance(valor, pa.Table):
+        # Buffers inteiros, mesmo os que uma fatia só usa em parte
+        return valor.get_total_buffer_size()
+    return sys.getsizeof(valor)
+
+
+class CacheResultados:
+    """
+    Cache LRU dos resultados do painel, chaveado pela requisição lógica
+    (indicador e filtros) em vez do DataFrame de entrada. Cada entrada guarda
+    a versão dos arquivos de onde veio; se a versão mudar, a entrada é
+    descartada na próxima leitura.
+    """
+
+    def __init__(self, max_entradas=512, max_bytes=256 * 1024 * 1024, ttl=None):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entradas = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+        self.invalidacoes = 0
+
+    def obter(self, chave, versao, calcular):
+        """
+        Retorna o valor em cache para `chave` se ele ainda for da `versao`
+        atual dos dados; caso contrário chama `calcular()` e guarda o
+        resultado. Exceções de `calcular` não são guardadas.
+        """
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                versao_entrada, valor, _, criado = entrada
+                expirado = self.ttl is not None and time.monotonic() - criado > self.ttl
+                if versao_entrada == versao and not expirado:
+                    self._entradas.move_to_end(chave)
+                    self.acertos += 1
+                    return valor
+                self._remover(chave)
+                self.invalidacoes += 1
+            self.falhas += 1
+
+        # O cálculo fica fora do lock para não serializar as sessões
+        valor = calcular()
+        self.guardar(chave, versao, valor)
+        return valor
+
+    def guardar(self, chave, versao, valor):
+        tamanho = tamanho_bytes(valor)
+        with self._lock:
+            if chave in self._entradas:
+                self._remover(chave)
+            if tamanho > self.max_bytes:
+                return
+            self._entradas[chave] = (versao, valor, tamanho, time.monotonic())
+            self._bytes += tamanho
+            while (len(self._entradas) > self.max_entradas
+                   or self._bytes > self.max_bytes):
+                antiga = next(iter(self._entradas))
+                self._remover(antiga)
+                self.remocoes += 1
+
+    def _remover(self, chave):
+        _, _, tamanho, _ = self._entradas.pop(chave)
+        self._bytes -= tamanho
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def estatisticas(self):
+        """
+        Contadores para dimensionar o cache.
+        """
+        with self._lock:
+            return {
+                "entradas": len(self._entradas),
+                "bytes": self._bytes,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "remocoes": self.remocoes,
+                "invalidacoes": self.invalidacoes,
+            }
+
+
+class ArmazemArrow(CacheResultados):
+    """
+    Resultados das consultas do DuckDB como tabelas Arrow, uma por consulta
+    e parâmetros, compartilhadas por todas as sessões do processo. As tabelas
+    são imutáveis, então as fatias (`slice`) e projeções (`select`) entregues
+    a cada sessão reaproveitam os mesmos buffers, sem cópia; a conversão para
+    pandas fica para quem formata a tabela exibida. O limite é só de bytes
+    residentes.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, ttl=None):
+        super().__init__(max_entradas=sys.maxsize, max_bytes=max_bytes, ttl=ttl)
+
+    def residentes(self):
+        """
+        Bytes residentes de cada tabela, da mais para a menos usada
+        recentemente, com a consulta resumida, os parâmetros e as linhas.
+        """
+        with self._lock:
+            entradas = list(self._entradas.items())
+        return [{"consulta": resumir_sql(chave[0]), "params": chave[1],
+                 "linhas": tabela.num_rows, "bytes": tamanho}
+                for chave, (_, tabela, tamanho, _) in reversed(entradas)]
+
+    def estatisticas(self):
+        return dict(super().estatisticas(), max_bytes=self.max_bytes)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Retorna o cache de resultados do processo, configurado por
+    ATLAS_CACHE_MAX_ENTRADAS, ATLAS_CACHE_MAX_MB e ATLAS_CACHE_TTL (segundos).
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            ttl = os.environ.get("ATLAS_CACHE_TTL")
+            _cache = CacheResultados(
+                max_entradas=int(os.environ.get("ATLAS_CACHE_MAX_ENTRADAS", 512)),
+                max_bytes=int(os.environ.get("ATLAS_CACHE_MAX_MB", 256)) * 1024 * 1024,
+                ttl=float(ttl) if ttl else None,
+            )
+        return _cache
+
+
+_armazem = None
+_armazem_lock = threading.Lock()
+
+
+def get_armazem():
+    """
+    Retorna o armazém de tabelas Arrow do processo, com o limite de memória
+    de ATLAS_ARROW_MAX_MB (padrão: 256).
+    """
+    global _armazem
+    with _armazem_lock:
+        if _armazem is None:
+            _armazem = ArmazemArrow(
+                max_bytes=int(os.environ.get("ATLAS_ARROW_MAX_MB", 256)) * 1024 * 1024)
+        return _armazem
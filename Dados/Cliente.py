@@ -0,0 +1,87 @@
+import json
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import pyarrow as pa
+
+from Dados.Dimensoes import IndiceGeografico
+from Dados.Instrumentacao import medir
+from Dados.Motor import ARROW_STREAM, INDICADORES
+
+
+class MotorRemoto:
+    """
+    Mesma interface do `Motor`, mas pede os indicadores ao serviço HTTP
+    (Dados/Servico.py) em Arrow IPC, e o índice dos seletores e dos conjuntos
+    disponíveis em /indice. Vários front-ends apontados para o mesmo serviço
+    compartilham um só cache e uma só conexão DuckDB, e o front-end não
+    precisa dos arquivos de dados (só da malha dos mapas).
+    """
+
+    remoto = True
+
+    def __init__(self, url, timeout=30):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self._indice = None
+        self._etag = None
+        self._lock = threading.Lock()
+
+    def disponivel(self, nome):
+        return self.indice().disponivel(INDICADORES[nome][0])
+
+    def indice(self):
+        """
+        Índice dos seletores do serviço. A cópia local só é refeita quando a
+        versão dos dados do serviço muda: o pedido leva a ETag da cópia e o
+        serviço responde 304 sem corpo enquanto ela vale.
+        """
+        with self._lock:
+            indice, etag = self._indice, self._etag
+        cabecalhos = {"If-None-Match": etag} if indice is not None else {}
+        requisicao = urllib.request.Request(f"{self.url}/indice", headers=cabecalhos)
+
+        with medir("remoto", indicador="indice") as registro:
+            try:
+                with urllib.request.urlopen(requisicao, timeout=self.timeout) as resposta:
+                    corpo = resposta.read()
+                    etag = resposta.headers.get("ETag")
+            except urllib.error.HTTPError as e:
+                if e.code != 304:
+                    raise
+                registro["acerto"] = True
+                return indice
+            registro["bytes"] = len(corpo)
+            indice = IndiceGeografico.de_estado(json.loads(corpo))
+        with self._lock:
+            self._indice, self._etag = indice, etag
+        return indice
+
+    def carregar(self, nome, **filtros):
+        if nome not in INDICADORES:
+            raise KeyError(f"Indicador desconhecido: '{nome}'")
+        parametros = []
+        for filtro, valor in filtros.items():
+            if valor is None:
+                continue
+            if isinstance(valor, (list, tuple)):
+                parametros.extend((filtro, item) for item in valor)
+            else:
+                parametros.append((filtro, str(valor)))
+        url = f"{self.url}/indicadores/{nome}?{urllib.parse.urlencode(parametros)}"
+        requisicao = urllib.request.Request(url, headers={"Accept": ARROW_STREAM})
+
+        with medir("remoto", indicador=nome) as registro:
+            try:
+                with urllib.request.urlopen(requisicao, timeout=self.timeout) as resposta:
+                    if resposta.status == 204:
+                        return None
+                    corpo = resposta.read()
+            except urllib.error.HTTPError as e:
+                if e.code == 404:
+                    raise FileNotFoundError(e.reason) from e
+                raise
+            registro["bytes"] = len(corpo)
+            return pa.ipc.open_stream(corpo).read_all().to_pandas()
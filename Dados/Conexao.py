@@ -0,0 +1,427 @@
+import glob
+import hashlib
+import json
+import os
+import re
+import threading
+
+import duckdb
+
+from Dados.Cache import tamanho_bytes
+from Dados.Instrumentacao import get_consultas_lentas, medir, resumir_sql
+
+# Diretório onde ficam os arquivos Parquet do painel
+DATA_DIR = os.environ.get("ATLAS_DATA_DIR", "data")
+
+# Conjuntos de dados registrados como views persistentes no DuckDB.
+# A chave é o nome da view usado nas consultas do app. Se existir um diretório
+# com o mesmo nome sem a extensão (saída particionada de Dados/Ingestao.py),
+# ele tem prioridade sobre o arquivo único.
+DATASETS = {
+    "pnad_renda": "dados_pnad_renda.parquet",
+    "pnad_escolaridade": "pnad_escolaridade_2023.parquet",
+    "tse_genero": "eleitores_por_genero.parquet",
+    "tse_idade": "eleitores_por_faixa_etaria.parquet",
+    "eleicoes": "dados_votacao_candidato_munzona_2022_BR.parquet",
+    "municipios_ibge": "municipios_tse_ibge.parquet",
+}
+
+# Conjuntos com várias edições, em `data/<diretório>/ANO_ELEICAO=AAAA/SG_UF=XX/`
+# (`python -m Dados.Ingestao votacao --ano AAAA`). Sem esse diretório, o
+# arquivo de DATASETS é usado como a edição do ano que aparece no seu nome.
+MULTIANUAIS = {
+    "eleicoes": "eleicoes",
+}
+
+# Subdiretório com os rollups gerados por `python -m Dados.Rollups`
+ROLLUPS_SUBDIR = "rollups"
+
+# Subdiretório com as dimensões (`dimensoes/`) e as tabelas de fatos com
+# códigos inteiros (`fatos/<view>/`) geradas por `python -m Dados.Dicionarios`
+CODIFICADOS_SUBDIR = "codificados"
+
+# Caminho de origem (relativo a `data/`) de cada tabela de fatos codificada,
+# gravado por Dados/Dicionarios.py; uma tabela gerada de outra origem não é
+# registrada
+ORIGENS_CODIFICADOS = "origens.json"
+
+# Conjuntos do TSE atualizados todo mês, com snapshots versionados em
+# `data/snapshots/<view>/<rótulo>/SG_UF=XX/` (`python -m Dados.Ingestao genero
+# ... --snapshot AAAA-MM`). O snapshot em uso é o de maior rótulo já validado
+# por Dados/Snapshots.py, que grava o manifesto; sem nenhum, vale o arquivo de
+# DATASETS.
+SNAPSHOTS_SUBDIR = "snapshots"
+VERSIONADOS = ["tse_genero", "tse_idade"]
+MANIFESTO = "_manifesto.json"
+
+# Rótulos aceitos: os auxiliares da ingestão (".tmp", ".old") ficam de fora
+ROTULO = re.compile(r"^[0-9A-Za-z_-]+$")
+
+
+class GerenciadorConexoes:
+    """
+    Mantém uma única conexão DuckDB por processo, com os arquivos de `data/`
+    registrados como views, e entrega cursores para as sessões do Streamlit.
+    """
+
+    def __init__(self, data_dir=DATA_DIR, threads=None, memory_limit=None,
+                 hash_conteudo=None, snapshots=None):
+        self.data_dir = data_dir
+        if hash_conteudo is None:
+            hash_conteudo = os.environ.get("ATLAS_HASH_CONTEUDO") == "1"
+        self.hash_conteudo = hash_conteudo
+        self._hashes = {}
+        self.threads = threads or os.environ.get("ATLAS_DUCKDB_THREADS")
+        self.memory_limit = memory_limit or os.environ.get(
+            "ATLAS_DUCKDB_MEMORY_LIMIT")
+
+        config = {}
+        if self.threads:
+            config["threads"] = int(self.threads)
+        if self.memory_limit:
+            config["memory_limit"] = self.memory_limit
+
+        self._conn = duckdb.connect(database=':memory:', config=config)
+        # O cache de metadados evita reler o rodapé dos Parquet a cada consulta
+        self._conn.execute("SET parquet_metadata_cache = true")
+        self._lock = threading.Lock()
+        self.views = {}
+        # Assinatura do arquivo de cada tabela materializada em memória
+        # (rollups e dimensões) no momento da leitura
+        self._materializadas = {}
+        self._materializadas_lock = threading.Lock()
+        # Rótulo do snapshot em uso e impressão do conteúdo de cada UF, por
+        # conjunto versionado
+        self.snapshots = {}
+        self.impressoes = {}
+        self._impressoes_total = {}
+        self._registrar_views(snapshots or {})
+
+    def _registrar_views(self, snapshots):
+        """
+        Cria uma view para cada conjunto de dados encontrado em `data_dir`.
+        Nos conjuntos versionados, usa o snapshot de `snapshots` ({view:
+        rótulo}) ou o mais recente já validado.
+        """
+        for nome, arquivo in DATASETS.items():
+            caminho = os.path.join(self.data_dir, arquivo)
+            diretorio = os.path.splitext(caminho)[0]
+            colunas = "*"
+            if nome in VERSIONADOS:
+                rotulo = snapshots.get(nome) or snapshot_publicado(self.data_dir, nome)
+                if rotulo is not None:
+                    caminho = diretorio = caminho_snapshot(self.data_dir, nome, rotulo)
+                    self._registrar_snapshot(nome, rotulo, diretorio)
+            if nome in MULTIANUAIS:
+                ano = re.search(r"_(\d{4})(_|\.|$)", arquivo)
+                colunas = f"*, CAST({ano.group(1)} AS BIGINT) AS ANO_ELEICAO"
+                multianual = os.path.join(self.data_dir, MULTIANUAIS[nome])
+                if os.path.isdir(multianual):
+                    # ANO_ELEICAO e SG_UF vêm do caminho, e o filtro de
+                    # eleição só abre os arquivos daquele ano
+                    caminho = diretorio = multianual
+                    colunas = "*"
+            if os.path.isdir(diretorio):
+                # As partições SG_UF=XX viram coluna e permitem pular as
+                # UFs fora do filtro sem abrir os arquivos
+                caminho = diretorio
+                origem = (f"read_parquet('{diretorio}/**/*.parquet', "
+                          f"hive_partitioning = true, union_by_name = true)")
+            elif os.path.exists(caminho):
+                origem = f"read_parquet('{caminho}')"
+            else:
+                continue
+            self._conn.execute(
+                f"CREATE OR REPLACE VIEW {nome} AS SELECT {colunas} FROM {origem}")
+            self.views[nome] = caminho
+
+        # Os rollups são pequenos e ficam materializados em memória, o que
+        # transforma cada seleção do app em uma busca pontual. Nos conjuntos
+        # versionados, os refeitos para o snapshot em uso
+        # (Dados/Snapshots.py) substituem os de `rollups/`
+        rollups = {}
+        diretorios = [os.path.join(self.data_dir, ROLLUPS_SUBDIR)]
+        diretorios += [caminho_rollups_snapshot(self.data_dir, dataset, rotulo)
+                       for dataset, rotulo in sorted(self.snapshots.items())]
+        for diretorio in diretorios:
+            for caminho in sorted(glob.glob(os.path.join(diretorio, "*.parquet"))):
+                rollups["rollup_" + os.path.splitext(os.path.basename(caminho))[0]] = caminho
+        for nome, caminho in rollups.items():
+            self._materializar(nome, caminho)
+
+        # As dimensões também são pequenas e ficam em memória; as tabelas de
+        # fatos codificadas são lidas dos arquivos, como as originais
+        codificados = os.path.join(self.data_dir, CODIFICADOS_SUBDIR)
+        origens = _ler_json(os.path.join(codificados, ORIGENS_CODIFICADOS)) or {}
+        padrao = os.path.join(codificados, "dimensoes", "*.parquet")
+        for caminho in sorted(glob.glob(padrao)):
+            nome = "dim_" + os.path.splitext(os.path.basename(caminho))[0]
+            self._materializar(nome, caminho)
+        for diretorio in sorted(glob.glob(os.path.join(codificados, "fatos", "*"))):
+            dataset = os.path.basename(diretorio)
+            nome = "fato_" + dataset
+            if dataset in origens and origens[dataset] != self.origem(dataset):
+                # Gerada de outro snapshot: as consultas voltam ao conjunto
+                # original até `python -m Dados.Dicionarios` rodar de novo
+                continue
+            self._conn.execute(
+                f"CREATE OR REPLACE VIEW {nome} AS SELECT * FROM "
+                f"read_parquet('{diretorio}/**/*.parquet', hive_partitioning = true)")
+            self.views[nome] = diretorio
+
+    def _materializar(self, nome, caminho):
+        # A assinatura é tirada antes da leitura: se o arquivo for trocado
+        # durante a cópia, a próxima verificação lê de novo
+        assinatura = _assinatura(caminho)
+        self._conn.execute(
+            f"CREATE OR REPLACE TABLE {nome} AS "
+            f"SELECT * FROM read_parquet('{caminho}')")
+        self.views[nome] = caminho
+        self._materializadas[nome] = assinatura
+
+    def _atualizar_materializadas(self):
+        """
+        Relê as tabelas em memória cujo arquivo foi regravado desde a
+        leitura (`python -m Dados.Rollups` ou `python -m Dados.Dicionarios`
+        com o app no ar), para que a versão nova do arquivo nunca seja
+        calculada com a cópia antiga. As consultas já em andamento terminam
+        na cópia anterior.
+        """
+        with self._materializadas_lock:
+            for nome, assinatura in list(self._materializadas.items()):
+                caminho = self.views[nome]
+                if os.path.exists(caminho) and _assinatura(caminho) != assinatura:
+                    with medir("materializacao", tabela=nome):
+                        self._materializar(nome, caminho)
+
+    def _registrar_snapshot(self, nome, rotulo, diretorio):
+        self.snapshots[nome] = rotulo
+        manifesto = ler_manifesto(diretorio)
+        if manifesto is not None:
+            self.impressoes[nome] = manifesto["impressoes"]
+            self._impressoes_total[nome] = hashlib.sha256(json.dumps(
+                manifesto["impressoes"], sort_keys=True).encode()).hexdigest()
+
+    def origem(self, dataset):
+        """
+        Caminho do conjunto registrado, relativo a `data_dir`.
+        """
+        caminho = self.views.get(dataset)
+        return None if caminho is None else os.path.relpath(caminho, self.data_dir)
+
+    def disponivel(self, dataset):
+        """
+        Indica se o conjunto de dados foi registrado como view.
+        """
+        return dataset in self.views
+
+    def snapshot(self):
+        """
+        Identifica a versão dos dados registrados (caminho, mtime e tamanho),
+        usada para invalidar o que foi derivado deles.
+        """
+        versao = []
+        for nome, caminho in sorted(self.views.items()):
+            versao.append((nome, caminho) + _assinatura(caminho))
+        return tuple(versao)
+
+    def versao(self, *datasets):
+        """
+        Versão de um ou mais conjuntos registrados: mtime e tamanho de cada
+        arquivo e, com `hash_conteudo`, o hash SHA-256 do conteúdo. Antes,
+        os rollups e as dimensões regravados são lidos de novo para a memória.
+        """
+        self._atualizar_materializadas()
+        versao = []
+        for dataset in datasets:
+            caminho = self.views.get(dataset)
+            if caminho is None:
+                versao.append((dataset, None))
+                continue
+            assinatura = _assinatura(caminho)
+            if self.hash_conteudo:
+                assinatura += (self._hash(caminho, assinatura),)
+            versao.append((dataset,) + assinatura)
+        return tuple(versao)
+
+    def versionado(self, dataset):
+        """
+        Indica se o conjunto veio de um snapshot validado, com a impressão
+        do conteúdo de cada UF.
+        """
+        return dataset in self.impressoes
+
+    def versao_uf(self, dataset, uf=None):
+        """
+        Versão de um conjunto versionado restrita a uma UF: a impressão do
+        conteúdo da UF no snapshot em uso, ou a de todas as UFs com `uf` None
+        (o Brasil). Um snapshot novo só muda a versão das UFs alteradas.
+        Como em `versao`, as tabelas em memória regravadas são lidas de novo.
+        """
+        self._atualizar_materializadas()
+        if uf is None:
+            return ((dataset, None, self._impressoes_total[dataset]),)
+        return ((dataset, uf, self.impressoes[dataset].get(uf)),)
+
+    def _hash(self, caminho, assinatura):
+        # O hash só é recalculado quando mtime ou tamanho mudam
+        chave = (caminho,) + assinatura
+        if chave not in self._hashes:
+            sha = hashlib.sha256()
+            for arquivo in _arquivos(caminho):
+                sha.update(os.path.relpath(arquivo, caminho).encode())
+                with open(arquivo, "rb") as conteudo:
+                    for bloco in iter(lambda: conteudo.read(1024 * 1024), b""):
+                        sha.update(bloco)
+            self._hashes[chave] = sha.hexdigest()
+        return self._hashes[chave]
+
+    def cursor(self):
+        """
+        Retorna um cursor novo sobre a conexão compartilhada. Cada cursor
+        pode ser usado por uma thread, mas compartilha catálogo e buffers.
+        """
+        with self._lock:
+            return self._conn.cursor()
+
+    def executar(self, query, params=None):
+        """
+        Executa a consulta em um cursor próprio e retorna um DataFrame. O
+        tempo, as linhas e os bytes materializados são registrados como a
+        etapa "duckdb" do rerun (Dados/Instrumentacao.py).
+        """
+        return self._executar(query, params, "fetchdf")
+
+    def executar_arrow(self, query, params=None):
+        """
+        Como `executar`, mas retorna uma tabela Arrow: o texto fica em
+        buffers contíguos, sem um objeto Python por valor, e a tabela pode
+        ser fatiada sem cópia.
+        """
+        return self._executar(query, params, "fetch_arrow_table")
+
+    def _executar(self, query, params, buscar):
+        cursor = self.cursor()
+        try:
+            with medir("duckdb", sql=resumir_sql(query), params=params) as registro:
+                resultado = getattr(cursor.execute(query, params), buscar)()
+                registro["linhas"] = len(resultado)
+                registro["bytes"] = tamanho_bytes(resultado)
+        finally:
+            cursor.close()
+
+        lentas = get_consultas_lentas()
+        if lentas is not None and lentas.candidata(registro["ms"]):
+            lentas.guardar(registro["ms"], query, params, self._explicar(query, params))
+        return resultado
+
+    def _explicar(self, query, params=None):
+        # Reexecuta com EXPLAIN ANALYZE para guardar o plano com os tempos
+        # reais de cada operador
+        cursor = self.cursor()
+        try:
+            return cursor.execute(f"EXPLAIN ANALYZE {query}", params).fetchall()[0][1]
+        finally:
+            cursor.close()
+
+    def fechar(self):
+        self._conn.close()
+
+
+def caminho_snapshot(data_dir, dataset, rotulo):
+    return os.path.join(data_dir, SNAPSHOTS_SUBDIR, dataset, rotulo)
+
+
+def caminho_rollups_snapshot(data_dir, dataset, rotulo):
+    """
+    Diretório dos rollups refeitos para um snapshot. Cada snapshot tem os
+    seus, para que o gerenciador em uso nunca veja os do snapshot seguinte
+    antes da troca.
+    """
+    return os.path.join(data_dir, ROLLUPS_SUBDIR, dataset, rotulo)
+
+
+def listar_snapshots(data_dir, dataset):
+    """
+    Rótulos dos snapshots de um conjunto, em ordem crescente.
+    """
+    diretorio = os.path.join(data_dir, SNAPSHOTS_SUBDIR, dataset)
+    if not os.path.isdir(diretorio):
+        return []
+    return sorted(rotulo for rotulo in os.listdir(diretorio)
+                  if ROTULO.match(rotulo)
+                  and os.path.isdir(os.path.join(diretorio, rotulo)))
+
+
+def ler_manifesto(diretorio):
+    """
+    Manifesto de um snapshot validado, ou None se ele ainda não foi validado.
+    """
+    return _ler_json(os.path.join(diretorio, MANIFESTO))
+
+
+def snapshot_publicado(data_dir, dataset):
+    """
+    Rótulo do snapshot validado mais recente do conjunto, ou None.
+    """
+    for rotulo in reversed(listar_snapshots(data_dir, dataset)):
+        if ler_manifesto(caminho_snapshot(data_dir, dataset, rotulo)) is not None:
+            return rotulo
+    return None
+
+
+def _ler_json(caminho):
+    try:
+        with open(caminho, encoding="utf-8") as arquivo:
+            return json.load(arquivo)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _arquivos(caminho):
+    """
+    Arquivos Parquet de um conjunto: o próprio arquivo ou os de um diretório
+    particionado.
+    """
+    if not os.path.isdir(caminho):
+        return [caminho]
+    return sorted(glob.glob(os.path.join(caminho, "**", "*.parquet"), recursive=True))
+
+
+def _assinatura(caminho):
+    """
+    Maior mtime, tamanho total e número de arquivos de um conjunto.
+    """
+    infos = [os.stat(arquivo) for arquivo in _arquivos(caminho)]
+    return (max((info.st_mtime_ns for info in infos), default=0),
+            sum(info.st_size for info in infos), len(infos))
+
+
+_gerenciador = None
+_gerenciador_lock = threading.Lock()
+
+
+def get_gerenciador():
+    """
+    Retorna o gerenciador de conexões do processo, criando-o na primeira chamada.
+    """
+    global _gerenciador
+    with _gerenciador_lock:
+        if _gerenciador is None:
+            _gerenciador = GerenciadorConexoes()
+        return _gerenciador
+
+
+def trocar_gerenciador(novo, anterior):
+    """
+    Troca o gerenciador do processo por `novo` se o atual ainda for
+    `anterior`. As sessões que já pegaram o anterior terminam o rerun nele,
+    com as views e os rollups da versão antiga; a conexão antiga é fechada
+    pelo coletor de lixo quando a última referência sai de uso.
+    """
+    global _gerenciador
+    with _gerenciador_lock:
+        if _gerenciador is not anterior:
+            return False
+        _gerenciador = novo
+        return True
@@ -0,0 +1,482 @@
+# Camada de consultas do painel. Cada função monta o SQL já agregado de um
+# indicador (GROUP BY + SUM + percentual por janela) sobre as views registradas
+# em Dados/Conexao.py e retorna a consulta junto com os parâmetros posicionais.
+# Com `rollup=True` a mesma tabela é lida dos rollups de Dados/Rollups.py, em
+# que cada seleção é uma busca pontual sobre linhas já agregadas. Com
+# `codificado=True` a leitura é feita nas tabelas de fatos com códigos inteiros
+# de Dados/Dicionarios.py.
+
+# Marcador das linhas de total nos rollups
+TODOS = "Todos"
+
+# Valores da coluna Região da PNAD; a linha "Todos" dos rollups soma as quatro
+REGIOES = [
+    "Capital",
+    "Resto da RM (Região Metropolitana, excluindo a capital)",
+    "Resto da RIDE (Região Integrada de Desenvolvimento Econômico, excluindo a capital)",
+    "Resto da UF  (Unidade da Federação, excluindo a região metropolitana e a RIDE)",
+]
+
+# Colunas de texto das views -> (dimensão, código inteiro) nas tabelas de
+# fatos codificadas. SG_UF continua como coluna de texto: as tabelas de fatos
+# só são particionadas por ANO_ELEICAO (ou não são), e o filtro de UF pula os
+# grupos de linhas pela ordenação (FATOS, em Dados/Dicionarios.py).
+CODIFICADAS = {
+    "NM_MUNICIPIO": ("dim_municipio", "CD_MUNICIPIO"),
+    "DS_CARGO": ("dim_cargo", "CD_CARGO"),
+    "DS_GENERO": ("dim_genero", "CD_GENERO"),
+    "DS_FAIXA_ETARIA": ("dim_faixa_etaria", "CD_FAIXA_ETARIA"),
+    "NM_URNA_CANDIDATO": ("dim_candidato", "CD_CANDIDATO"),
+}
+
+# Colunas que vêm junto com outra dimensão (o partido do candidato e a UF
+# do município)
+ATRIBUTOS = {
+    "SG_PARTIDO": "NM_URNA_CANDIDATO",
+    "SG_UF": "NM_MUNICIPIO",
+}
+
+
+class _MaisRecente:
+    """
+    Valor de filtro que seleciona o maior valor da coluna em `tabela` (a
+    eleição mais recente).
+    """
+
+    def __init__(self, tabela):
+        self.tabela = tabela
+
+
+def _eleicao(ano, tabela):
+    # Sem `ano`, vale a eleição mais recente da tabela lida: os votos de
+    # eleições diferentes nunca são somados, em nenhum dos caminhos
+    return _MaisRecente(tabela) if ano is None else ano
+
+
+def _where(condicoes, fixas=None, codificado=False):
+    """
+    Monta a cláusula WHERE a partir de pares (coluna, valor), ignorando os
+    filtros vazios ou "Todos". Listas viram `coluna IN (?, ...)`. Com
+    `codificado`, os filtros de texto viram filtros pelo código inteiro,
+    buscado na dimensão.
+    """
+    clausulas = list(fixas or [])
+    params = []
+    uf = dict(condicoes).get("SG_UF")
+    for coluna, valor in condicoes:
+        if valor is None or valor == "Todos":
+            continue
+        if isinstance(valor, _MaisRecente):
+            clausula = f"{coluna} = (SELECT MAX({coluna}) FROM {valor.tabela})"
+            valores = []
+        elif isinstance(valor, (list, tuple)):
+            if not valor:
+                continue
+            marcadores = ", ".join("?" for _ in valor)
+            clausula = f"{coluna} IN ({marcadores})"
+            valores = list(valor)
+        else:
+            clausula = f"{coluna} = ?"
+            valores = [valor]
+
+        if codificado and coluna in CODIFICADAS:
+            dimensao, codigo = CODIFICADAS[coluna]
+            if coluna == "NM_MUNICIPIO":
+                # O nome só identifica o município dentro da UF, e a busca
+                # aceita a grafia de qualquer um dos arquivos do TSE
+                dimensao = "dim_municipio_grafias"
+                if uf is not None and uf != "Todos":
+                    clausula += " AND SG_UF = ?"
+                    valores.append(uf)
+            clausula = f"{codigo} IN (SELECT {codigo} FROM {dimensao} WHERE {clausula})"
+        clausulas.append(clausula)
+        params.extend(valores)
+
+    if not clausulas:
+        return "", params
+    return " WHERE " + " AND ".join(clausulas), params
+
+
+def _tabela(view, codificado=False):
+    # Tabela lida pelas consultas: a view ou a tabela de fatos codificada
+    return f"fato_{view}" if codificado else view
+
+
+def _origem(view, colunas, medida, condicoes, fixas=None, codificado=False):
+    """
+    Trecho `FROM ... WHERE ...` das consultas agregadas, com as linhas do
+    recorte e as `colunas` usadas pela consulta.
+
+    Com `codificado`, a tabela de fatos é filtrada e pré-somada pelos códigos
+    inteiros, e só as linhas já somadas são juntadas às dimensões para
+    recuperar os textos. A consulta que usa a origem é a mesma nos dois
+    modos: somar de novo as linhas pré-somadas dá o mesmo total.
+    """
+    if not codificado:
+        where, params = _where(condicoes, fixas)
+        return f"{view}{where}", params
+
+    where, params = _where(condicoes, codificado=True)
+    chaves, juncoes = [], []
+    for coluna in colunas:
+        if ATRIBUTOS.get(coluna) in colunas:
+            continue
+        if coluna in CODIFICADAS:
+            dimensao, codigo = CODIFICADAS[coluna]
+            chaves.append(codigo)
+            juncoes.append(f" JOIN {dimensao} USING ({codigo})")
+        else:
+            chaves.append(coluna)
+    # Filtros fixos sobre os textos valem depois da junção com as dimensões
+    filtro = f" WHERE {' AND '.join(fixas)}" if fixas else ""
+    return (
+        f"(SELECT {', '.join(chaves)}, SUM({medida}) AS {medida} "
+        f"FROM fato_{view}{where} GROUP BY {', '.join(chaves)})"
+        f"{''.join(juncoes)}{filtro}"
+    ), params
+
+
+def _consulta_agregada(view, dimensao, medida, condicoes, fixas=None,
+                       inteira=False, codificado=False):
+    """
+    Soma a medida por dimensão e calcula o percentual de cada linha sobre o
+    total do recorte com uma função de janela.
+    """
+    origem, params = _origem(view, [dimensao], medida, condicoes, fixas, codificado)
+    # SUM de BIGINT vira HUGEINT, que o pandas recebe como float
+    soma = f"CAST(SUM({medida}) AS BIGINT)" if inteira else f"SUM({medida})"
+    query = (
+        f"SELECT {dimensao}, {soma} AS {medida}, "
+        f"100.0 * SUM({medida}) / SUM(SUM({medida})) OVER () AS Percentual "
+        f"FROM {origem} "
+        f"GROUP BY {dimensao} ORDER BY {dimensao}"
+    )
+    return query, params
+
+
+def _consulta_rollup(nome, colunas, geografia, recorte=(), ordem=None):
+    """
+    Busca pontual em um rollup. Filtros geográficos vazios selecionam as
+    linhas de total, marcadas com "Todos".
+    """
+    clausulas = []
+    params = []
+    for coluna, valor in geografia:
+        clausulas.append(f"{coluna} = ?")
+        params.append(TODOS if valor is None else valor)
+    for coluna, valor in recorte:
+        if isinstance(valor, _MaisRecente):
+            clausulas.append(f"{coluna} = (SELECT MAX({coluna}) FROM rollup_{nome})")
+            continue
+        clausulas.append(f"{coluna} = ?")
+        params.append(valor)
+
+    query = (
+        f"SELECT {', '.join(colunas)}, Percentual FROM rollup_{nome} "
+        f"WHERE {' AND '.join(clausulas)} "
+        f"ORDER BY {ordem or colunas[0]}"
+    )
+    return query, params
+
+
+def _regiao_rollup(regioes):
+    """
+    Converte a lista de regiões do app no valor da coluna Região do rollup:
+    uma única região é buscada pelo nome, a lista completa (ou vazia) vira
+    "Todos". Os demais subconjuntos não têm linha no rollup e retornam None.
+    """
+    if not regioes or set(regioes) == set(REGIOES):
+        return TODOS
+    if len(regioes) == 1:
+        return regioes[0]
+    return None
+
+
+def consulta_sexo(uf=None, municipio=None, rollup=False, codificado=False):
+    """
+    Eleitores por gênero, sem a classe 'NÃO INFORMADO'.
+    """
+    if rollup:
+        return _consulta_rollup(
+            "sexo", ["DS_GENERO", "QT_ELEITORES_PERFIL"],
+            [("SG_UF", uf), ("NM_MUNICIPIO", municipio)])
+    return _consulta_agregada(
+        "tse_genero", "DS_GENERO", "QT_ELEITORES_PERFIL",
+        [("SG_UF", uf), ("NM_MUNICIPIO", municipio)],
+        fixas=["DS_GENERO <> 'NÃO INFORMADO'"], inteira=True, codificado=codificado)
+
+
+def consulta_idade(uf=None, municipio=None, rollup=False, codificado=False):
+    """
+    Eleitores por faixa etária.
+    """
+    if rollup:
+        return _consulta_rollup(
+            "idade", ["DS_FAIXA_ETARIA", "QT_ELEITORES_PERFIL"],
+            [("SG_UF", uf), ("NM_MUNICIPIO", municipio)])
+    return _consulta_agregada(
+        "tse_idade", "DS_FAIXA_ETARIA", "QT_ELEITORES_PERFIL",
+        [("SG_UF", uf), ("NM_MUNICIPIO", municipio)], inteira=True,
+        codificado=codificado)
+
+
+def consulta_renda(uf=None, regioes=None, rollup=False, codificado=False):
+    """
+    População por faixa de renda da PNAD. O filtro de UF usa o nome do estado.
+    As tabelas da PNAD são pequenas e não têm versão codificada;
+    `codificado` é ignorado. Um subconjunto de regiões sem linha própria no
+    rollup é somado a partir da tabela.
+    """
+    regiao = _regiao_rollup(regioes)
+    if rollup and regiao is not None:
+        return _consulta_rollup(
+            "renda", ["Renda", "Total"], [("UF", uf), ("Região", regiao)])
+    return _consulta_agregada(
+        "pnad_renda", "Renda", "Total",
+        [("UF", uf), ("Região", regioes)])
+
+
+def consulta_escolaridade(uf=None, regioes=None, rollup=False, codificado=False):
+    """
+    População por nível de escolaridade da PNAD (`codificado` é ignorado).
+    """
+    regiao = _regiao_rollup(regioes)
+    if rollup and regiao is not None:
+        return _consulta_rollup(
+            "escolaridade", ["Escolaridade", "Total"], [("UF", uf), ("Região", regiao)])
+    return _consulta_agregada(
+        "pnad_escolaridade", "Escolaridade", "Total",
+        [("UF", uf), ("Região", regioes)])
+
+
+def consulta_votacao(uf=None, municipio=None, turno=None, cargo=None,
+                     ano=None, rollup=False, codificado=False):
+    """
+    Votos nominais por candidato na eleição `ano` (sem ele, a mais recente),
+    ordenados do mais para o menos votado. Só as partições daquela eleição
+    são lidas.
+    """
+    if rollup:
+        return _consulta_rollup(
+            "votacao", ["NM_URNA_CANDIDATO", "SG_PARTIDO", "QT_VOTOS_NOMINAIS"],
+            [("SG_UF", uf), ("NM_MUNICIPIO", municipio)],
+            [("ANO_ELEICAO", _eleicao(ano, "rollup_votacao")),
+             ("NR_TURNO", turno), ("DS_CARGO", cargo)],
+            ordem="QT_VOTOS_NOMINAIS DESC")
+    origem, params = _origem(
+        "eleicoes", ["NM_URNA_CANDIDATO", "SG_PARTIDO"], "QT_VOTOS_NOMINAIS", [
+            ("ANO_ELEICAO", _eleicao(ano, _tabela("eleicoes", codificado))),
+            ("SG_UF", uf),
+            ("NM_MUNICIPIO", municipio),
+            ("NR_TURNO", turno),
+            ("DS_CARGO", cargo),
+        ], codificado=codificado)
+    query = (
+        "SELECT NM_URNA_CANDIDATO, SG_PARTIDO, "
+        "CAST(SUM(QT_VOTOS_NOMINAIS) AS BIGINT) AS QT_VOTOS_NOMINAIS, "
+        "COALESCE(ROUND(100.0 * SUM(QT_VOTOS_NOMINAIS) / "
+        "NULLIF(SUM(SUM(QT_VOTOS_NOMINAIS)) OVER (), 0), 2), 0.0) AS Percentual "
+        f"FROM {origem} "
+        "GROUP BY NM_URNA_CANDIDATO, SG_PARTIDO "
+        "ORDER BY QT_VOTOS_NOMINAIS DESC"
+    )
+    return query, params
+
+
+def consulta_comparacao(uf=None, municipio=None, turno=None, cargo=None,
+                        anos=None, rollup=False, codificado=False):
+    """
+    Votos e participação de cada partido em várias eleições, em uma única
+    agregação sobre as partições dos anos escolhidos. O percentual é
+    calculado dentro de cada ano. Não há rollup próprio; `rollup` é aceito
+    só para manter a assinatura dos demais indicadores.
+    """
+    anos = [int(ano) for ano in anos] if anos else None
+    origem, params = _origem(
+        "eleicoes", ["ANO_ELEICAO", "NM_URNA_CANDIDATO", "SG_PARTIDO"],
+        "QT_VOTOS_NOMINAIS", [
+            ("ANO_ELEICAO", anos),
+            ("SG_UF", uf),
+            ("NM_MUNICIPIO", municipio),
+            ("NR_TURNO", turno),
+            ("DS_CARGO", cargo),
+        ], codificado=codificado)
+    query = (
+        "SELECT ANO_ELEICAO, SG_PARTIDO, "
+        "CAST(SUM(QT_VOTOS_NOMINAIS) AS BIGINT) AS QT_VOTOS_NOMINAIS, "
+        "COALESCE(ROUND(100.0 * SUM(QT_VOTOS_NOMINAIS) / "
+        "NULLIF(SUM(SUM(QT_VOTOS_NOMINAIS)) OVER (PARTITION BY ANO_ELEICAO), 0), 2), 0.0) "
+        "AS Percentual "
+        f"FROM {origem} "
+        "GROUP BY ANO_ELEICAO, SG_PARTIDO "
+        "ORDER BY SG_PARTIDO, ANO_ELEICAO"
+    )
+    return query, params
+
+
+# Ordenações aceitas na tabela de zonas; a chave vem do app e nunca é
+# interpolada diretamente
+ORDENS_ZONAS = {
+    "zona": "NR_ZONA, Posicao",
+    "votos": "QT_VOTOS_NOMINAIS DESC, NR_ZONA",
+    "percentual": "Percentual DESC, NR_ZONA",
+    "candidato": "NM_URNA_CANDIDATO, NR_ZONA",
+}
+
+
+def consulta_zonas(uf=None, municipio=None, turno=None, cargo=None, ano=None,
+                   top=3, ordem="zona", pagina=None, por_pagina=50, rollup=False,
+                   codificado=False):
+    """
+    Os `top` candidatos mais votados de cada zona eleitoral do município (ou
+    da UF), com o percentual dentro da zona, na eleição `ano` (sem ele, a
+    mais recente). O ranking é feito com
+    ROW_NUMBER + QUALIFY; com `pagina`, a página é cortada com LIMIT/OFFSET.
+    Sem ela, saem todas as linhas na ordem pedida e o motor entrega cada
+    página como uma fatia da tabela Arrow. TOTAL_LINHAS traz o total para a
+    paginação. Não há rollup por zona; `rollup` é ignorado.
+    """
+    if ordem not in ORDENS_ZONAS:
+        raise ValueError(f"Ordenação desconhecida: '{ordem}'")
+    origem, params = _origem(
+        "eleicoes", ["NR_ZONA", "NM_URNA_CANDIDATO", "SG_PARTIDO"],
+        "QT_VOTOS_NOMINAIS", [
+            ("ANO_ELEICAO", _eleicao(ano, _tabela("eleicoes", codificado))),
+            ("SG_UF", uf),
+            ("NM_MUNICIPIO", municipio),
+            ("NR_TURNO", turno),
+            ("DS_CARGO", cargo),
+        ], codificado=codificado)
+    query = (
+        "SELECT NR_ZONA, Posicao, NM_URNA_CANDIDATO, SG_PARTIDO, "
+        "QT_VOTOS_NOMINAIS, Percentual, COUNT(*) OVER () AS TOTAL_LINHAS FROM ("
+        "SELECT NR_ZONA, NM_URNA_CANDIDATO, SG_PARTIDO, "
+        "CAST(SUM(QT_VOTOS_NOMINAIS) AS BIGINT) AS QT_VOTOS_NOMINAIS, "
+        "COALESCE(ROUND(100.0 * SUM(QT_VOTOS_NOMINAIS) / "
+        "NULLIF(SUM(SUM(QT_VOTOS_NOMINAIS)) OVER (PARTITION BY NR_ZONA), 0), 2), 0.0) "
+        "AS Percentual, "
+        "ROW_NUMBER() OVER (PARTITION BY NR_ZONA "
+        "ORDER BY SUM(QT_VOTOS_NOMINAIS) DESC, NM_URNA_CANDIDATO) AS Posicao "
+        f"FROM {origem} "
+        "GROUP BY NR_ZONA, NM_URNA_CANDIDATO, SG_PARTIDO "
+        "QUALIFY Posicao <= ?) "
+        f"ORDER BY {ORDENS_ZONAS[ordem]}"
+    )
+    params += [int(top)]
+    if pagina is not None:
+        query += " LIMIT ? OFFSET ?"
+        params += [int(por_pagina), int(pagina) * int(por_pagina)]
+    return query, params
+
+
+def _consulta_mapa(view, coluna, valor, medida, condicoes, codificado=False):
+    """
+    Participação de `coluna = valor` na medida de cada município, para o
+    mapa: uma linha por município com SG_UF, NM_MUNICIPIO e Valor (%), e nas
+    tabelas codificadas também o CD_MUNICIPIO, que liga o valor direto ao
+    polígono. Sem valor (None ou "Todos"), a participação é sobre a medida
+    inteira.
+    """
+    filtro, params_filtro = _where([(coluna, valor)], codificado=codificado)
+    parte = f"SUM({medida}) FILTER ({filtro.lstrip()})" if filtro else f"SUM({medida})"
+    if codificado:
+        # Agrega pelo código do município e junta os nomes só no final, uma
+        # linha por município
+        where, params = _where(condicoes, codificado=True)
+        query = (
+            "SELECT CD_MUNICIPIO, SG_UF, NM_MUNICIPIO, Valor FROM ("
+            "SELECT CD_MUNICIPIO, "
+            f"100.0 * COALESCE({parte}, 0) / NULLIF(SUM({medida}), 0) AS Valor "
+            f"FROM fato_{view}{where} "
+            "GROUP BY CD_MUNICIPIO) "
+            "JOIN dim_municipio USING (CD_MUNICIPIO)"
+        )
+        return query, params_filtro + params
+    origem, params = _origem(view, ["SG_UF", "NM_MUNICIPIO", coluna], medida, condicoes)
+    query = (
+        "SELECT SG_UF, NM_MUNICIPIO, "
+        f"100.0 * COALESCE({parte}, 0) / NULLIF(SUM({medida}), 0) AS Valor "
+        f"FROM {origem} "
+        "GROUP BY SG_UF, NM_MUNICIPIO"
+    )
+    return query, params_filtro + params
+
+
+def consulta_mapa_idade(uf=None, faixa="60 anos ou mais", rollup=False,
+                        codificado=False):
+    """
+    Percentual do eleitorado na faixa etária, por município.
+    """
+    return _consulta_mapa(
+        "tse_idade", "DS_FAIXA_ETARIA", faixa, "QT_ELEITORES_PERFIL",
+        [("SG_UF", uf)], codificado)
+
+
+def consulta_mapa_votacao(uf=None, turno=None, cargo=None, ano=None,
+                          candidato=None, rollup=False, codificado=False):
+    """
+    Percentual dos votos nominais do candidato, por município, na eleição
+    `ano` (sem ele, a mais recente).
+    """
+    return _consulta_mapa(
+        "eleicoes", "NM_URNA_CANDIDATO", candidato, "QT_VOTOS_NOMINAIS",
+        [("ANO_ELEICAO", _eleicao(ano, _tabela("eleicoes", codificado))), ("SG_UF", uf), ("NR_TURNO", turno), ("DS_CARGO", cargo)],
+        codificado)
+
+
+def consulta_perfil_municipios(view, dimensao, medida, fixas=None, codificado=False):
+    """
+    Eleitores de cada categoria da `dimensao` por município, para o
+    cruzamento com a votação (Dados/Cruzamento.py): SG_UF, NM_MUNICIPIO,
+    CATEGORIA e QUANTIDADE.
+    """
+    origem, params = _origem(
+        view, ["SG_UF", "NM_MUNICIPIO", dimensao], medida, [], fixas, codificado)
+    query = (
+        f"SELECT SG_UF, NM_MUNICIPIO, {dimensao} AS CATEGORIA, "
+        f"CAST(SUM({medida}) AS BIGINT) AS QUANTIDADE "
+        f"FROM {origem} "
+        f"GROUP BY SG_UF, NM_MUNICIPIO, {dimensao}"
+    )
+    return query, params
+
+
+def consulta_perfil_sexo(rollup=False, codificado=False):
+    """
+    Eleitores de cada gênero por município, sem o "NÃO INFORMADO".
+    """
+    return consulta_perfil_municipios(
+        "tse_genero", "DS_GENERO", "QT_ELEITORES_PERFIL",
+        ["DS_GENERO <> 'NÃO INFORMADO'"], codificado)
+
+
+def consulta_perfil_idade(rollup=False, codificado=False):
+    """
+    Eleitores de cada faixa etária por município.
+    """
+    return consulta_perfil_municipios(
+        "tse_idade", "DS_FAIXA_ETARIA", "QT_ELEITORES_PERFIL", None, codificado)
+
+
+def consulta_votos_municipios(turno=None, cargo=None, ano=None, rollup=False,
+                              codificado=False):
+    """
+    Votos nominais de cada candidato por município em uma eleição (sem
+    `ano`, a mais recente), turno e cargo, para o cruzamento com o perfil do
+    eleitorado: SG_UF, NM_MUNICIPIO, NM_URNA_CANDIDATO, SG_PARTIDO e
+    QUANTIDADE.
+    """
+    origem, params = _origem(
+        "eleicoes", ["SG_UF", "NM_MUNICIPIO", "NM_URNA_CANDIDATO", "SG_PARTIDO"],
+        "QT_VOTOS_NOMINAIS", [
+            ("ANO_ELEICAO", _eleicao(ano, _tabela("eleicoes", codificado))),
+            ("NR_TURNO", turno),
+            ("DS_CARGO", cargo),
+        ], codificado=codificado)
+    query = (
+        "SELECT SG_UF, NM_MUNICIPIO, NM_URNA_CANDIDATO, SG_PARTIDO, "
+        "CAST(SUM(QT_VOTOS_NOMINAIS) AS BIGINT) AS QUANTIDADE "
+        f"FROM {origem} "
+        "GROUP BY SG_UF, NM_MUNICIPIO, NM_URNA_CANDIDATO, SG_PARTIDO"
+    )
+    return query, params
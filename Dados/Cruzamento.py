@@ -0,0 +1,221 @@
+import threading
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from Dados.Instrumentacao import medir
+from Dados.Motor import INDICADORES
+
+# Variáveis do perfil do eleitorado: indicador por município do motor
+# (Dados/Motor.py) e prefixo do rótulo. Cada categoria vira uma coluna com o
+# percentual do eleitorado do município.
+PERFIS = {
+    "perfil_sexo": "Sexo",
+    "perfil_idade": "Idade",
+}
+
+# Seleções de votação (eleição, turno, cargo) mantidas em memória
+MAX_VOTACOES = 16
+
+
+def regressao(x, y):
+    """
+    Reta de mínimos quadrados de y em x, ignorando os pares com valor
+    ausente: inclinação, intercepto, correlação (r), R² e número de pontos.
+    """
+    validos = np.isfinite(x) & np.isfinite(y)
+    x, y = x[validos], y[validos]
+    n = len(x)
+    if n < 3 or x.std() == 0 or y.std() == 0:
+        return {"inclinacao": np.nan, "intercepto": np.nan, "r": np.nan,
+                "r2": np.nan, "n": n}
+    r = float(np.corrcoef(x, y)[0, 1])
+    inclinacao = r * y.std() / x.std()
+    return {
+        "inclinacao": float(inclinacao),
+        "intercepto": float(y.mean() - inclinacao * x.mean()),
+        "r": r,
+        "r2": r * r,
+        "n": n,
+    }
+
+
+def correlacoes(x, y):
+    """
+    Correlação de Pearson de cada coluna de `y` (n x c) com cada coluna de
+    `x` (n x k). Cada par usa só os municípios em que os dois valores
+    existem (um candidato a governador, só os da UF em que concorreu), e as
+    somas de todos os pares saem de uma vez, em multiplicações de matrizes
+    pelas máscaras de valores presentes. Retorna uma matriz c x k; pares com
+    menos de 3 municípios ou com uma das variáveis constante ficam com NaN.
+    """
+    mx, my = np.isfinite(x), np.isfinite(y)
+    with np.errstate(invalid="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        # Centralizar pela média da coluna não muda a correlação e evita
+        # perder precisão nas somas de quadrados
+        x = np.where(mx, x - np.nanmean(x, axis=0), 0.0)
+        y = np.where(my, y - np.nanmean(y, axis=0), 0.0)
+    mx, my = mx.astype(float), my.astype(float)
+    n = my.T @ mx
+    sx, sy = my.T @ x, y.T @ mx
+    vx = n * (my.T @ (x * x)) - sx * sx
+    vy = n * ((y * y).T @ mx) - sy * sy
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = np.clip((n * (y.T @ x) - sx * sy) / np.sqrt(vx * vy), -1.0, 1.0)
+    constantes = (vx <= 1e-9 * n * n) | (vy <= 1e-9 * n * n)
+    r[(n < 3) | constantes] = np.nan
+    return r
+
+
+class Cruzamento:
+    """
+    Votação x perfil do eleitorado por município. Os municípios são
+    alinhados pelo código do índice geográfico, que reconcilia as grafias dos
+    arquivos; a matriz do perfil (municípios x variáveis) é montada uma vez
+    por versão dos dados, e a de votação (municípios x candidatos) uma vez
+    por eleição, turno e cargo. Trocar o candidato, a variável ou a UF só
+    recorta e multiplica essas matrizes. Os dados por município vêm do motor,
+    local ou, com ATLAS_MOTOR_URL, o serviço HTTP.
+    """
+
+    def __init__(self, motor, indice):
+        self.motor = motor
+        self.indice = indice
+        self.snapshot = indice.snapshot
+
+        municipios = indice.tabela_municipios()
+        self.codigos = municipios["CODIGO"].to_numpy()
+        self.ufs = municipios["SG_UF"].to_numpy()
+        self.nomes = municipios["NM_MUNICIPIO"].to_numpy()
+        self._siglas, self._posicao_uf = np.unique(self.ufs, return_inverse=True)
+
+        self.variaveis = []
+        colunas = []
+        for nome, prefixo in PERFIS.items():
+            dataset = INDICADORES[nome][0]
+            if not indice.disponivel(dataset):
+                continue
+            categorias, matriz = self._matriz(
+                motor.carregar(nome), dataset, ["CATEGORIA"])
+            self.variaveis += [f"{prefixo} - {categoria}" for categoria in categorias]
+            colunas.append(_percentuais(matriz))
+        self.perfil = (np.hstack(colunas) if colunas
+                       else np.empty((len(self.codigos), 0)))
+
+        self._votacoes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _matriz(self, df, dataset, chaves):
+        """
+        Pivota o resultado longo (município, categoria, QUANTIDADE) em uma
+        matriz municípios x categorias na ordem de `self.codigos`. Uma
+        categoria só vale zero nos municípios das UFs em que aparece: fora
+        delas (um candidato a governador nas outras UFs) e nos municípios sem
+        linha, fica NaN, e não um zero que entraria nas correlações.
+        """
+        df = df.merge(self.indice.tabela_codigos(dataset), on=["SG_UF", "NM_MUNICIPIO"])
+        categorias = df[chaves].drop_duplicates().sort_values(chaves)
+        categorias = list(categorias.itertuples(index=False, name=None))
+        posicao_categoria = {categoria: i for i, categoria in enumerate(categorias)}
+
+        linhas = np.searchsorted(self.codigos, df["CODIGO"].to_numpy())
+        colunas = np.array([posicao_categoria[chave] for chave in
+                            df[chaves].itertuples(index=False, name=None)], dtype=np.int64)
+        presentes = np.zeros(len(self.codigos), dtype=bool)
+        presentes[linhas] = True
+        concorreu = np.zeros((len(self._siglas), len(categorias)), dtype=bool)
+        concorreu[self._posicao_uf[linhas], colunas] = True
+        definidos = presentes[:, None] & concorreu[self._posicao_uf]
+        matriz = np.where(definidos, 0.0, np.nan)
+        np.add.at(matriz, (linhas, colunas), df["QUANTIDADE"].to_numpy(dtype=float))
+        return [c[0] if len(c) == 1 else c for c in categorias], matriz
+
+    def votacao(self, ano, turno, cargo):
+        """
+        (candidatos, matriz municípios x candidatos com o percentual dos votos
+        nominais do município) da eleição, turno e cargo.
+        """
+        chave = (ano, turno, cargo)
+        with self._lock:
+            if chave in self._votacoes:
+                self._votacoes.move_to_end(chave)
+                return self._votacoes[chave]
+
+        candidatos, matriz = self._matriz(
+            self.motor.carregar("votos_municipios", turno=turno, cargo=cargo, ano=ano),
+            "eleicoes", ["NM_URNA_CANDIDATO", "SG_PARTIDO"])
+        resultado = ([f"{nome} ({partido})" for nome, partido in candidatos],
+                     _percentuais(matriz))
+
+        with self._lock:
+            self._votacoes[chave] = resultado
+            while len(self._votacoes) > MAX_VOTACOES:
+                self._votacoes.popitem(last=False)
+        return resultado
+
+    def _mascara(self, uf=None):
+        if uf is None:
+            return np.ones(len(self.codigos), dtype=bool)
+        return self.ufs == uf
+
+    def correlacoes(self, ano, turno, cargo, uf=None):
+        """
+        DataFrame candidatos x variáveis do perfil com a correlação entre o
+        percentual de votos e o percentual do eleitorado nos municípios do
+        Brasil ou da UF. Os candidatos sem votos em nenhum desses municípios
+        (os de outras UFs) ficam de fora.
+        """
+        with medir("cruzamento", indicador="correlacoes") as registro:
+            candidatos, votos = self.votacao(ano, turno, cargo)
+            mascara = self._mascara(uf)
+            concorreram = np.isfinite(votos[mascara]).any(axis=0)
+            r = correlacoes(self.perfil[mascara], votos[mascara][:, concorreram])
+            registro["municipios"] = int(mascara.sum())
+        candidatos = [c for c, concorreu in zip(candidatos, concorreram) if concorreu]
+        df = pd.DataFrame(r, index=candidatos, columns=self.variaveis)
+        df.index.name = "Candidato"
+        return df.reset_index()
+
+    def dispersao(self, ano, turno, cargo, candidato, variavel, uf=None):
+        """
+        Pontos do gráfico de dispersão (um por município, com UF e nome) e a
+        reta de regressão do percentual de votos do candidato sobre a
+        variável do perfil.
+        """
+        candidatos, votos = self.votacao(ano, turno, cargo)
+        mascara = self._mascara(uf)
+        x = self.perfil[mascara, self.variaveis.index(variavel)]
+        y = votos[mascara, candidatos.index(candidato)]
+        pontos = pd.DataFrame({
+            "SG_UF": self.ufs[mascara],
+            "NM_MUNICIPIO": self.nomes[mascara],
+            variavel: x,
+            "Votos (%)": y,
+        }).dropna()
+        return pontos, regressao(x, y)
+
+
+def _percentuais(matriz):
+    # Percentual de cada coluna sobre o total da linha (município); as
+    # categorias ausentes no município continuam NaN
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return 100.0 * matriz / np.nansum(matriz, axis=1, keepdims=True)
+
+
+_cruzamento = None
+_cruzamento_lock = threading.Lock()
+
+
+def get_cruzamento(motor, indice):
+    """
+    Retorna o cruzamento do processo, refeito apenas quando o índice
+    geográfico muda (isto é, quando os arquivos de dados mudam).
+    """
+    global _cruzamento
+    with _cruzamento_lock:
+        if _cruzamento is None or _cruzamento.snapshot != indice.snapshot:
+            _cruzamento = Cruzamento(motor, indice)
+        return _cruzamento
@@ -0,0 +1,243 @@
+import argparse
+import json
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from Dados.Conexao import (CODIFICADOS_SUBDIR, DATA_DIR, ORIGENS_CODIFICADOS,
+                           GerenciadorConexoes)
+from Dados.Dimensoes import DATASETS_MUNICIPIO, IndiceGeografico
+
+# Dimensões de texto dos arquivos do TSE. O código é atribuído na ordem dos
+# textos, então ordenar pelo código é o mesmo que ordenar pelo texto.
+DIMENSOES = {
+    "cargo": {
+        "codigo": "CD_CARGO",
+        "tipo": "SMALLINT",
+        "colunas": ["DS_CARGO"],
+        "origens": ["eleicoes"],
+    },
+    "genero": {
+        "codigo": "CD_GENERO",
+        "tipo": "SMALLINT",
+        "colunas": ["DS_GENERO"],
+        "origens": ["tse_genero"],
+    },
+    "faixa_etaria": {
+        "codigo": "CD_FAIXA_ETARIA",
+        "tipo": "SMALLINT",
+        "colunas": ["DS_FAIXA_ETARIA"],
+        "origens": ["tse_idade"],
+    },
+    "candidato": {
+        "codigo": "CD_CANDIDATO",
+        "tipo": "INTEGER",
+        "colunas": ["NM_URNA_CANDIDATO", "SG_PARTIDO"],
+        "origens": ["eleicoes"],
+    },
+}
+
+# Tabelas de fatos codificadas: dimensões trocadas pelo código (além do
+# município, presente em todas), colunas de partição e ordenação. Sem os
+# textos, cada eleição cabe em um arquivo; os filtros pulam grupos de linhas
+# pelas estatísticas de mín/máx das colunas da ordenação. Toda consulta de
+# votação filtra turno e cargo, que por isso vêm antes da UF.
+FATOS = {
+    "tse_genero": {
+        "dimensoes": ["genero"],
+        "particao": [],
+        "ordem": ["SG_UF", "CD_MUNICIPIO"],
+    },
+    "tse_idade": {
+        "dimensoes": ["faixa_etaria"],
+        "particao": [],
+        "ordem": ["SG_UF", "CD_MUNICIPIO"],
+    },
+    "eleicoes": {
+        "dimensoes": ["cargo", "candidato"],
+        "particao": ["ANO_ELEICAO"],
+        "ordem": ["NR_TURNO", "CD_CARGO", "SG_UF", "CD_MUNICIPIO"],
+    },
+}
+
+
+def para_pandas(tabela):
+    """
+    Converte um resultado Arrow em DataFrame. Cada coluna de texto em que os
+    valores se repetem (UF no mapa, candidatos na página de zonas, partidos
+    na comparação) é codificada como dicionário ainda no Arrow e chega ao
+    pandas como categórica, sem passar por um objeto Python por linha: cada
+    texto fica guardado uma vez e as linhas guardam só o código. Decimais
+    (as somas HUGEINT) viram float, como no `fetchdf`.
+    """
+    colunas = []
+    categoricas = []
+    for nome, coluna in zip(tabela.column_names, tabela.columns):
+        if pa.types.is_string(coluna.type) or pa.types.is_large_string(coluna.type):
+            if pc.count_distinct(coluna).as_py() <= len(coluna) // 2:
+                coluna = coluna.dictionary_encode()
+                categoricas.append(nome)
+        elif pa.types.is_decimal(coluna.type):
+            coluna = coluna.cast(pa.float64())
+        colunas.append(coluna)
+    df = pa.table(colunas, names=tabela.column_names).to_pandas()
+    for nome in categoricas:
+        # O dicionário do Arrow segue a ordem em que os textos aparecem; as
+        # formatações ordenam pelas categorias em ordem alfabética
+        df[nome] = df[nome].cat.reorder_categories(sorted(df[nome].cat.categories))
+    return df
+
+
+def _consulta_dimensao(spec, origens):
+    colunas = ", ".join(spec["colunas"])
+    distintos = " UNION ".join(f"SELECT DISTINCT {colunas} FROM {origem}" for origem in origens)
+    return (
+        f"SELECT CAST(ROW_NUMBER() OVER (ORDER BY {colunas}) AS {spec['tipo']}) "
+        f"AS {spec['codigo']}, {colunas} FROM ({distintos})"
+    )
+
+
+def _consulta_fato(dataset, dimensoes, com_codigo=True):
+    """
+    SELECT da tabela de fatos com os textos trocados pelos códigos das
+    dimensões já gravadas em `dimensoes` (diretório). O município é o código
+    do TSE que já vem no arquivo (CD_MUNICIPIO); só um arquivo sem a coluna
+    (`com_codigo` False, gerado antes de a ingestão mantê-la) é juntado às
+    grafias pelo nome.
+    """
+    spec = FATOS[dataset]
+    codigos = []
+    removidas = ["NM_MUNICIPIO"]
+    juncoes = []
+    if not com_codigo:
+        codigos.append("m.CD_MUNICIPIO")
+        juncoes.append(
+            f"JOIN read_parquet('{os.path.join(dimensoes, 'municipio_grafias.parquet')}') m "
+            "ON m.SG_UF = f.SG_UF AND m.NM_MUNICIPIO = f.NM_MUNICIPIO")
+    for i, nome in enumerate(spec["dimensoes"]):
+        dimensao = DIMENSOES[nome]
+        apelido = f"d{i}"
+        codigos.append(f"{apelido}.{dimensao['codigo']}")
+        removidas.extend(dimensao["colunas"])
+        # IS NOT DISTINCT FROM mantém as linhas com texto nulo
+        condicao = " AND ".join(
+            f"{apelido}.{coluna} IS NOT DISTINCT FROM f.{coluna}" for coluna in dimensao["colunas"])
+        juncoes.append(
+            f"JOIN read_parquet('{os.path.join(dimensoes, nome + '.parquet')}') {apelido} "
+            f"ON {condicao}")
+    return (
+        f"SELECT {', '.join(codigos)}, f.* EXCLUDE ({', '.join(removidas)}) "
+        f"FROM {dataset} f {' '.join(juncoes)}"
+    )
+
+
+def construir_dicionarios(gerenciador, destino=None):
+    """
+    Grava em `destino` (padrão: data/codificados/) as dimensões em
+    `dimensoes/<nome>.parquet` e as tabelas de fatos do TSE com códigos
+    inteiros em `fatos/<view>/`, particionadas como as originais e ordenadas
+    pelo código do município. O caminho de origem de cada tabela fica em
+    `origens.json`, para que uma tabela gerada de um snapshot anterior
+    (Dados/Snapshots.py) não seja usada com o snapshot novo.
+
+    O código do município é o do TSE, o mesmo do índice geográfico
+    (Dados/Dimensoes.py), que reconcilia com ele as grafias dos arquivos.
+    O diretório é montado ao lado e trocado no final, para que dimensões e
+    fatos mudem juntos.
+    """
+    destino = destino or os.path.join(gerenciador.data_dir, CODIFICADOS_SUBDIR)
+    temporario = destino + ".tmp"
+    _remover(temporario)
+    dimensoes = os.path.join(temporario, "dimensoes")
+    fatos = os.path.join(temporario, "fatos")
+    os.makedirs(dimensoes)
+    os.makedirs(fatos)
+
+    indice = IndiceGeografico(gerenciador)
+    municipios = indice.tabela_municipios()
+    grafias = pd.concat(
+        [indice.tabela_codigos(dataset) for dataset in DATASETS_MUNICIPIO],
+        ignore_index=True).drop_duplicates()
+
+    gerados = []
+    cursor = gerenciador.cursor()
+    try:
+        for nome, tabela in [("municipio", municipios), ("municipio_grafias", grafias)]:
+            cursor.register("tabela_municipios", tabela)
+            cursor.execute(
+                "COPY (SELECT CAST(CODIGO AS INTEGER) AS CD_MUNICIPIO, SG_UF, NM_MUNICIPIO "
+                "FROM tabela_municipios ORDER BY CD_MUNICIPIO) "
+                f"TO '{os.path.join(dimensoes, nome + '.parquet')}' (FORMAT parquet)")
+            cursor.unregister("tabela_municipios")
+
+        for nome, spec in DIMENSOES.items():
+            origens = [o for o in spec["origens"] if gerenciador.disponivel(o)]
+            if not origens:
+                continue
+            cursor.execute(
+                f"COPY ({_consulta_dimensao(spec, origens)}) "
+                f"TO '{os.path.join(dimensoes, nome + '.parquet')}' (FORMAT parquet)")
+
+        for dataset, spec in FATOS.items():
+            if not gerenciador.disponivel(dataset):
+                print(f"Tabela '{dataset}' ignorada: conjunto não encontrado.")
+                continue
+            saida = os.path.join(fatos, dataset)
+            opcoes = ["FORMAT parquet", "COMPRESSION zstd", "ROW_GROUP_SIZE 50000"]
+            if spec["particao"]:
+                arquivo = saida
+                opcoes.append(f"PARTITION_BY ({', '.join(spec['particao'])})")
+            else:
+                os.makedirs(saida)
+                arquivo = os.path.join(saida, "dados.parquet")
+            ordem = ", ".join(spec["particao"] + spec["ordem"])
+            colunas = {linha[0] for linha in cursor.execute(f"DESCRIBE {dataset}").fetchall()}
+            consulta = _consulta_fato(dataset, dimensoes, "CD_MUNICIPIO" in colunas)
+            cursor.execute(
+                f"COPY (SELECT * FROM ({consulta}) "
+                f"ORDER BY {ordem}) TO '{arquivo}' ({', '.join(opcoes)})")
+            linhas = cursor.execute(
+                f"SELECT COUNT(*) FROM read_parquet('{saida}/**/*.parquet')").fetchone()[0]
+            gerados.append(dataset)
+            print(f"Tabela '{dataset}' codificada: {linhas} linhas em "
+                  f"{os.path.join(destino, 'fatos', dataset)}")
+    finally:
+        cursor.close()
+
+    with open(os.path.join(temporario, ORIGENS_CODIFICADOS), "w", encoding="utf-8") as arquivo:
+        json.dump({dataset: gerenciador.origem(dataset) for dataset in gerados},
+                  arquivo, ensure_ascii=False)
+
+    antigo = destino + ".old"
+    _remover(antigo)
+    if os.path.exists(destino):
+        os.replace(destino, antigo)
+    os.replace(temporario, destino)
+    _remover(antigo)
+    return gerados
+
+
+def _remover(caminho):
+    if os.path.isdir(caminho):
+        shutil.rmtree(caminho)
+    elif os.path.exists(caminho):
+        os.remove(caminho)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Gera as dimensões e as tabelas de fatos com códigos inteiros do painel.")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--destino", default=None)
+    args = parser.parse_args()
+
+    gerenciador = GerenciadorConexoes(data_dir=args.data_dir)
+    construir_dicionarios(gerenciador, args.destino)
+    gerenciador.fechar()
+
+
+if __name__ == "__main__":
+    main()
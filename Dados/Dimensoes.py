@@ -0,0 +1,364 @@
+import hashlib
+import threading
+import unicodedata
+import zlib
+
+import pandas as pd
+
+from Dados.Conexao import DATASETS
+from Dados.Consultas import REGIOES
+
+# Códigos IBGE das UFs, o prefixo dos códigos IBGE de município.
+# 'ZZ' é o código do TSE para o eleitorado no exterior.
+CODIGOS_UF = {
+    "RO": 11, "AC": 12, "AM": 13, "RR": 14, "PA": 15, "AP": 16, "TO": 17,
+    "MA": 21, "PI": 22, "CE": 23, "RN": 24, "PB": 25, "PE": 26, "AL": 27,
+    "SE": 28, "BA": 29, "MG": 31, "ES": 32, "RJ": 33, "SP": 35, "PR": 41,
+    "SC": 42, "RS": 43, "MS": 50, "MT": 51, "GO": 52, "DF": 53, "ZZ": 99,
+}
+
+# Grafias divergentes entre os arquivos do TSE que a normalização não resolve
+# (chaves e valores já normalizados)
+APELIDOS = {
+    ("PR", "MUNHOZ DE MELO"): "MUNHOZ DE MELLO",
+    ("PA", "SANTA ISABEL DO PARA"): "SANTA IZABEL DO PARA",
+}
+
+# Ordem de exibição dos cargos no seletor da página de Eleições
+ORDEM_CARGOS = ["Presidente", "Governador", "Senador"]
+
+# Opções de região da PNAD na página de Demografias: rótulo exibido ->
+# valores da coluna Região. A primeira opção é a padrão.
+REGIOES_PNAD = {
+    "Todas as Regiões": REGIOES,
+    "Capital": ["Capital"],
+    "Região Metropolitana": ["Resto da RM (Região Metropolitana, excluindo a capital)"],
+    "RIDE": ["Resto da RIDE (Região Integrada de Desenvolvimento Econômico, excluindo a capital)"],
+    "Interior": ["Resto da UF  (Unidade da Federação, excluindo a região metropolitana e a RIDE)"],
+}
+
+# Conjuntos com município, na ordem de preferência do nome exibido
+DATASETS_MUNICIPIO = ["tse_genero", "tse_idade", "eleicoes"]
+
+
+def normalizar_nome(nome):
+    """
+    Chave de comparação de municípios: sem acentos, em maiúsculas e com
+    apóstrofos e hífens trocados por espaço ("DIAS D'ÁVILA" == "DIAS D ÁVILA").
+    """
+    sem_acento = unicodedata.normalize("NFKD", nome)
+    sem_acento = "".join(c for c in sem_acento if not unicodedata.combining(c))
+    for separador in ("'", "’", "`", "-"):
+        sem_acento = sem_acento.replace(separador, " ")
+    return " ".join(sem_acento.upper().split())
+
+
+def codigo_provisorio(uf, chave):
+    """
+    Código de um município que não tem o código do TSE em nenhum arquivo (os
+    gerados antes de a ingestão manter CD_MUNICIPIO). É negativo, para não
+    colidir com os do TSE, e depende só da UF e do nome normalizado, então
+    não muda quando outros municípios entram ou saem dos arquivos.
+    """
+    return -(1 + zlib.crc32(f"{uf}|{chave}".encode()) % (2 ** 31 - 2))
+
+
+class IndiceGeografico:
+    """
+    Índice das dimensões do painel, montado uma vez por versão dos dados:
+    conjuntos disponíveis, UF -> municípios ordenados com o código do TSE, e
+    turnos e cargos disponíveis. Os nomes de município são reconciliados
+    entre os arquivos de eleitorado e de resultados, para que as duas páginas
+    concordem. Com o motor remoto, o índice vem pronto do serviço HTTP
+    (`exportar` / `de_estado`).
+    """
+
+    def __init__(self, gerenciador):
+        self.snapshot = gerenciador.snapshot()
+        self._disponiveis = {dataset for dataset in DATASETS
+                             if gerenciador.disponivel(dataset)}
+        self._ufs = {}
+        self._municipios = {}
+        self._codigos = {}
+        self._nomes = {}
+        self._nome_dataset = {}
+        self._por_chave = {}
+        self._tabelas = {}
+        self._turnos = {}
+        self._cargos = {}
+        self._anos = {}
+        self._zonas = set()
+        self._ibge = {}
+        self._montar_municipios(gerenciador)
+        self._montar_ibge(gerenciador)
+        self._montar_eleicoes(gerenciador)
+
+    def _montar_municipios(self, gerenciador):
+        # Linhas (UF, grafia, código do TSE) de cada conjunto que tem
+        # município. O código vem da coluna CD_MUNICIPIO, mantida pela
+        # ingestão; nos arquivos sem ela, fica None
+        linhas = {}
+        for dataset in DATASETS_MUNICIPIO:
+            if not gerenciador.disponivel(dataset):
+                continue
+            colunas = set(gerenciador.executar(f"DESCRIBE {dataset}")["column_name"])
+            codigo = "CD_MUNICIPIO" if "CD_MUNICIPIO" in colunas else "NULL"
+            df = gerenciador.executar(
+                f"SELECT DISTINCT SG_UF, NM_MUNICIPIO, {codigo} AS CD_MUNICIPIO "
+                f"FROM {dataset}")
+            linhas[dataset] = sorted(
+                (uf, nome, None if pd.isna(cd) else int(cd))
+                for uf, nome, cd in zip(df['SG_UF'], df['NM_MUNICIPIO'], df['CD_MUNICIPIO']))
+
+        def chave(uf, nome):
+            normalizado = normalizar_nome(nome)
+            return (uf, APELIDOS.get((uf, normalizado), normalizado))
+
+        # O município é identificado pelo código do TSE. A chave normalizada
+        # do nome só reconcilia as grafias: leva ao código as linhas dos
+        # arquivos sem a coluna
+        for dataset, registros in linhas.items():
+            for uf, nome, cd in registros:
+                if cd is not None:
+                    self._por_chave.setdefault(chave(uf, nome), cd)
+        usados = set(self._por_chave.values())
+        for chave_nome in sorted({chave(uf, nome) for registros in linhas.values()
+                                  for uf, nome, cd in registros if cd is None}):
+            if chave_nome in self._por_chave:
+                continue
+            codigo = codigo_provisorio(*chave_nome)
+            while codigo in usados:
+                codigo -= 1
+            usados.add(codigo)
+            self._por_chave[chave_nome] = codigo
+
+        grafias = {}
+        presenca = {}
+        for dataset, registros in linhas.items():
+            presenca[dataset] = set()
+            for uf, nome, cd in registros:
+                codigo = self._por_chave[chave(uf, nome)] if cd is None else cd
+                grafias.setdefault(codigo, (uf, {}))[1].setdefault(dataset, nome)
+                presenca[dataset].add(codigo)
+                self._codigos[(uf, nome)] = codigo
+
+        for codigo, (uf, por_dataset) in grafias.items():
+            # O nome exibido vem do primeiro conjunto na ordem de preferência
+            nome = next(por_dataset[d] for d in DATASETS_MUNICIPIO if d in por_dataset)
+            self._nomes[codigo] = (uf, nome)
+            self._codigos[(uf, nome)] = codigo
+            for dataset, original in por_dataset.items():
+                self._nome_dataset[(dataset, codigo)] = original
+
+        for dataset, codigos in presenca.items():
+            por_uf = {}
+            for codigo in codigos:
+                uf, nome = self._nomes[codigo]
+                por_uf.setdefault(uf, []).append(nome)
+            self._ufs[dataset] = sorted(por_uf)
+            for uf, nomes in por_uf.items():
+                self._municipios[(dataset, uf)] = sorted(nomes)
+
+            # Grafia do conjunto (e nome exibido) -> código, para juntar
+            # resultados por município com um merge em vez de uma busca por
+            # linha. Os resultados das tabelas codificadas
+            # (Dados/Dicionarios.py) já vêm com o nome exibido.
+            tabela = {(uf, nome, self._codigos[(uf, nome)])
+                      for uf, nome, _ in linhas[dataset]}
+            tabela |= {self._nomes[codigo] + (codigo,) for codigo in codigos}
+            self._tabelas[dataset] = pd.DataFrame(
+                sorted(tabela), columns=["SG_UF", "NM_MUNICIPIO", "CODIGO"])
+
+    def _montar_ibge(self, gerenciador):
+        # Código do IBGE -> código do TSE, pela tabela de correspondência
+        # (`python -m Dados.Ingestao municipios`), para a malha do IBGE
+        if not gerenciador.disponivel("municipios_ibge"):
+            return
+        df = gerenciador.executar(
+            "SELECT CD_MUNICIPIO_IBGE, CD_MUNICIPIO FROM municipios_ibge")
+        self._ibge = {int(ibge): int(tse)
+                      for ibge, tse in zip(df['CD_MUNICIPIO_IBGE'], df['CD_MUNICIPIO'])
+                      if int(tse) in self._nomes}
+
+    def _montar_eleicoes(self, gerenciador):
+        if not gerenciador.disponivel("eleicoes"):
+            return
+        df = gerenciador.executar(
+            "SELECT DISTINCT ANO_ELEICAO, NR_TURNO, DS_CARGO FROM eleicoes")
+        self._anos["eleicoes"] = sorted(set(df['ANO_ELEICAO'].tolist()), reverse=True)
+        self._turnos["eleicoes"] = sorted(set(df['NR_TURNO'].tolist()))
+        cargos = set(df['DS_CARGO'])
+        # O arquivo antigo de votação não tem a zona eleitoral
+        colunas = gerenciador.executar("DESCRIBE eleicoes")['column_name']
+        if "NR_ZONA" in set(colunas):
+            self._zonas.add("eleicoes")
+        self._cargos["eleicoes"] = (
+            [c for c in ORDEM_CARGOS if c in cargos] +
+            sorted(cargos - set(ORDEM_CARGOS)))
+
+    def versao(self):
+        """
+        Identificador curto da versão dos dados do índice, usado como ETag
+        do /indice no serviço HTTP.
+        """
+        return hashlib.sha1(repr(self.snapshot).encode("utf-8")).hexdigest()[:16]
+
+    def exportar(self):
+        """
+        Estado do índice em tipos do JSON, servido pelo serviço HTTP em
+        /indice para os front-ends com o motor remoto (Dados/Cliente.py).
+        """
+        return {
+            "versao": self.versao(),
+            "disponiveis": sorted(self._disponiveis),
+            "ufs": self._ufs,
+            "municipios": [[dataset, uf, nomes]
+                           for (dataset, uf), nomes in self._municipios.items()],
+            "codigos": [[uf, nome, codigo] for (uf, nome), codigo in self._codigos.items()],
+            "nomes": [[codigo, uf, nome] for codigo, (uf, nome) in self._nomes.items()],
+            "nome_dataset": [[dataset, codigo, nome]
+                             for (dataset, codigo), nome in self._nome_dataset.items()],
+            "por_chave": [[uf, chave, codigo]
+                          for (uf, chave), codigo in self._por_chave.items()],
+            "tabelas": {dataset: [[uf, nome, int(codigo)] for uf, nome, codigo
+                                  in tabela.itertuples(index=False, name=None)]
+                        for dataset, tabela in self._tabelas.items()},
+            "turnos": self._turnos,
+            "cargos": self._cargos,
+            "anos": self._anos,
+            "zonas": sorted(self._zonas),
+            "ibge": [[ibge, codigo] for ibge, codigo in self._ibge.items()],
+        }
+
+    @classmethod
+    def de_estado(cls, estado):
+        """
+        Refaz o índice a partir de `exportar`, sem acesso aos dados. A versão
+        dos dados do serviço faz o papel do snapshot.
+        """
+        indice = cls.__new__(cls)
+        indice.snapshot = estado["versao"]
+        indice._disponiveis = set(estado["disponiveis"])
+        indice._ufs = estado["ufs"]
+        indice._municipios = {(dataset, uf): nomes
+                              for dataset, uf, nomes in estado["municipios"]}
+        indice._codigos = {(uf, nome): codigo for uf, nome, codigo in estado["codigos"]}
+        indice._nomes = {codigo: (uf, nome) for codigo, uf, nome in estado["nomes"]}
+        indice._nome_dataset = {(dataset, codigo): nome
+                                for dataset, codigo, nome in estado["nome_dataset"]}
+        indice._por_chave = {(uf, chave): codigo for uf, chave, codigo in estado["por_chave"]}
+        indice._tabelas = {
+            dataset: pd.DataFrame(linhas, columns=["SG_UF", "NM_MUNICIPIO", "CODIGO"])
+            for dataset, linhas in estado["tabelas"].items()}
+        indice._turnos = estado["turnos"]
+        indice._cargos = estado["cargos"]
+        indice._anos = estado["anos"]
+        indice._zonas = set(estado["zonas"])
+        indice._ibge = {ibge: codigo for ibge, codigo in estado["ibge"]}
+        return indice
+
+    def disponivel(self, dataset):
+        """
+        Indica se o conjunto de dados foi encontrado (na máquina do serviço,
+        com o motor remoto).
+        """
+        return dataset in self._disponiveis
+
+    def ufs(self, dataset):
+        """
+        Siglas das UFs presentes no conjunto de dados.
+        """
+        return self._ufs.get(dataset, [])
+
+    def municipios(self, dataset, uf):
+        """
+        Nomes de exibição dos municípios da UF presentes no conjunto de dados.
+        """
+        return self._municipios.get((dataset, uf), [])
+
+    def codigo(self, uf, nome):
+        """
+        Código do município (o do TSE, ou o provisório dos arquivos sem
+        ele), a partir de qualquer grafia conhecida.
+        """
+        return self._codigos.get((uf, nome))
+
+    def codigo_ibge(self, codigo_ibge):
+        """
+        Código do município a partir do código do IBGE, ou None se ele não
+        está na tabela de correspondência (ou se ela não foi ingerida).
+        """
+        return self._ibge.get(int(codigo_ibge))
+
+    def codigo_normalizado(self, uf, nome):
+        """
+        Código do município a partir de um nome de outra fonte (por exemplo,
+        a malha do IBGE), comparado pela chave normalizada.
+        """
+        chave = normalizar_nome(nome)
+        return self._por_chave.get((uf, APELIDOS.get((uf, chave), chave)))
+
+    def tabela_codigos(self, dataset):
+        """
+        DataFrame SG_UF, NM_MUNICIPIO (grafia do conjunto ou nome exibido),
+        CODIGO.
+        """
+        return self._tabelas.get(
+            dataset, pd.DataFrame(columns=["SG_UF", "NM_MUNICIPIO", "CODIGO"]))
+
+    def tabela_municipios(self):
+        """
+        DataFrame CODIGO, SG_UF, NM_MUNICIPIO (nome exibido), um por município.
+        """
+        linhas = [(codigo, uf, nome) for codigo, (uf, nome) in sorted(self._nomes.items())]
+        return pd.DataFrame(linhas, columns=["CODIGO", "SG_UF", "NM_MUNICIPIO"])
+
+    def nome(self, codigo):
+        """
+        Nome de exibição do município.
+        """
+        return self._nomes[codigo][1]
+
+    def nome_no_dataset(self, dataset, uf, nome):
+        """
+        Converte o nome exibido na grafia usada pelo conjunto de dados, para
+        ser usada no filtro da consulta. "Todos" e None passam direto.
+        """
+        if nome is None or nome == "Todos":
+            return nome
+        codigo = self.codigo(uf, nome)
+        return self._nome_dataset.get((dataset, codigo), nome)
+
+    def anos(self, dataset):
+        """
+        Eleições disponíveis, da mais recente para a mais antiga.
+        """
+        return self._anos.get(dataset, [])
+
+    def tem_zonas(self, dataset):
+        """
+        Indica se o conjunto tem a zona eleitoral (NR_ZONA).
+        """
+        return dataset in self._zonas
+
+    def turnos(self, dataset):
+        return self._turnos.get(dataset, [])
+
+    def cargos(self, dataset):
+        return self._cargos.get(dataset, [])
+
+
+_indice = None
+_indice_lock = threading.Lock()
+
+
+def get_indice(gerenciador):
+    """
+    Retorna o índice geográfico do processo, refazendo-o apenas quando os
+    arquivos registrados no gerenciador mudam.
+    """
+    global _indice
+    with _indice_lock:
+        if _indice is None or _indice.snapshot != gerenciador.snapshot():
+            _indice = IndiceGeografico(gerenciador)
+        return _indice
@@ -0,0 +1,349 @@
+import argparse
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pydeck as pdk
+
+from Dados.Conexao import DATA_DIR
+from Dados.Dimensoes import CODIGOS_UF
+
+# Malha municipal pré-simplificada gerada por `python -m Dados.Geometria`
+GEOMETRIA_PATH = os.path.join(DATA_DIR, "geometria", "municipios.npz")
+
+# Tolerância do Douglas-Peucker (em graus) de cada nível de zoom: o mapa do
+# Brasil inteiro não precisa dos detalhes que aparecem no mapa de uma UF. As
+# divisas entre municípios vizinhos são simplificadas uma única vez, então
+# os dois lados continuam coincidindo; só os municípios menores que a
+# tolerância, que ficariam com menos de 4 pontos, são mantidos sem
+# simplificar e podem se sobrepor um pouco aos vizinhos.
+NIVEIS = {
+    "brasil": 0.02,
+    "uf": 0.004,
+}
+
+UF_POR_CODIGO = {codigo: uf for uf, codigo in CODIGOS_UF.items()}
+
+# Escala de cores do mapa (RGB), do menor para o maior valor
+COR_MINIMA = np.array([255, 237, 160])
+COR_MAXIMA = np.array([189, 0, 38])
+COR_SEM_DADOS = [200, 200, 200, 90]
+
+# Código dos polígonos sem município correspondente no índice
+SEM_CODIGO = np.iinfo(np.int64).min
+
+
+def _manter(pontos, tolerancia):
+    """
+    Douglas-Peucker iterativo sobre uma linha (N x 2), com as duas pontas
+    fixas: máscara dos pontos mantidos. As distâncias de cada trecho são
+    calculadas de uma vez com numpy.
+    """
+    n = len(pontos)
+    manter = np.zeros(n, dtype=bool)
+    manter[0] = manter[-1] = True
+    pilha = [(0, n - 1)]
+    while pilha:
+        inicio, fim = pilha.pop()
+        if fim <= inicio + 1:
+            continue
+        a, b = pontos[inicio], pontos[fim]
+        trecho = pontos[inicio + 1:fim]
+        direcao = b - a
+        norma = np.hypot(direcao[0], direcao[1])
+        if norma == 0:
+            # Anel fechado: o primeiro corte é no ponto mais distante
+            distancias = np.hypot(trecho[:, 0] - a[0], trecho[:, 1] - a[1])
+        else:
+            distancias = np.abs(direcao[0] * (trecho[:, 1] - a[1])
+                                - direcao[1] * (trecho[:, 0] - a[0])) / norma
+        maior = int(np.argmax(distancias))
+        if distancias[maior] > tolerancia:
+            corte = inicio + 1 + maior
+            manter[corte] = True
+            pilha.append((inicio, corte))
+            pilha.append((corte, fim))
+    return manter
+
+
+def simplificar(pontos, tolerancia):
+    """
+    Douglas-Peucker sobre um anel fechado (N x 2); anéis que ficariam com
+    menos de 4 pontos são mantidos como estão.
+    """
+    if len(pontos) <= 4:
+        return pontos
+    resultado = pontos[_manter(pontos, tolerancia)]
+    return resultado if len(resultado) >= 4 else pontos
+
+
+def _arco(pontos, ids, tolerancia, simplificados):
+    # Cada divisa é simplificada uma vez, no sentido canônico (o menor dos
+    # dois pela sequência de ids), e o resultado é reaproveitado pelo
+    # vizinho, que percorre a mesma divisa no sentido contrário
+    direto = tuple(ids)
+    inverso = direto[::-1]
+    invertido = inverso < direto
+    chave = inverso if invertido else direto
+    if chave not in simplificados:
+        simplificados[chave] = _manter(pontos[::-1] if invertido else pontos, tolerancia)
+    manter = simplificados[chave]
+    return pontos[manter[::-1]] if invertido else pontos[manter]
+
+
+def simplificar_malha(aneis, tolerancia):
+    """
+    Simplifica os anéis fechados de uma malha preservando a topologia: cada
+    anel é cortado nas junções (pontos com mais de dois vizinhos distintos
+    na malha, onde uma divisa começa ou termina) e cada trecho entre junções
+    é simplificado uma única vez para todos os anéis que o compartilham, o
+    que evita as frestas e sobreposições de simplificar anel por anel. As
+    junções nunca são removidas. Anéis sem junção (ilhas, municípios sem
+    vizinhos na malha) são simplificados inteiros, como em `simplificar`.
+    """
+    abertos = [anel[:-1] if len(anel) > 1 and np.array_equal(anel[0], anel[-1]) else anel
+               for anel in aneis]
+    if not abertos:
+        return []
+    tamanhos = np.array([len(anel) for anel in abertos])
+    inicios = np.concatenate([[0], np.cumsum(tamanhos)])
+    pontos = np.concatenate(abertos)
+    # Pontos iguais (a mesma coordenada em anéis vizinhos) recebem o mesmo id
+    _, ids = np.unique(pontos, axis=0, return_inverse=True)
+    ids = ids.ravel()
+
+    seguintes = np.arange(len(pontos)) + 1
+    seguintes[inicios[1:] - 1] = inicios[:-1]
+    pares = np.column_stack([ids, ids[seguintes]])
+    pares = np.unique(np.concatenate([pares, pares[:, ::-1]]), axis=0)
+    pares = pares[pares[:, 0] != pares[:, 1]]
+    juncao = np.bincount(pares[:, 0], minlength=ids.max() + 1) > 2
+
+    simplificados = {}
+    resultado = []
+    for numero, anel in enumerate(abertos):
+        ids_anel = ids[inicios[numero]:inicios[numero + 1]]
+        posicoes = np.flatnonzero(juncao[ids_anel])
+        fechado = np.vstack([anel, anel[:1]])
+        if len(posicoes) == 0:
+            resultado.append(simplificar(fechado, tolerancia))
+            continue
+        n = len(anel)
+        cortes = list(posicoes) + [posicoes[0] + n]
+        partes = []
+        for inicio, fim in zip(cortes[:-1], cortes[1:]):
+            indices = np.arange(inicio, fim + 1) % n
+            partes.append(_arco(anel[indices], ids_anel[indices], tolerancia, simplificados)[:-1])
+        novo = np.concatenate(partes)
+        novo = np.vstack([novo, novo[:1]])
+        resultado.append(novo if len(novo) >= 4 else fechado)
+    return resultado
+
+
+def _aneis_externos(geometria):
+    # Só o anel externo de cada polígono; os buracos não aparecem no mapa
+    if geometria["type"] == "Polygon":
+        return [geometria["coordinates"][0]]
+    if geometria["type"] == "MultiPolygon":
+        return [poligono[0] for poligono in geometria["coordinates"]]
+    return []
+
+
+def preparar_geometria(origem, destino=GEOMETRIA_PATH):
+    """
+    Converte a malha municipal do IBGE (GeoJSON com CD_MUN, NM_MUN e
+    SIGLA_UF) em um .npz compacto, com os anéis simplificados para cada nível
+    de NIVEIS (`simplificar_malha`) em arrays float32 contíguos.
+    """
+    with open(origem, encoding="utf-8") as arquivo:
+        malha = json.load(arquivo)
+
+    codigos, ufs, nomes = [], [], []
+    originais, donos = [], []
+    for feicao in malha["features"]:
+        propriedades = feicao["properties"]
+        codigo = int(propriedades.get("CD_MUN") or propriedades.get("CD_MUNICIP"))
+        uf = (propriedades.get("SIGLA_UF") or propriedades.get("SIGLA")
+              or UF_POR_CODIGO.get(codigo // 100000))
+        nome = propriedades.get("NM_MUN") or propriedades.get("NM_MUNICIP")
+        indice = len(codigos)
+        codigos.append(codigo)
+        ufs.append(uf)
+        nomes.append(nome)
+        for anel in _aneis_externos(feicao["geometry"]):
+            originais.append(np.asarray(anel, dtype=np.float64)[:, :2])
+            donos.append(indice)
+
+    arrays = {
+        "cd_ibge": np.array(codigos, dtype=np.int64),
+        "uf": np.array(ufs, dtype="U2"),
+        "nome": np.array(nomes, dtype=str),
+    }
+    for nivel, tolerancia in NIVEIS.items():
+        simplificados = simplificar_malha(originais, tolerancia)
+        inicios = np.concatenate([[0], np.cumsum([len(anel) for anel in simplificados])])
+        arrays[f"{nivel}_coordenadas"] = np.concatenate(simplificados).astype(np.float32)
+        arrays[f"{nivel}_inicios"] = inicios.astype(np.int64)
+        arrays[f"{nivel}_municipio"] = np.array(donos, dtype=np.int32)
+
+    os.makedirs(os.path.dirname(destino) or ".", exist_ok=True)
+    # np.savez acrescenta .npz ao nome se ele não terminar assim
+    temporario = destino + ".tmp.npz"
+    np.savez_compressed(temporario, **arrays)
+    os.replace(temporario, destino)
+    return {nivel: len(arrays[f"{nivel}_coordenadas"]) for nivel in NIVEIS}
+
+
+class Geometria:
+    """
+    Malha pré-simplificada carregada uma vez por processo. A parte pesada do
+    mapa (polígonos e código de cada anel) é montada uma vez por nível, UF e
+    versão do índice; trocar o indicador só recalcula a coluna de valores e
+    a de cores.
+    """
+
+    def __init__(self, caminho=GEOMETRIA_PATH):
+        self.caminho = caminho
+        with np.load(caminho) as arquivo:
+            self._arrays = {nome: arquivo[nome] for nome in arquivo.files}
+        self._bases = {}
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def base(self, indice, nivel, uf=None):
+        """
+        (DataFrame codigo/municipio/poligono, pdk.ViewState) dos municípios
+        do Brasil ou de uma UF, com os códigos do índice geográfico.
+        """
+        with self._lock:
+            if self._snapshot != indice.snapshot:
+                self._bases.clear()
+                self._snapshot = indice.snapshot
+            chave = (nivel, uf)
+            if chave not in self._bases:
+                self._bases[chave] = self._montar_base(indice, nivel, uf)
+            return self._bases[chave]
+
+    def _montar_base(self, indice, nivel, uf):
+        ufs = self._arrays["uf"]
+        nomes = self._arrays["nome"]
+        codigos = np.array([_codigo(indice, cd_ibge, sigla, nome) for cd_ibge, sigla, nome
+                            in zip(self._arrays["cd_ibge"], ufs, nomes)], dtype=np.int64)
+
+        coordenadas = self._arrays[f"{nivel}_coordenadas"]
+        inicios = self._arrays[f"{nivel}_inicios"]
+        municipios = self._arrays[f"{nivel}_municipio"]
+        aneis = np.arange(len(municipios))
+        if uf is not None:
+            aneis = aneis[ufs[municipios] == uf]
+
+        poligonos = [coordenadas[inicios[anel]:inicios[anel + 1]].round(4).tolist()
+                     for anel in aneis]
+        base = pd.DataFrame({
+            "codigo": codigos[municipios[aneis]],
+            "municipio": nomes[municipios[aneis]],
+            "poligono": poligonos,
+        })
+
+        if len(aneis):
+            pontos = np.concatenate(
+                [coordenadas[inicios[anel]:inicios[anel + 1]] for anel in aneis])
+            minimo, maximo = pontos.min(axis=0), pontos.max(axis=0)
+        else:
+            minimo, maximo = np.array([-74.0, -34.0]), np.array([-34.0, 5.0])
+        extensao = float(max(maximo - minimo))
+        vista = pdk.ViewState(
+            longitude=float((minimo[0] + maximo[0]) / 2),
+            latitude=float((minimo[1] + maximo[1]) / 2),
+            zoom=float(np.clip(np.log2(360 / max(extensao, 0.01)) - 0.5, 2, 10)))
+        return base, vista
+
+
+def _codigo(indice, cd_ibge, uf, nome):
+    # O polígono é ligado ao município pelo código do IBGE, com a tabela de
+    # correspondência TSE-IBGE; o nome normalizado só é usado para os
+    # códigos que faltam nela (ou quando ela não foi ingerida)
+    codigo = indice.codigo_ibge(cd_ibge)
+    if codigo is None:
+        codigo = indice.codigo_normalizado(uf, nome)
+    return SEM_CODIGO if codigo is None else codigo
+
+
+def valores_por_codigo(df, indice, dataset):
+    """
+    Series do Valor por município indexada pelo código do índice. O
+    resultado das tabelas codificadas já traz o código (CD_MUNICIPIO); nos
+    outros, o nome é juntado ao código com um merge.
+    """
+    if df is None or df.empty:
+        return pd.Series(dtype=float)
+    if "CD_MUNICIPIO" in df.columns:
+        return df.set_index("CD_MUNICIPIO")["Valor"].rename_axis("CODIGO")
+    juntado = df.merge(indice.tabela_codigos(dataset), on=["SG_UF", "NM_MUNICIPIO"])
+    return juntado.set_index("CODIGO")["Valor"]
+
+
+def colorir(valores):
+    """
+    Cores RGBA (n x 4) interpoladas entre COR_MINIMA e COR_MAXIMA, calculadas
+    como array; valores ausentes ficam cinza.
+    """
+    valores = np.asarray(valores, dtype=float)
+    validos = ~np.isnan(valores)
+    cores = np.tile(np.array(COR_SEM_DADOS, dtype=np.uint8), (len(valores), 1))
+    if validos.any():
+        minimo, maximo = np.nanmin(valores), np.nanmax(valores)
+        fracao = (valores[validos] - minimo) / (maximo - minimo or 1)
+        cores[validos, :3] = (COR_MINIMA + np.outer(fracao, COR_MAXIMA - COR_MINIMA)).astype(np.uint8)
+        cores[validos, 3] = 200
+    return cores
+
+
+def mapa(base, vista, valores, rotulo="Valor"):
+    """
+    Deck do pydeck com a camada de polígonos coloridos por `valores`
+    (Series indexada pelo código do município).
+    """
+    numeros = valores.reindex(base["codigo"].to_numpy()).to_numpy(dtype=float)
+    texto = np.where(np.isnan(numeros), "sem dados",
+                     np.char.mod("%.1f%%", np.nan_to_num(numeros)))
+    dados = base.assign(valor=texto, cor=colorir(numeros).tolist())
+    camada = pdk.Layer(
+        "PolygonLayer", data=dados, get_polygon="poligono",
+        get_fill_color="cor", stroked=False, pickable=True)
+    return pdk.Deck(
+        layers=[camada], initial_view_state=vista, map_style=None,
+        tooltip={"text": f"{{municipio}}\n{rotulo}: {{valor}}"})
+
+
+_geometria = None
+_geometria_lock = threading.Lock()
+
+
+def get_geometria():
+    """
+    Retorna a malha do processo, ou None se o arquivo não foi gerado.
+    """
+    global _geometria
+    with _geometria_lock:
+        if _geometria is None and os.path.exists(GEOMETRIA_PATH):
+            _geometria = Geometria(GEOMETRIA_PATH)
+        return _geometria
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Simplifica a malha municipal do IBGE para os mapas do painel.")
+    parser.add_argument("origem", help="GeoJSON da malha municipal (CD_MUN, NM_MUN, SIGLA_UF)")
+    parser.add_argument("--destino", default=GEOMETRIA_PATH)
+    args = parser.parse_args()
+
+    pontos = preparar_geometria(args.origem, args.destino)
+    resumo = ", ".join(f"{nivel}: {total} pontos" for nivel, total in pontos.items())
+    print(f"Geometria gravada em {args.destino} ({resumo})")
+
+
+if __name__ == "__main__":
+    main()
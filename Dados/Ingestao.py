@@ -0,0 +1,278 @@
+import argparse
+import os
+import re
+import shutil
+import tempfile
+
+import duckdb
+
+from Dados.Conexao import DATA_DIR, MULTIANUAIS, ROTULO, caminho_snapshot
+
+# Faixas etárias exibidas no painel, pelo limite inferior de idade. A faixa
+# do TSE ("21 a 24 anos", "100 anos ou mais", ...) é classificada pela idade
+# inicial; "Inválido" fica de fora.
+FAIXAS_ETARIAS = [
+    (25, "16 a 24 anos"),
+    (35, "25 a 34 anos"),
+    (45, "35 a 44 anos"),
+    (60, "45 a 59 anos"),
+]
+FAIXA_FINAL = "60 anos ou mais"
+
+# Cargos exibidos na página de Eleições
+CARGOS_PADRAO = ["Presidente", "Governador", "Senador"]
+
+
+def _faixa_etaria_sql():
+    idade = "TRY_CAST(regexp_extract(DS_FAIXA_ETARIA, '^\\s*(\\d+)', 1) AS INTEGER)"
+    casos = " ".join(
+        f"WHEN {idade} < {limite} THEN '{faixa}'" for limite, faixa in FAIXAS_ETARIAS)
+    return f"CASE WHEN {idade} IS NULL THEN NULL {casos} ELSE '{FAIXA_FINAL}' END"
+
+
+def _cargo_sql():
+    # O TSE alterna entre "PRESIDENTE" e "Presidente" conforme o ano
+    return ("upper(substr(trim(DS_CARGO), 1, 1)) || "
+            "lower(substr(trim(DS_CARGO), 2))")
+
+
+def _ler_csv(entradas):
+    arquivos = ", ".join(f"'{caminho}'" for caminho in entradas)
+    # all_varchar evita a inferência de tipos, que exigiria ler o arquivo
+    # inteiro; as colunas numéricas são convertidas na própria consulta
+    return (f"read_csv([{arquivos}], delim=';', quote='\"', header=true, "
+            f"encoding='latin-1', all_varchar=true, union_by_name=true)")
+
+
+def consulta_genero(entradas):
+    """
+    Perfil do eleitorado (perfil_eleitorado_AAAA.csv) -> eleitores_por_genero.
+    """
+    return (
+        "SELECT trim(SG_UF) AS SG_UF, TRY_CAST(CD_MUNICIPIO AS INTEGER) AS CD_MUNICIPIO, "
+        "trim(NM_MUNICIPIO) AS NM_MUNICIPIO, trim(DS_GENERO) AS DS_GENERO, "
+        "CAST(SUM(TRY_CAST(QT_ELEITORES_PERFIL AS BIGINT)) AS BIGINT) AS QT_ELEITORES_PERFIL "
+        f"FROM {_ler_csv(entradas)} "
+        "GROUP BY ALL"
+    )
+
+
+def consulta_idade(entradas):
+    """
+    Perfil do eleitorado (perfil_eleitorado_AAAA.csv) -> eleitores_por_faixa_etaria.
+    """
+    return (
+        "SELECT SG_UF, CD_MUNICIPIO, NM_MUNICIPIO, DS_FAIXA_ETARIA, "
+        "CAST(SUM(QT_ELEITORES_PERFIL) AS BIGINT) AS QT_ELEITORES_PERFIL FROM ("
+        "SELECT trim(SG_UF) AS SG_UF, TRY_CAST(CD_MUNICIPIO AS INTEGER) AS CD_MUNICIPIO, "
+        "trim(NM_MUNICIPIO) AS NM_MUNICIPIO, "
+        f"{_faixa_etaria_sql()} AS DS_FAIXA_ETARIA, "
+        "TRY_CAST(QT_ELEITORES_PERFIL AS BIGINT) AS QT_ELEITORES_PERFIL "
+        f"FROM {_ler_csv(entradas)}) "
+        "WHERE DS_FAIXA_ETARIA IS NOT NULL "
+        "GROUP BY ALL"
+    )
+
+
+def consulta_votacao(entradas, cargos=None):
+    """
+    Votação por candidato e zona (votacao_candidato_munzona_AAAA_BR.csv) ->
+    dados_votacao_candidato_munzona, mantendo a zona eleitoral.
+    """
+    cargos = cargos or CARGOS_PADRAO
+    lista = ", ".join(f"'{cargo}'" for cargo in cargos)
+    return (
+        "SELECT * FROM ("
+        "SELECT TRY_CAST(NR_TURNO AS BIGINT) AS NR_TURNO, trim(SG_UF) AS SG_UF, "
+        "TRY_CAST(CD_MUNICIPIO AS INTEGER) AS CD_MUNICIPIO, "
+        "trim(NM_MUNICIPIO) AS NM_MUNICIPIO, TRY_CAST(NR_ZONA AS INTEGER) AS NR_ZONA, "
+        f"{_cargo_sql()} AS DS_CARGO, trim(NM_URNA_CANDIDATO) AS NM_URNA_CANDIDATO, "
+        "trim(SG_PARTIDO) AS SG_PARTIDO, "
+        "CAST(SUM(TRY_CAST(QT_VOTOS_NOMINAIS AS BIGINT)) AS BIGINT) AS QT_VOTOS_NOMINAIS "
+        f"FROM {_ler_csv(entradas)} "
+        "GROUP BY ALL) "
+        f"WHERE DS_CARGO IN ({lista})"
+    )
+
+
+def consulta_pnad(entradas, dimensao):
+    """
+    Tabela da PNAD já agregada (UF;Região;<dimensão>;Total, com vírgula
+    decimal) -> dados_pnad_renda ou pnad_escolaridade.
+    """
+    return (
+        "SELECT trim(UF) AS UF, trim(\"Região\") AS \"Região\", "
+        f"trim({dimensao}) AS {dimensao}, "
+        "SUM(TRY_CAST(replace(replace(Total, '.', ''), ',', '.') AS DOUBLE)) AS Total "
+        f"FROM {_ler_csv(entradas)} "
+        "GROUP BY ALL"
+    )
+
+
+def consulta_municipios(entradas):
+    """
+    Correspondência entre os códigos de município do TSE e do IBGE (CSV com
+    CD_MUNICIPIO e CD_MUNICIPIO_IBGE) -> municipios_tse_ibge, que liga a
+    malha do IBGE (Dados/Geometria.py) aos municípios dos arquivos do TSE.
+    """
+    return (
+        "SELECT DISTINCT TRY_CAST(CD_MUNICIPIO AS INTEGER) AS CD_MUNICIPIO, "
+        "TRY_CAST(CD_MUNICIPIO_IBGE AS INTEGER) AS CD_MUNICIPIO_IBGE "
+        f"FROM {_ler_csv(entradas)} "
+        "WHERE TRY_CAST(CD_MUNICIPIO AS INTEGER) IS NOT NULL "
+        "AND TRY_CAST(CD_MUNICIPIO_IBGE AS INTEGER) IS NOT NULL"
+    )
+
+
+# Tipo de ingestão -> (nome da saída em data/, montagem da consulta,
+# coluna de partição ou None, colunas de ordenação)
+TIPOS = {
+    "genero": ("eleitores_por_genero", consulta_genero,
+               "SG_UF", ["SG_UF", "NM_MUNICIPIO", "DS_GENERO"]),
+    "idade": ("eleitores_por_faixa_etaria", consulta_idade,
+              "SG_UF", ["SG_UF", "NM_MUNICIPIO", "DS_FAIXA_ETARIA"]),
+    "votacao": (MULTIANUAIS["eleicoes"], consulta_votacao,
+                "SG_UF", ["SG_UF", "NM_MUNICIPIO", "NR_TURNO", "DS_CARGO", "NR_ZONA"]),
+    "pnad_renda": ("dados_pnad_renda", lambda e: consulta_pnad(e, "Renda"),
+                   None, ["UF", "\"Região\"", "Renda"]),
+    "pnad_escolaridade": ("pnad_escolaridade_2023", lambda e: consulta_pnad(e, "Escolaridade"),
+                          None, ["UF", "\"Região\"", "Escolaridade"]),
+    "municipios": ("municipios_tse_ibge", consulta_municipios, None, ["CD_MUNICIPIO"]),
+}
+
+# Tipos que podem ser gravados como snapshot mensal (`--snapshot AAAA-MM`),
+# pela view que os lê (Dados/Snapshots.py)
+SNAPSHOTS = {
+    "genero": "tse_genero",
+    "idade": "tse_idade",
+}
+
+# Tipos gravados por eleição, em `<nome>/ANO_ELEICAO=AAAA/`
+POR_ANO = {"votacao"}
+
+
+def ano_dos_arquivos(entradas):
+    """
+    Ano da eleição a partir do nome dos CSV do TSE
+    (votacao_candidato_munzona_2022_BR.csv -> 2022).
+    """
+    anos = {int(ano.group(1)) for ano in
+            (re.search(r"_(\d{4})(_|\.)", os.path.basename(e)) for e in entradas) if ano}
+    if len(anos) != 1:
+        raise ValueError(
+            "Não foi possível identificar um único ano da eleição pelos nomes "
+            "dos arquivos; informe --ano.")
+    return anos.pop()
+
+
+def ingerir(tipo, entradas, destino=None, memoria="2GB", linhas_por_grupo=50000,
+            temporario=None, ano=None):
+    """
+    Lê os CSV brutos em fluxo e grava o Parquet normalizado (zstd) que o app
+    espera. Os conjuntos do TSE são particionados por SG_UF em um diretório
+    `<destino>/SG_UF=XX/` e ordenados por município, com grupos de linhas
+    pequenos o bastante para que as estatísticas de mín/máx do Parquet deixem
+    o DuckDB pular quase todo o arquivo ao filtrar um município.
+
+    O uso de memória é limitado por `memoria`; o que não couber na ordenação
+    é despejado em disco no diretório `temporario`.
+
+    A votação é gravada por eleição em `<destino>/ANO_ELEICAO=AAAA/`, sem
+    tocar nos anos já ingeridos; o ano vem de `ano` ou do nome dos arquivos.
+    """
+    nome, montar, particao, ordem = TIPOS[tipo]
+    if destino is None:
+        destino = os.path.join(DATA_DIR, nome if particao else f"{nome}.parquet")
+    # Grava ao lado do destino e troca no final, para que o app nunca leia
+    # uma saída incompleta
+    auxiliar = destino
+    if tipo in POR_ANO:
+        ano = ano or ano_dos_arquivos(entradas)
+        os.makedirs(destino, exist_ok=True)
+        # Os auxiliares ficam fora do diretório do conjunto, que é lido com
+        # um curinga recursivo pelo app
+        auxiliar = f"{destino}_ANO_ELEICAO={int(ano)}"
+        destino = os.path.join(destino, f"ANO_ELEICAO={int(ano)}")
+
+    criado = temporario is None
+    if criado:
+        temporario = tempfile.mkdtemp(prefix="atlas_ingestao_")
+    conn = duckdb.connect(database=':memory:')
+    try:
+        conn.execute(f"SET memory_limit = '{memoria}'")
+        conn.execute(f"SET temp_directory = '{temporario}'")
+        # Sem manter a ordem de inserção o DuckDB processa o CSV em paralelo
+        # e em blocos, sem materializar o arquivo inteiro
+        conn.execute("SET preserve_insertion_order = false")
+
+        opcoes = [f"FORMAT parquet", "COMPRESSION zstd",
+                  f"ROW_GROUP_SIZE {int(linhas_por_grupo)}"]
+        if particao:
+            opcoes.append(f"PARTITION_BY ({particao})")
+
+        saida = auxiliar + ".tmp"
+        _remover(saida)
+        conn.execute(
+            f"COPY ({montar(entradas)} ORDER BY {', '.join(ordem)}) "
+            f"TO '{saida}' ({', '.join(opcoes)})")
+
+        antigo = auxiliar + ".old"
+        _remover(antigo)
+        if os.path.exists(destino):
+            os.replace(destino, antigo)
+        os.replace(saida, destino)
+        _remover(antigo)
+    finally:
+        conn.close()
+        if criado:
+            shutil.rmtree(temporario, ignore_errors=True)
+    return destino
+
+
+def _remover(caminho):
+    if os.path.isdir(caminho):
+        shutil.rmtree(caminho)
+    elif os.path.exists(caminho):
+        os.remove(caminho)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Converte os CSV brutos do TSE e da PNAD no Parquet usado pelo painel.")
+    parser.add_argument("tipo", choices=list(TIPOS))
+    parser.add_argument("entradas", nargs="+", help="Arquivos CSV (aceita curingas)")
+    parser.add_argument("--destino", default=None,
+                        help="Arquivo ou diretório de saída (padrão: o nome esperado em data/)")
+    parser.add_argument("--memoria", default="2GB",
+                        help="Limite de memória do DuckDB durante a ingestão")
+    parser.add_argument("--linhas-por-grupo", type=int, default=50000,
+                        help="Linhas por grupo de linhas do Parquet")
+    parser.add_argument("--temporario", default=None,
+                        help="Diretório para o despejo em disco da ordenação")
+    parser.add_argument("--ano", type=int, default=None,
+                        help="Ano da eleição (votação); padrão: o ano no nome do arquivo")
+    parser.add_argument("--snapshot", default=None, metavar="ROTULO",
+                        help="Grava como snapshot em data/snapshots/<view>/ROTULO/ "
+                             f"({', '.join(SNAPSHOTS)})")
+    args = parser.parse_args()
+
+    destino = args.destino
+    if args.snapshot:
+        if args.tipo not in SNAPSHOTS:
+            parser.error(f"O tipo '{args.tipo}' não tem snapshots.")
+        if not ROTULO.match(args.snapshot):
+            parser.error("O rótulo do snapshot só aceita letras, números, '-' e '_'.")
+        destino = caminho_snapshot(DATA_DIR, SNAPSHOTS[args.tipo], args.snapshot)
+        # Um snapshot publicado não muda: as sessões em andamento podem
+        # estar lendo dele
+        if os.path.exists(destino):
+            parser.error(f"O snapshot '{args.snapshot}' já existe; use outro rótulo.")
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+
+    destino = ingerir(args.tipo, args.entradas, destino, args.memoria,
+                      args.linhas_por_grupo, args.temporario, args.ano)
+    print(f"Ingestão '{args.tipo}' gravada em {destino}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import contextvars
+import heapq
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Registros de desempenho, um JSON por linha. Com ATLAS_LOG_DESEMPENHO=1 eles
+# vão para o stderr; caso contrário seguem a configuração de logging do app.
+logger = logging.getLogger("atlas.desempenho")
+
+# Etapas do rerun atual. Cada sessão do Streamlit roda em sua própria thread,
+# então o contexto não se mistura entre sessões.
+_etapas = contextvars.ContextVar("atlas_etapas", default=None)
+
+
+def _configurar_log():
+    if os.environ.get("ATLAS_LOG_DESEMPENHO") == "1" and not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+
+_configurar_log()
+
+
+def iniciar_execucao():
+    """
+    Começa a registrar as etapas de um novo rerun e retorna a lista onde
+    elas serão acumuladas.
+    """
+    etapas = []
+    _etapas.set(etapas)
+    return etapas
+
+
+def etapas_atuais():
+    """
+    Etapas registradas desde o último `iniciar_execucao` neste contexto.
+    """
+    return list(_etapas.get() or [])
+
+
+def registrar(registro):
+    """
+    Acrescenta o registro às etapas do rerun atual e o emite no log.
+    """
+    etapas = _etapas.get()
+    if etapas is not None:
+        etapas.append(registro)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps(registro, ensure_ascii=False, default=str))
+
+
+@contextmanager
+def medir(etapa, **campos):
+    """
+    Mede o tempo de parede do bloco e registra a etapa. O dicionário
+    entregue ao bloco pode receber campos extras (linhas, bytes, acerto...).
+    """
+    registro = {"etapa": etapa, **campos}
+    inicio = time.perf_counter()
+    try:
+        yield registro
+    except Exception as e:
+        registro["erro"] = type(e).__name__
+        raise
+    finally:
+        registro["ms"] = round((time.perf_counter() - inicio) * 1000, 3)
+        registrar(registro)
+
+
+def resumir_sql(query, limite=160):
+    """
+    SQL em uma linha só e truncado, para log e para o painel.
+    """
+    texto = " ".join(query.split())
+    return texto if len(texto) <= limite else texto[:limite - 3] + "..."
+
+
+class ConsultasLentas:
+    """
+    Guarda o plano do EXPLAIN ANALYZE das `limite` consultas mais lentas do
+    processo. O plano só é capturado (reexecutando a consulta) quando ela
+    entra no ranking, então o custo fica restrito às consultas lentas.
+    """
+
+    def __init__(self, limite=5):
+        self.limite = limite
+        self._heap = []
+        self._sequencia = itertools.count()
+        self._lock = threading.Lock()
+
+    def candidata(self, ms):
+        with self._lock:
+            return len(self._heap) < self.limite or ms > self._heap[0][0]
+
+    def guardar(self, ms, query, params, plano):
+        item = (ms, next(self._sequencia),
+                {"ms": ms, "sql": query, "params": params, "plano": plano})
+        with self._lock:
+            if len(self._heap) < self.limite:
+                heapq.heappush(self._heap, item)
+            elif ms > self._heap[0][0]:
+                heapq.heapreplace(self._heap, item)
+
+    def listar(self):
+        """
+        Consultas guardadas, da mais lenta para a mais rápida.
+        """
+        with self._lock:
+            return [item[2] for item in sorted(self._heap, reverse=True)]
+
+
+_lentas = None
+_lentas_lock = threading.Lock()
+
+
+def get_consultas_lentas():
+    """
+    Retorna o registro de consultas lentas do processo, ou None se
+    ATLAS_EXPLAIN_LENTAS (número de consultas a guardar) não estiver definido.
+    """
+    global _lentas
+    limite = int(os.environ.get("ATLAS_EXPLAIN_LENTAS", 0) or 0)
+    if limite <= 0:
+        return None
+    with _lentas_lock:
+        if _lentas is None:
+            _lentas = ConsultasLentas(limite)
+        return _lentas
@@ -0,0 +1,255 @@
+import contextvars
+import importlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from Dados.Cache import get_armazem, get_cache
+from Dados.Conexao import get_gerenciador
+from Dados.Consultas import (consulta_comparacao, consulta_escolaridade,
+                             consulta_idade, consulta_mapa_idade,
+                             consulta_mapa_votacao, consulta_perfil_idade,
+                             consulta_perfil_sexo, consulta_renda,
+                             consulta_sexo, consulta_votacao,
+                             consulta_votos_municipios, consulta_zonas)
+from Dados.Dicionarios import para_pandas
+from Dados.Dimensoes import get_indice
+from Dados.Instrumentacao import medir
+
+# Cada indicador: conjunto de origem, montagem da consulta e formatação final
+# (módulo.função, importada só no primeiro uso por `formatador`). Os
+# indicadores por município do cruzamento (Dados/Cruzamento.py) não são
+# exibidos e não têm formatação.
+INDICADORES = {
+    "sexo": ("tse_genero", consulta_sexo, "Demografias.Sexo.get_sexo_data"),
+    "idade": ("tse_idade", consulta_idade, "Demografias.Idade.get_idade_data"),
+    "renda": ("pnad_renda", consulta_renda, "Demografias.Renda.get_renda_data"),
+    "escolaridade": ("pnad_escolaridade", consulta_escolaridade,
+                     "Demografias.Escolaridade.get_escolaridade_data"),
+    "votacao": ("eleicoes", consulta_votacao, "Eleicoes.Votacao.get_votacao_data"),
+    "comparacao": ("eleicoes", consulta_comparacao, "Eleicoes.Comparacao.get_comparacao_data"),
+    "zonas": ("eleicoes", consulta_zonas, "Eleicoes.Zonas.get_zonas_data"),
+    "mapa_idade": ("tse_idade", consulta_mapa_idade, "Demografias.Mapa.get_mapa_idade_data"),
+    "mapa_votacao": ("eleicoes", consulta_mapa_votacao, "Eleicoes.Mapa.get_mapa_votacao_data"),
+    "perfil_sexo": ("tse_genero", consulta_perfil_sexo, None),
+    "perfil_idade": ("tse_idade", consulta_perfil_idade, None),
+    "votos_municipios": ("eleicoes", consulta_votos_municipios, None),
+}
+
+# Filtros aceitos pelos indicadores e o tipo de cada um, usados para
+# converter os parâmetros recebidos pelo serviço HTTP
+FILTROS = {
+    "uf": str,
+    "municipio": str,
+    "regioes": list,
+    "turno": int,
+    "cargo": str,
+    "ano": int,
+    "anos": list,
+    "top": int,
+    "ordem": str,
+    "pagina": int,
+    "por_pagina": int,
+    "faixa": str,
+    "candidato": str,
+}
+
+# Tipo de conteúdo do formato de streaming do Arrow IPC, em que o serviço
+# HTTP (Dados/Servico.py) entrega os indicadores ao motor remoto
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+# Filtros de paginação: a consulta traz todas as linhas, que ficam no
+# armazém Arrow, e cada página é uma fatia delas, sem cópia e sem nova
+# consulta
+PAGINACAO = ("pagina", "por_pagina")
+POR_PAGINA = 50
+
+
+def formatador(nome):
+    """
+    Função de formatação do indicador. O módulo só é importado quando o
+    indicador é calculado pela primeira vez, então a página de Eleições não
+    carrega o código de Demografias, e vice-versa.
+    """
+    if INDICADORES[nome][2] is None:
+        return _sem_formatacao
+    modulo, funcao = INDICADORES[nome][2].rsplit(".", 1)
+    return getattr(importlib.import_module(modulo), funcao)
+
+
+def _sem_formatacao(df):
+    return df
+
+
+class Motor:
+    """
+    Núcleo de agregação do painel, sem dependência do Streamlit: monta a
+    consulta do indicador, executa no DuckDB, formata a tabela final e guarda
+    o resultado no cache do processo. O resultado da consulta fica como
+    tabela Arrow no armazém do processo, compartilhado entre os indicadores e
+    as páginas que fazem a mesma consulta; o pandas só entra na formatação da
+    tabela exibida. É usado pelo app, pelo serviço HTTP (Dados/Servico.py) e
+    pelos benchmarks.
+    """
+
+    remoto = False
+
+    def __init__(self, gerenciador=None, cache=None, armazem=None):
+        self._gerenciador = gerenciador
+        self.cache = cache or get_cache()
+        self.armazem = armazem or get_armazem()
+
+    @property
+    def gerenciador(self):
+        """
+        O gerenciador recebido ou, sem ele, o do processo no momento da
+        chamada, que é trocado quando chega um snapshot novo
+        (Dados/Snapshots.py).
+        """
+        return self._gerenciador or get_gerenciador()
+
+    def disponivel(self, nome):
+        """
+        Indica se o conjunto de origem do indicador foi encontrado.
+        """
+        return self.gerenciador.disponivel(INDICADORES[nome][0])
+
+    def indice(self):
+        """
+        Índice dos seletores e dos conjuntos disponíveis (Dados/Dimensoes.py),
+        refeito só quando os dados mudam.
+        """
+        return get_indice(self.gerenciador)
+
+    def carregar(self, nome, **filtros):
+        """
+        Tabela final de um indicador para os filtros selecionados, ou None
+        se não houver dados. O resultado fica no cache, chaveado pelo
+        indicador e pelos filtros, e é descartado quando o arquivo de origem,
+        o rollup ou a tabela codificada mudam. Nos conjuntos com snapshots,
+        só quando muda o conteúdo da UF filtrada.
+        """
+        if nome not in INDICADORES:
+            raise KeyError(f"Indicador desconhecido: '{nome}'")
+        dataset, consulta, _ = INDICADORES[nome]
+        rollup = f"rollup_{nome}"
+        fato = f"fato_{dataset}"
+        # Um único gerenciador do começo ao fim, mesmo que o snapshot seja
+        # trocado no meio do cálculo
+        gerenciador = self.gerenciador
+        if not gerenciador.disponivel(dataset):
+            raise FileNotFoundError(f"Conjunto de dados '{dataset}' não encontrado.")
+
+        chave = (nome,) + tuple(sorted(
+            (filtro, tuple(valor) if isinstance(valor, list) else valor)
+            for filtro, valor in filtros.items()))
+
+        acerto = True
+
+        def calcular():
+            nonlocal acerto
+            acerto = False
+            # Usa o rollup pré-calculado quando ele foi gerado (Dados/Rollups.py)
+            # e, sem ele, a tabela de fatos com códigos inteiros
+            # (Dados/Dicionarios.py). Os valores dos filtros são passados como
+            # parâmetros, nunca interpolados.
+            query, params = consulta(
+                **{filtro: valor for filtro, valor in filtros.items()
+                   if filtro not in PAGINACAO},
+                rollup=gerenciador.disponivel(rollup),
+                codificado=gerenciador.disponivel(fato))
+            tabela = self.armazem.obter(
+                (query, _congelar(params)), versao,
+                lambda: gerenciador.executar_arrow(query, params))
+            if any(filtro in filtros for filtro in PAGINACAO):
+                por_pagina = int(filtros.get("por_pagina", POR_PAGINA))
+                tabela = tabela.slice(int(filtros.get("pagina", 0)) * por_pagina, por_pagina)
+            with medir("pandas", indicador=nome) as registro:
+                df = para_pandas(tabela)
+                registro["linhas"] = len(df)
+            with medir("formatacao", indicador=nome) as registro:
+                df = formatador(nome)(df)
+                registro["linhas"] = 0 if df is None else len(df)
+            return df
+
+        with medir("versao", indicador=nome):
+            if gerenciador.versionado(dataset):
+                # O rollup é refeito junto com o snapshot e a tabela
+                # codificada de outro snapshot não é registrada, então basta
+                # a versão da UF
+                versao = gerenciador.versao_uf(dataset, filtros.get("uf"))
+            else:
+                versao = gerenciador.versao(dataset, rollup, fato)
+        with medir("indicador", indicador=nome) as registro:
+            df = self.cache.obter(chave, versao, calcular)
+            registro["acerto"] = acerto
+        return df
+
+
+def _congelar(params):
+    # Parâmetros da consulta como chave do armazém (as listas viram tuplas)
+    return tuple(tuple(valor) if isinstance(valor, list) else valor for valor in params)
+
+
+_motor = None
+_motor_lock = threading.Lock()
+
+
+def get_motor():
+    """
+    Retorna o motor do processo. Com ATLAS_MOTOR_URL definido, os
+    indicadores são pedidos ao serviço HTTP nesse endereço em vez de
+    calculados localmente (Dados/Cliente.py).
+    """
+    global _motor
+    with _motor_lock:
+        if _motor is None:
+            url = os.environ.get("ATLAS_MOTOR_URL")
+            if url:
+                from Dados.Cliente import MotorRemoto
+                _motor = MotorRemoto(url)
+            else:
+                _motor = Motor()
+        return _motor
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Retorna o pool de threads do processo usado para carregar indicadores em
+    paralelo. O pool é compartilhado por todas as sessões, o que limita o
+    total de consultas simultâneas; o tamanho vem de ATLAS_POOL_THREADS
+    (padrão: até 4, sem passar do número de núcleos). Cada consulta ainda
+    usa as threads do próprio DuckDB (ATLAS_DUCKDB_THREADS).
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            padrao = min(4, os.cpu_count() or 1)
+            _executor = ThreadPoolExecutor(
+                max_workers=int(os.environ.get("ATLAS_POOL_THREADS", padrao)),
+                thread_name_prefix="atlas-motor")
+        return _executor
+
+
+def carregar_em_paralelo(motor, pedidos):
+    """
+    Dispara `motor.carregar` para cada {indicador: filtros} no pool e gera
+    (indicador, futuro) na ordem em que os resultados ficam prontos. As
+    exceções ficam no futuro de cada indicador, sem afetar os demais. A
+    DuckDB libera o GIL durante a execução, então as consultas andam de fato
+    em paralelo.
+    """
+    executor = get_executor()
+    futuros = {}
+    for nome, filtros in pedidos.items():
+        # Cada tarefa leva uma cópia do contexto, para que as etapas medidas
+        # na thread entrem no rerun que as disparou
+        contexto = contextvars.copy_context()
+        futuro = executor.submit(contexto.run, motor.carregar, nome, **filtros)
+        futuros[futuro] = nome
+    for futuro in as_completed(futuros):
+        yield futuros[futuro], futuro
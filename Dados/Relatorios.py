@@ -0,0 +1,262 @@
+import argparse
+import hashlib
+import importlib.util
+import json
+import multiprocessing
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from Dados.Conexao import DATA_DIR, GerenciadorConexoes
+from Dados.Motor import formatador
+from Dados.Rollups import ROLLUPS, consulta_rollup
+
+# Seções do relatório: os indicadores com rollup (Dados/Rollups.py), cuja
+# consulta com GROUPING SETS gera as linhas do Brasil, das UFs e dos
+# municípios (ou regiões) em uma única leitura do conjunto de origem
+SECOES = list(ROLLUPS)
+
+# Nome da aba no XLSX
+TITULOS = {
+    "sexo": "Sexo",
+    "idade": "Faixa Etária",
+    "renda": "Renda",
+    "escolaridade": "Escolaridade",
+    "votacao": "Votação",
+}
+
+# Ordem das linhas dentro de cada tabela, a mesma das consultas do app
+# (Dados/Consultas.py); nas demais seções, a da primeira dimensão
+ORDENS = {
+    "votacao": "QT_VOTOS_NOMINAIS DESC",
+}
+
+FORMATOS = ["parquet", "csv", "xlsx"]
+
+# Arquivos de controle dentro do destino: agregados intermediários e o
+# progresso usado para retomar uma execução interrompida
+AGREGADOS_SUBDIR = ".agregados"
+PROGRESSO = ".progresso.json"
+
+
+def _chaves(secao):
+    """
+    Colunas que identificam uma tabela do painel dentro da seção: a
+    geografia mais detalhada e o recorte (eleição, turno e cargo).
+    """
+    spec = ROLLUPS[secao]
+    return list(spec["niveis"][0]) + spec["recorte"]
+
+
+def renderizar(tarefa):
+    """
+    Formata as tabelas de uma partição (a primeira coluna geográfica da
+    seção: UF, ou "Todos" para o Brasil) com as mesmas funções do app e grava
+    um arquivo por formato. Roda nos processos do pool e lê do Parquet
+    intermediário só as linhas da partição.
+    """
+    secao, agregado, coluna, valor, saidas = tarefa
+    spec = ROLLUPS[secao]
+    formatar = formatador(secao)
+    chaves = _chaves(secao)
+    colunas = spec["dimensoes"] + [spec["medida"], "Percentual"]
+
+    df = pd.read_parquet(agregado, columns=chaves + colunas,
+                         filters=[(coluna, "==", valor)])
+    # As funções de formatação só renomeiam, filtram e ordenam linhas, então
+    # são aplicadas uma vez à partição inteira, com as chaves junto; a
+    # ordenação estável pelas chaves devolve cada tabela ao seu bloco, na
+    # ordem em que a função deixou as linhas
+    resultado = formatar(df)
+    if resultado is None:
+        resultado = pd.DataFrame(columns=chaves)
+    else:
+        resultado = resultado.sort_values(chaves, kind="stable", ignore_index=True)
+
+    for formato, caminho in saidas.items():
+        _gravar(resultado, formato, caminho, TITULOS[secao])
+    return secao, valor, len(resultado)
+
+
+def _gravar(df, formato, caminho, titulo):
+    # Grava ao lado e troca no final: um arquivo existente está sempre completo
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = caminho + ".tmp"
+    if formato == "parquet":
+        df.to_parquet(temporario, index=False)
+    elif formato == "csv":
+        df.to_csv(temporario, index=False)
+    else:
+        df.to_excel(temporario, index=False, sheet_name=titulo, engine="openpyxl")
+    os.replace(temporario, caminho)
+
+
+def _agregar(gerenciador, secao, caminho):
+    """
+    Grava em `caminho` todas as linhas da seção, ordenadas pela partição e
+    pelas chaves das tabelas. Usa o rollup já gerado quando ele existe.
+    """
+    spec = ROLLUPS[secao]
+    rollup = f"rollup_{secao}"
+    origem = rollup if gerenciador.disponivel(rollup) else f"({consulta_rollup(secao)})"
+    ordem = ", ".join(_chaves(secao) + [ORDENS.get(secao, spec["dimensoes"][0])])
+    temporario = caminho + ".tmp"
+    cursor = gerenciador.cursor()
+    try:
+        cursor.execute(
+            f"COPY (SELECT * FROM {origem} ORDER BY {ordem}) "
+            f"TO '{temporario}' (FORMAT parquet, COMPRESSION zstd, ROW_GROUP_SIZE 50000)")
+        coluna = _chaves(secao)[0]
+        valores = [linha[0] for linha in cursor.execute(
+            f"SELECT DISTINCT {coluna} FROM read_parquet('{temporario}') "
+            f"ORDER BY {coluna}").fetchall()]
+    finally:
+        cursor.close()
+    os.replace(temporario, caminho)
+    return valores
+
+
+def _versao(gerenciador):
+    return hashlib.sha256(repr(gerenciador.snapshot()).encode()).hexdigest()
+
+
+def _ler_progresso(destino):
+    try:
+        with open(os.path.join(destino, PROGRESSO), encoding="utf-8") as arquivo:
+            return json.load(arquivo)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _gravar_progresso(destino, versao, particoes, concluidos):
+    caminho = os.path.join(destino, PROGRESSO)
+    with open(caminho + ".tmp", "w", encoding="utf-8") as arquivo:
+        json.dump({"versao": versao, "particoes": particoes,
+                   "concluidos": sorted(concluidos)}, arquivo, ensure_ascii=False)
+    os.replace(caminho + ".tmp", caminho)
+
+
+def gerar_relatorios(gerenciador, destino, secoes=None, formatos=("parquet", "csv"),
+                     processos=None, refazer=False):
+    """
+    Gera as tabelas do painel de todas as UFs e municípios (ou regiões, na
+    PNAD) em `destino/<formato>/<seção>/<coluna>=<valor>.<formato>`.
+
+    Cada seção é agregada uma única vez no DuckDB, em um Parquet
+    intermediário ordenado pela partição; a formatação e a gravação de cada
+    partição são distribuídas em um pool de processos. Os arquivos gravados
+    ficam registrados em `destino/.progresso.json` junto com a versão dos
+    dados: rodar de novo depois de uma falha só refaz o que faltou, e uma
+    versão nova dos dados (ou `refazer`) recomeça do zero.
+
+    Retorna (arquivos gravados, falhas), com as falhas como (seção, valor,
+    mensagem).
+    """
+    desconhecidos = [formato for formato in formatos if formato not in FORMATOS]
+    if desconhecidos:
+        raise ValueError(f"Formatos desconhecidos: {', '.join(desconhecidos)}")
+    if "xlsx" in formatos and importlib.util.find_spec("openpyxl") is None:
+        raise ImportError("O formato xlsx precisa do openpyxl (pip install openpyxl).")
+
+    versao = _versao(gerenciador)
+    progresso = _ler_progresso(destino)
+    if refazer or progresso.get("versao") != versao:
+        for subdir in FORMATOS + [AGREGADOS_SUBDIR]:
+            _remover(os.path.join(destino, subdir))
+        progresso = {}
+    particoes = progresso.get("particoes", {})
+    concluidos = set(progresso.get("concluidos", []))
+    os.makedirs(os.path.join(destino, AGREGADOS_SUBDIR), exist_ok=True)
+
+    tarefas = []
+    for secao in secoes or SECOES:
+        spec = ROLLUPS[secao]
+        if not gerenciador.disponivel(spec["origem"]):
+            print(f"Seção '{secao}' ignorada: '{spec['origem']}' não encontrado.")
+            continue
+        agregado = os.path.join(destino, AGREGADOS_SUBDIR, f"{secao}.parquet")
+        if secao not in particoes or not os.path.exists(agregado):
+            particoes[secao] = _agregar(gerenciador, secao, agregado)
+            _gravar_progresso(destino, versao, particoes, concluidos)
+
+        coluna = _chaves(secao)[0]
+        for valor in particoes[secao]:
+            saidas = {}
+            for formato in formatos:
+                relativo = os.path.join(formato, secao, f"{coluna}={valor}.{formato}")
+                if relativo not in concluidos:
+                    saidas[formato] = os.path.join(destino, relativo)
+            if saidas:
+                tarefas.append((secao, agregado, coluna, valor, saidas))
+
+    gravados = 0
+    falhas = []
+    if tarefas:
+        # "spawn" evita herdar por fork a conexão e as threads do DuckDB
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=processos, mp_context=contexto) as executor:
+            futuros = {executor.submit(renderizar, tarefa): tarefa for tarefa in tarefas}
+            for futuro in as_completed(futuros):
+                secao, _, _, valor, saidas = futuros[futuro]
+                try:
+                    _, _, linhas = futuro.result()
+                except Exception as e:
+                    falhas.append((secao, valor, str(e)))
+                    print(f"Falha em '{secao}' ({valor}): {e}")
+                    continue
+                for caminho in saidas.values():
+                    concluidos.add(os.path.relpath(caminho, destino))
+                gravados += len(saidas)
+                _gravar_progresso(destino, versao, particoes, concluidos)
+                print(f"Relatório '{secao}' ({valor}): {linhas} linhas, "
+                      f"{', '.join(saidas)}")
+    return gravados, falhas
+
+
+def _remover(caminho):
+    if os.path.isdir(caminho):
+        shutil.rmtree(caminho)
+    elif os.path.exists(caminho):
+        os.remove(caminho)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Gera as tabelas do painel para todas as UFs e municípios.")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--destino", default=None,
+                        help="Diretório de saída (padrão: <data-dir>/relatorios)")
+    parser.add_argument("--formatos", nargs="+", choices=FORMATOS, default=["parquet", "csv"])
+    parser.add_argument("--processos", type=int, default=None,
+                        help="Processos do pool (padrão: número de núcleos)")
+    parser.add_argument("--refazer", action="store_true",
+                        help="Descarta o progresso anterior e gera tudo de novo")
+    parser.add_argument("secoes", nargs="*",
+                        help=f"Seções a gerar (padrão: todas). Opções: {', '.join(SECOES)}")
+    args = parser.parse_args()
+    invalidas = [secao for secao in args.secoes if secao not in SECOES]
+    if invalidas:
+        parser.error(f"Seções desconhecidas: {', '.join(invalidas)}")
+
+    gerenciador = GerenciadorConexoes(data_dir=args.data_dir)
+    destino = args.destino or os.path.join(args.data_dir, "relatorios")
+    try:
+        gravados, falhas = gerar_relatorios(
+            gerenciador, destino, args.secoes or None, args.formatos,
+            args.processos, args.refazer)
+    except ImportError as e:
+        parser.error(str(e))
+    finally:
+        gerenciador.fechar()
+
+    print(f"{gravados} arquivos gravados em {destino}")
+    if falhas:
+        print(f"{len(falhas)} partições falharam; rode o mesmo comando de novo "
+              "para retomar.")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
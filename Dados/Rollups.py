@@ -0,0 +1,229 @@
+import argparse
+import os
+import shutil
+
+from Dados.Conexao import (GerenciadorConexoes, DATA_DIR, ROLLUPS_SUBDIR,
+                           caminho_rollups_snapshot)
+
+# Marcador usado nas linhas de total (Brasil, UF inteira ou todas as regiões),
+# o mesmo valor "Todos" que os seletores do app já usam
+TODOS = "Todos"
+
+ROLLUPS_DIR = os.path.join(DATA_DIR, "rollups")
+
+# Definição de cada rollup: view de origem, níveis geográficos (do mais
+# detalhado ao total), recorte fixo, dimensões exibidas e medida somada.
+ROLLUPS = {
+    "sexo": {
+        "origem": "tse_genero",
+        "niveis": [("SG_UF", "NM_MUNICIPIO"), ("SG_UF",), ()],
+        "recorte": [],
+        "dimensoes": ["DS_GENERO"],
+        "medida": "QT_ELEITORES_PERFIL",
+        "inteira": True,
+        "filtro": "DS_GENERO <> 'NÃO INFORMADO'",
+    },
+    "idade": {
+        "origem": "tse_idade",
+        "niveis": [("SG_UF", "NM_MUNICIPIO"), ("SG_UF",), ()],
+        "recorte": [],
+        "dimensoes": ["DS_FAIXA_ETARIA"],
+        "medida": "QT_ELEITORES_PERFIL",
+        "inteira": True,
+    },
+    "renda": {
+        "origem": "pnad_renda",
+        "niveis": [("UF", "Região"), ("UF",), ("Região",), ()],
+        "recorte": [],
+        "dimensoes": ["Renda"],
+        "medida": "Total",
+    },
+    "escolaridade": {
+        "origem": "pnad_escolaridade",
+        "niveis": [("UF", "Região"), ("UF",), ("Região",), ()],
+        "recorte": [],
+        "dimensoes": ["Escolaridade"],
+        "medida": "Total",
+    },
+    "votacao": {
+        "origem": "eleicoes",
+        "niveis": [("SG_UF", "NM_MUNICIPIO"), ("SG_UF",), ()],
+        "recorte": ["ANO_ELEICAO", "NR_TURNO", "DS_CARGO"],
+        "dimensoes": ["NM_URNA_CANDIDATO", "SG_PARTIDO"],
+        "medida": "QT_VOTOS_NOMINAIS",
+        "inteira": True,
+        "casas": 2,
+    },
+}
+
+
+def _medidas(spec, particao):
+    """
+    Soma da medida e percentual dentro de `particao`, como exibidos no
+    rollup.
+    """
+    soma = f"SUM({spec['medida']})"
+    if spec.get("inteira"):
+        soma_exibida = f"CAST({soma} AS BIGINT)"
+    else:
+        soma_exibida = soma
+    janela = f"PARTITION BY {particao}" if particao else ""
+    percentual = f"100.0 * {soma} / SUM({soma}) OVER ({janela})"
+    if spec.get("casas") is not None:
+        percentual = f"COALESCE(ROUND({percentual}, {spec['casas']}), 0.0)"
+    return f"{soma_exibida} AS {spec['medida']}, {percentual} AS Percentual"
+
+
+def _lista(valores):
+    return ", ".join("'" + str(valor).replace("'", "''") + "'" for valor in valores)
+
+
+def consulta_rollup(nome, ufs=None):
+    """
+    Monta o SELECT com GROUPING SETS que gera todas as linhas do rollup,
+    com o marcador "Todos" nas colunas geográficas agregadas. Com `ufs`, só
+    as linhas dessas UFs (a primeira coluna geográfica), sem o total.
+    """
+    spec = ROLLUPS[nome]
+    geografia = list(spec["niveis"][0])
+    recorte = spec["recorte"]
+    dimensoes = spec["dimensoes"]
+    niveis = spec["niveis"]
+    filtros = [spec["filtro"]] if spec.get("filtro") else []
+    if ufs is not None:
+        niveis = [nivel for nivel in niveis if geografia[0] in nivel]
+        filtros.append(f"{geografia[0]} IN ({_lista(ufs)})")
+
+    grupos = ", ".join(
+        "(" + ", ".join(list(nivel) + recorte + dimensoes) + ")"
+        for nivel in niveis)
+    colunas_geo = ", ".join(
+        f"COALESCE({col}, '{TODOS}') AS {col}" for col in geografia)
+    particao = ", ".join(
+        [f"GROUPING({', '.join(geografia)})"] + geografia + recorte)
+
+    where = f" WHERE {' AND '.join(filtros)}" if filtros else ""
+
+    return (
+        f"SELECT {colunas_geo}, {', '.join(recorte + dimensoes)}, "
+        f"{_medidas(spec, particao)} "
+        f"FROM {spec['origem']}{where} "
+        f"GROUP BY GROUPING SETS ({grupos})"
+    )
+
+
+def construir_rollups(gerenciador, destino=ROLLUPS_DIR, nomes=None):
+    """
+    Grava um Parquet por rollup em `destino`, ordenado pelas colunas
+    geográficas para que a busca de uma seleção leia poucos blocos.
+    """
+    os.makedirs(destino, exist_ok=True)
+    gerados = []
+    for nome in nomes or ROLLUPS:
+        spec = ROLLUPS[nome]
+        if not gerenciador.disponivel(spec["origem"]):
+            print(f"Rollup '{nome}' ignorado: '{spec['origem']}' não encontrado.")
+            continue
+
+        ordem = ", ".join(list(spec["niveis"][0]) + spec["recorte"])
+        caminho = os.path.join(destino, f"{nome}.parquet")
+        temporario = caminho + ".tmp"
+        cursor = gerenciador.cursor()
+        try:
+            cursor.execute(
+                f"COPY ({consulta_rollup(nome)} ORDER BY {ordem}) "
+                f"TO '{temporario}' (FORMAT parquet, COMPRESSION zstd)")
+            linhas = cursor.execute(
+                f"SELECT COUNT(*) FROM read_parquet('{temporario}')").fetchone()[0]
+        finally:
+            cursor.close()
+        # Troca atômica para que o app nunca leia um arquivo pela metade
+        os.replace(temporario, caminho)
+        gerados.append(caminho)
+        print(f"Rollup '{nome}': {linhas} linhas em {caminho}")
+    return gerados
+
+
+def atualizar_rollup(gerenciador, nome, ufs, destino=ROLLUPS_DIR, base=None):
+    """
+    Grava em `destino` o rollup `base` (por padrão, o próprio arquivo de
+    `destino`) com só as linhas das `ufs` refeitas, a partir da origem
+    registrada no gerenciador; as demais UFs são copiadas de `base` e o total
+    do Brasil é somado das linhas das UFs. Usado quando um snapshot novo
+    (Dados/Snapshots.py) muda poucas UFs. Retorna o caminho gravado, ou None
+    se o rollup ainda não foi gerado.
+    """
+    spec = ROLLUPS[nome]
+    caminho = os.path.join(destino, f"{nome}.parquet")
+    base = base or caminho
+    if not os.path.exists(base):
+        return None
+    os.makedirs(destino, exist_ok=True)
+    temporario = caminho + ".tmp"
+    if not ufs:
+        shutil.copyfile(base, temporario)
+        os.replace(temporario, caminho)
+        return caminho
+
+    geografia = list(spec["niveis"][0])
+    recorte = spec["recorte"]
+    dimensoes = spec["dimensoes"]
+    uf = geografia[0]
+    mantidas = (f"SELECT * FROM read_parquet('{base}') "
+                f"WHERE {uf} <> '{TODOS}' AND {uf} NOT IN ({_lista(ufs)})")
+    # Linhas de UF inteira: a primeira coluna preenchida e as demais "Todos"
+    linhas_uf = " AND ".join([f"{uf} <> '{TODOS}'"] +
+                             [f"{col} = '{TODOS}'" for col in geografia[1:]])
+    marcadores = ", ".join(f"'{TODOS}' AS {col}" for col in geografia)
+    total = (
+        f"SELECT {marcadores}, "
+        f"{', '.join(recorte + dimensoes)}, {_medidas(spec, ', '.join(recorte))} "
+        f"FROM linhas WHERE {linhas_uf} "
+        f"GROUP BY {', '.join(recorte + dimensoes)}")
+    ordem = ", ".join(geografia + recorte)
+
+    cursor = gerenciador.cursor()
+    try:
+        cursor.execute(
+            f"COPY (WITH linhas AS ({mantidas} UNION ALL BY NAME {consulta_rollup(nome, ufs)}) "
+            f"SELECT * FROM linhas UNION ALL BY NAME {total} ORDER BY {ordem}) "
+            f"TO '{temporario}' (FORMAT parquet, COMPRESSION zstd)")
+    finally:
+        cursor.close()
+    os.replace(temporario, caminho)
+    return caminho
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Gera as tabelas de rollup (Brasil / UF / município) do painel.")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--destino", default=None)
+    parser.add_argument("indicadores", nargs="*",
+                        help=f"Rollups a gerar (padrão: todos). Opções: {', '.join(ROLLUPS)}")
+    args = parser.parse_args()
+    invalidos = [nome for nome in args.indicadores if nome not in ROLLUPS]
+    if invalidos:
+        parser.error(f"Rollups desconhecidos: {', '.join(invalidos)}")
+
+    gerenciador = GerenciadorConexoes(data_dir=args.data_dir)
+    nomes = args.indicadores or list(ROLLUPS)
+    if args.destino:
+        construir_rollups(gerenciador, args.destino, nomes)
+    else:
+        # Os rollups de um conjunto com snapshot em uso vão para o diretório
+        # do snapshot, que tem prioridade sobre `rollups/`
+        por_destino = {}
+        for nome in nomes:
+            origem = ROLLUPS[nome]["origem"]
+            rotulo = gerenciador.snapshots.get(origem)
+            destino = (caminho_rollups_snapshot(args.data_dir, origem, rotulo) if rotulo
+                       else os.path.join(args.data_dir, ROLLUPS_SUBDIR))
+            por_destino.setdefault(destino, []).append(nome)
+        for destino, nomes_destino in por_destino.items():
+            construir_rollups(gerenciador, destino, nomes_destino)
+    gerenciador.fechar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+import argparse
+import asyncio
+import json
+import os
+import threading
+
+import pyarrow as pa
+import tornado.ioloop
+import tornado.web
+
+from Dados.Aquecimento import get_prontidao
+from Dados.Motor import ARROW_STREAM, FILTROS, INDICADORES, Motor
+from Dados.Snapshots import get_observador
+
+# Porta em que o processo do Streamlit, que só expõe o /_stcore/health,
+# serve /saude e /pronto; sem ela, o sinal não é servido
+PORTA_PRONTIDAO = os.environ.get("ATLAS_PRONTIDAO_PORTA")
+HOST_PRONTIDAO = os.environ.get("ATLAS_PRONTIDAO_HOST", "0.0.0.0")
+
+
+def para_arrow(df):
+    """
+    Serializa o DataFrame no formato de streaming do Arrow IPC.
+    """
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    destino = pa.BufferOutputStream()
+    with pa.ipc.new_stream(destino, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+    return destino.getvalue().to_pybytes()
+
+
+def ler_filtros(argumentos):
+    """
+    Converte os parâmetros da URL ({nome: [bytes, ...]}) nos filtros do
+    motor. Listas aceitam o parâmetro repetido (?regioes=a&regioes=b).
+    """
+    filtros = {}
+    for nome, valores in argumentos.items():
+        if nome == "formato":
+            continue
+        if nome not in FILTROS:
+            raise ValueError(f"Filtro desconhecido: '{nome}'")
+        valores = [valor.decode("utf-8") for valor in valores]
+        tipo = FILTROS[nome]
+        if tipo is list:
+            filtros[nome] = valores
+        else:
+            filtros[nome] = tipo(valores[-1])
+    return filtros
+
+
+class IndicadorHandler(tornado.web.RequestHandler):
+    """
+    GET /indicadores/<nome>?uf=SP&municipio=...: tabela do indicador em JSON
+    (registros) ou em Arrow IPC, com `?formato=arrow` ou `Accept` do Arrow.
+    Responde 204 quando não há dados para a seleção.
+    """
+
+    def initialize(self, motor):
+        self.motor = motor
+
+    async def get(self, nome):
+        if nome not in INDICADORES:
+            raise tornado.web.HTTPError(404, reason=f"Indicador desconhecido: {nome}")
+        try:
+            filtros = ler_filtros(self.request.query_arguments)
+        except ValueError as e:
+            raise tornado.web.HTTPError(400, reason=str(e))
+
+        # A consulta bloqueia; roda no executor para não travar o loop
+        loop = tornado.ioloop.IOLoop.current()
+        try:
+            df = await loop.run_in_executor(
+                None, lambda: self.motor.carregar(nome, **filtros))
+        except FileNotFoundError as e:
+            raise tornado.web.HTTPError(404, reason=str(e))
+        except (ValueError, KeyError, TypeError) as e:
+            # Valor de filtro inválido (por exemplo, uma ordenação
+            # desconhecida) ou filtro que o indicador não aceita
+            raise tornado.web.HTTPError(400, reason=str(e))
+
+        if df is None:
+            self.set_status(204)
+            return
+        arrow = (self.get_query_argument("formato", None) == "arrow"
+                 or ARROW_STREAM in self.request.headers.get("Accept", ""))
+        if arrow:
+            self.set_header("Content-Type", ARROW_STREAM)
+            self.write(para_arrow(df))
+        else:
+            self.set_header("Content-Type", "application/json; charset=utf-8")
+            self.write(df.to_json(orient="records", force_ascii=False))
+
+
+class EstatisticasHandler(tornado.web.RequestHandler):
+    """
+    GET /estatisticas: contadores do cache de resultados do motor e, em
+    "arrow", os do armazém de tabelas Arrow com os bytes de cada tabela.
+    """
+
+    def initialize(self, motor):
+        self.motor = motor
+
+    def get(self):
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        armazem = self.motor.armazem
+        estatisticas = dict(self.motor.cache.estatisticas(),
+                            arrow=dict(armazem.estatisticas(), tabelas=armazem.residentes()))
+        self.write(json.dumps(estatisticas, ensure_ascii=False, default=str))
+
+
+class IndiceHandler(tornado.web.RequestHandler):
+    """
+    GET /indice: índice dos seletores (conjuntos disponíveis, UFs,
+    municípios, eleições, turnos e cargos) em JSON, para os front-ends com o
+    motor remoto. A ETag é a versão dos dados; com `If-None-Match` igual,
+    responde 304 sem corpo.
+    """
+
+    def initialize(self, motor):
+        self.motor = motor
+
+    async def get(self):
+        # O índice é refeito quando os dados mudam, o que bloqueia
+        loop = tornado.ioloop.IOLoop.current()
+        indice = await loop.run_in_executor(None, self.motor.indice)
+        self.set_header("ETag", f'"{indice.versao()}"')
+        if self.check_etag_header():
+            self.set_status(304)
+            return
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        self.write(json.dumps(indice.exportar(), ensure_ascii=False))
+
+
+class SaudeHandler(tornado.web.RequestHandler):
+    """
+    GET /saude: o processo está de pé (liveness). Responde assim que o
+    servidor começa a ouvir, mesmo durante o aquecimento.
+    """
+
+    def get(self):
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        self.write(json.dumps({"vivo": True}))
+
+
+class ProntidaoHandler(tornado.web.RequestHandler):
+    """
+    GET /pronto: 200 depois que o aquecimento do processo terminou
+    (Dados/Aquecimento.py) e 503 antes disso ou se ele falhou, para que o
+    balanceador só mande tráfego para instâncias quentes. O corpo traz o
+    tempo de cada etapa do aquecimento.
+    """
+
+    def initialize(self, prontidao):
+        self.prontidao = prontidao
+
+    def get(self):
+        estado = self.prontidao.estado()
+        self.set_status(200 if estado["pronto"] else 503)
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        self.write(json.dumps(estado, ensure_ascii=False, default=str))
+
+
+def criar_aplicacao(motor=None, prontidao=None):
+    motor = motor or Motor()
+    prontidao = prontidao or get_prontidao()
+    return tornado.web.Application([
+        (r"/indicadores/([a-z_]+)", IndicadorHandler, {"motor": motor}),
+        (r"/estatisticas", EstatisticasHandler, {"motor": motor}),
+        (r"/indice", IndiceHandler, {"motor": motor}),
+        (r"/saude", SaudeHandler),
+        (r"/pronto", ProntidaoHandler, {"prontidao": prontidao}),
+    ])
+
+
+_sinal = None
+_sinal_lock = threading.Lock()
+
+
+def servir_prontidao(prontidao=None, porta=PORTA_PRONTIDAO, host=HOST_PRONTIDAO):
+    """
+    Serve /saude e /pronto em `porta`, em uma thread com o próprio loop, uma
+    única vez por processo. É o sinal de prontidão do app do Streamlit, que
+    não aceita rotas próprias. Sem porta, não faz nada. Se a porta não puder
+    ser aberta, a falha é impressa uma vez e o app segue sem o sinal: as
+    chamadas seguintes (a cada rerun) não tentam de novo.
+    """
+    global _sinal
+    if not porta:
+        return
+    with _sinal_lock:
+        if _sinal is not None:
+            return
+        aplicacao = tornado.web.Application([
+            (r"/saude", SaudeHandler),
+            (r"/pronto", ProntidaoHandler, {"prontidao": prontidao or get_prontidao()}),
+        ])
+        ouvindo = threading.Event()
+        erros = []
+
+        def servir():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+
+            async def ouvir():
+                aplicacao.listen(int(porta), address=host)
+
+            try:
+                loop.run_until_complete(ouvir())
+            except OSError as e:
+                erros.append(e)
+                return
+            finally:
+                ouvindo.set()
+            loop.run_forever()
+
+        _sinal = threading.Thread(target=servir, name="atlas-prontidao", daemon=True)
+        _sinal.start()
+        ouvindo.wait()
+        if erros:
+            # A thread terminada fica em _sinal, para não repetir a tentativa
+            print(f"Sinal de prontidão não iniciado em {host}:{porta}: {erros[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve os indicadores do painel por HTTP (JSON e Arrow IPC).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765)
+    args = parser.parse_args()
+
+    motor = Motor()
+    aplicacao = criar_aplicacao(motor)
+    aplicacao.listen(args.porta, address=args.host)
+    # O servidor já responde em /saude; /pronto só dá 200 depois que os
+    # seletores e as telas iniciais estiverem no cache
+    get_prontidao().iniciar(motor.gerenciador, motor, app=False)
+    get_observador().iniciar(app=False)
+    print(f"Motor do painel em http://{args.host}:{args.porta}")
+    tornado.ioloop.IOLoop.current().start()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+
+import duckdb
+
+from Dados.Conexao import (DATA_DIR, MANIFESTO, ROLLUPS_SUBDIR, VERSIONADOS,
+                           GerenciadorConexoes, caminho_rollups_snapshot,
+                           caminho_snapshot, get_gerenciador, ler_manifesto,
+                           listar_snapshots, snapshot_publicado, trocar_gerenciador)
+from Dados.Dimensoes import CODIGOS_UF
+from Dados.Instrumentacao import iniciar_execucao, medir
+from Dados.Rollups import ROLLUPS, atualizar_rollup
+
+logger = logging.getLogger("atlas.snapshots")
+
+# Colunas obrigatórias de cada conjunto versionado e o tipo esperado; são
+# também as colunas que entram na impressão do conteúdo de cada UF
+ESQUEMAS = {
+    "tse_genero": {
+        "SG_UF": "texto",
+        "NM_MUNICIPIO": "texto",
+        "DS_GENERO": "texto",
+        "QT_ELEITORES_PERFIL": "inteiro",
+    },
+    "tse_idade": {
+        "SG_UF": "texto",
+        "NM_MUNICIPIO": "texto",
+        "DS_FAIXA_ETARIA": "texto",
+        "QT_ELEITORES_PERFIL": "inteiro",
+    },
+}
+
+TIPOS = {
+    "texto": {"VARCHAR"},
+    "inteiro": {"TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT",
+                "UTINYINT", "USMALLINT", "UINTEGER", "UBIGINT"},
+}
+
+# Marcadores dentro do diretório do snapshot: recusado na validação (com o
+# motivo) e em preparação por algum processo
+INVALIDO = "_invalido.json"
+PROCESSANDO = "_processando"
+
+# Depois desse prazo, o marcador de preparação é de um processo que morreu
+PRAZO_PROCESSANDO = 3600
+
+# Intervalo entre as verificações de snapshots novos, em segundos
+INTERVALO = float(os.environ.get("ATLAS_SNAPSHOT_INTERVALO", "60"))
+
+
+class SnapshotInvalido(ValueError):
+    pass
+
+
+def _origem(caminho):
+    return (f"read_parquet('{caminho}/**/*.parquet', "
+            f"hive_partitioning = true, union_by_name = true)")
+
+
+def validar(cursor, origem, dataset):
+    """
+    Confere as colunas obrigatórias e seus tipos, e que o snapshot tem
+    linhas e só UFs conhecidas. Levanta SnapshotInvalido com o motivo.
+    """
+    esquema = ESQUEMAS[dataset]
+    colunas = {coluna: tipo for coluna, tipo, *_ in
+               cursor.execute(f"DESCRIBE SELECT * FROM {origem}").fetchall()}
+    faltando = [coluna for coluna in esquema if coluna not in colunas]
+    if faltando:
+        raise SnapshotInvalido(f"Colunas ausentes: {', '.join(faltando)}")
+    divergentes = [f"{coluna} ({colunas[coluna]})" for coluna, tipo in esquema.items()
+                   if colunas[coluna] not in TIPOS[tipo]]
+    if divergentes:
+        raise SnapshotInvalido(f"Tipos inesperados: {', '.join(divergentes)}")
+
+    ufs = cursor.execute(
+        f"SELECT SG_UF, COUNT(*) FROM {origem} GROUP BY SG_UF").fetchall()
+    if not ufs:
+        raise SnapshotInvalido("Snapshot sem linhas")
+    desconhecidas = sorted(str(uf) for uf, _ in ufs if uf not in CODIGOS_UF)
+    if desconhecidas:
+        raise SnapshotInvalido(f"UFs desconhecidas: {', '.join(desconhecidas)}")
+
+
+def impressoes(cursor, origem, dataset):
+    """
+    Impressão do conteúdo de cada UF: número de linhas e soma dos hashes das
+    linhas, que não depende da ordem nem da divisão em arquivos.
+    """
+    colunas = ", ".join(coluna for coluna in ESQUEMAS[dataset] if coluna != "SG_UF")
+    linhas = cursor.execute(
+        f"SELECT SG_UF, COUNT(*), CAST(SUM(hash({colunas})) AS VARCHAR) "
+        f"FROM {origem} GROUP BY SG_UF").fetchall()
+    return {uf: f"{n}:{soma}" for uf, n, soma in linhas}
+
+
+def preparar(gerenciador, dataset, rotulo):
+    """
+    Valida o snapshot, compara a impressão de cada UF com a do último
+    snapshot preparado (sem nenhum, o arquivo original), grava os rollups do
+    snapshot a partir dos do anterior, refazendo só as UFs alteradas, e grava
+    o manifesto, que marca o snapshot como pronto para uso. Retorna o
+    manifesto, ou None se o snapshot é inválido ou está sendo preparado por
+    outro processo.
+    """
+    caminho = caminho_snapshot(gerenciador.data_dir, dataset, rotulo)
+    manifesto = ler_manifesto(caminho)
+    if manifesto is not None or os.path.exists(os.path.join(caminho, INVALIDO)):
+        return manifesto
+
+    marcador = os.path.join(caminho, PROCESSANDO)
+    try:
+        if time.time() - os.path.getmtime(marcador) > PRAZO_PROCESSANDO:
+            os.remove(marcador)
+    except FileNotFoundError:
+        pass
+    try:
+        # Criação exclusiva: só um processo prepara cada snapshot
+        os.close(os.open(marcador, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        return None
+
+    try:
+        with medir("snapshot", dataset=dataset, rotulo=rotulo) as registro:
+            cursor = gerenciador.cursor()
+            try:
+                try:
+                    validar(cursor, _origem(caminho), dataset)
+                except (SnapshotInvalido, duckdb.Error) as e:
+                    registro["falha"] = str(e)
+                    logger.warning("Snapshot %s/%s recusado: %s", dataset, rotulo, e)
+                    _gravar_json(os.path.join(caminho, INVALIDO), {"erro": str(e)})
+                    return None
+                novas = impressoes(cursor, _origem(caminho), dataset)
+                anterior = snapshot_publicado(gerenciador.data_dir, dataset)
+                if anterior is not None:
+                    anteriores = ler_manifesto(caminho_snapshot(
+                        gerenciador.data_dir, dataset, anterior))["impressoes"]
+                elif gerenciador.disponivel(dataset):
+                    anteriores = impressoes(cursor, dataset, dataset)
+                else:
+                    anteriores = {}
+            finally:
+                cursor.close()
+
+            alteradas = sorted(uf for uf in set(novas) | set(anteriores)
+                               if novas.get(uf) != anteriores.get(uf))
+            registro["ufs"] = alteradas
+            _atualizar_rollups(gerenciador, dataset, rotulo, anterior, alteradas)
+
+            manifesto = {
+                "rotulo": rotulo,
+                "anterior": anterior,
+                "ufs_alteradas": alteradas,
+                "impressoes": novas,
+            }
+            _gravar_json(os.path.join(caminho, MANIFESTO), manifesto)
+            return manifesto
+    finally:
+        os.remove(marcador)
+
+
+def _atualizar_rollups(gerenciador, dataset, rotulo, anterior, ufs):
+    # Um gerenciador à parte, com o snapshot novo, só para ler a origem. Os
+    # rollups vão para o diretório do snapshot novo, que só o gerenciador
+    # montado em `publicar` registra: o do processo continua com os do
+    # anterior até a troca
+    construcao = GerenciadorConexoes(gerenciador.data_dir, gerenciador.threads,
+                                     gerenciador.memory_limit, snapshots={dataset: rotulo})
+    try:
+        destino = caminho_rollups_snapshot(gerenciador.data_dir, dataset, rotulo)
+        for nome, spec in ROLLUPS.items():
+            if spec["origem"] == dataset:
+                atualizar_rollup(construcao, nome, ufs, destino,
+                                 _rollup_anterior(gerenciador.data_dir, dataset, anterior, nome))
+    finally:
+        construcao.fechar()
+
+
+def _rollup_anterior(data_dir, dataset, anterior, nome):
+    # O rollup do snapshot anterior ou, sem ele, o de `rollups/`, gerado do
+    # arquivo original
+    arquivo = f"{nome}.parquet"
+    if anterior is not None:
+        caminho = os.path.join(caminho_rollups_snapshot(data_dir, dataset, anterior), arquivo)
+        if os.path.exists(caminho):
+            return caminho
+    return os.path.join(data_dir, ROLLUPS_SUBDIR, arquivo)
+
+
+def _gravar_json(caminho, conteudo):
+    with open(caminho + ".tmp", "w", encoding="utf-8") as arquivo:
+        json.dump(conteudo, arquivo, ensure_ascii=False)
+    os.replace(caminho + ".tmp", caminho)
+
+
+def verificar(gerenciador=None):
+    """
+    Procura, para cada conjunto versionado, um snapshot mais recente que o
+    em uso e prepara o de maior rótulo que for válido. Retorna {view:
+    rótulo} dos snapshots prontos para entrar no lugar dos atuais.
+    """
+    gerenciador = gerenciador or get_gerenciador()
+    novos = {}
+    for dataset in VERSIONADOS:
+        atual = gerenciador.snapshots.get(dataset)
+        for rotulo in reversed(listar_snapshots(gerenciador.data_dir, dataset)):
+            if atual is not None and rotulo <= atual:
+                break
+            if preparar(gerenciador, dataset, rotulo) is not None:
+                novos[dataset] = rotulo
+                break
+    return novos
+
+
+def publicar(gerenciador, novos):
+    """
+    Monta um gerenciador com os snapshots novos e o coloca no lugar do
+    atual de uma vez. Retorna o novo gerenciador, ou None se o do processo
+    já tinha sido trocado por outra thread.
+    """
+    with medir("snapshot", parte="troca", snapshots=novos):
+        novo = GerenciadorConexoes(
+            gerenciador.data_dir, gerenciador.threads, gerenciador.memory_limit,
+            gerenciador.hash_conteudo, snapshots=dict(gerenciador.snapshots, **novos))
+        if not trocar_gerenciador(novo, gerenciador):
+            novo.fechar()
+            return None
+    return novo
+
+
+class Observador:
+    """
+    Verifica em segundo plano, a cada `intervalo` segundos, se chegou um
+    snapshot novo dos conjuntos versionados e o coloca em uso. Depois da
+    troca, o índice dos seletores e as telas iniciais são refeitos com o
+    aquecimento; no cache de resultados, só as entradas das UFs alteradas
+    deixam de valer.
+    """
+
+    def __init__(self, intervalo=INTERVALO):
+        self.intervalo = intervalo
+        self._parar = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def iniciar(self, app=True):
+        """
+        Dispara a verificação periódica, uma única vez por processo. Com
+        intervalo 0, não faz nada.
+        """
+        with self._lock:
+            if self._thread is not None or self.intervalo <= 0:
+                return
+            self._thread = threading.Thread(
+                target=self._observar, args=(app,), name="atlas-snapshots", daemon=True)
+            self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+
+    def _observar(self, app):
+        while not self._parar.is_set():
+            try:
+                self.verificar(app)
+            except Exception:
+                logger.exception("Falha ao verificar os snapshots")
+            self._parar.wait(self.intervalo)
+
+    def verificar(self, app=True):
+        """
+        Uma verificação: prepara e publica os snapshots novos. Retorna {view:
+        rótulo} dos que entraram em uso.
+        """
+        iniciar_execucao()
+        gerenciador = get_gerenciador()
+        novos = verificar(gerenciador)
+        if not novos:
+            return {}
+        novo = publicar(gerenciador, novos)
+        if novo is None:
+            return {}
+        logger.info("Snapshots em uso: %s", novo.snapshots)
+        # Importado aqui: o aquecimento depende do motor, que não é preciso
+        # para preparar os snapshots
+        from Dados.Aquecimento import aquecer
+        aquecer(novo, app=app)
+        return novos
+
+
+_observador = None
+_observador_lock = threading.Lock()
+
+
+def get_observador():
+    """
+    Retorna o observador de snapshots do processo.
+    """
+    global _observador
+    with _observador_lock:
+        if _observador is None:
+            _observador = Observador()
+        return _observador
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Valida os snapshots novos do TSE e atualiza os rollups das UFs alteradas.")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    args = parser.parse_args()
+
+    gerenciador = GerenciadorConexoes(data_dir=args.data_dir)
+    try:
+        novos = verificar(gerenciador)
+    finally:
+        gerenciador.fechar()
+    for dataset in VERSIONADOS:
+        caminho = (caminho_snapshot(args.data_dir, dataset, novos[dataset])
+                   if dataset in novos else None)
+        if caminho is None:
+            atual = gerenciador.snapshots.get(dataset)
+            print(f"'{dataset}': nenhum snapshot novo (em uso: {atual or 'arquivo original'})")
+            continue
+        manifesto = ler_manifesto(caminho)
+        print(f"'{dataset}': snapshot '{novos[dataset]}' pronto; UFs alteradas: "
+              f"{', '.join(manifesto['ufs_alteradas']) or 'nenhuma'}")
+
+
+if __name__ == "__main__":
+    main()
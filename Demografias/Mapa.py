@@ -0,0 +1,15 @@
+import pandas as pd
+
+
+def get_mapa_idade_data(df_mapa):
+    """
+    Valida o percentual da faixa etária por município usado no mapa.
+    """
+    if df_mapa is None or df_mapa.empty:
+        return None
+
+    required_cols = ['SG_UF', 'NM_MUNICIPIO', 'Valor']
+    if not all(col in df_mapa.columns for col in required_cols):
+        return None
+
+    return df_mapa
\ No newline at end of file
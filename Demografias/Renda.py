@@ -1,15 +1,13 @@
 import pandas as pd
-import streamlit as st
 
-@st.cache_data
 def get_renda_data(df_pnad):
     """
-    Agrega os dados de renda de um DataFrame já filtrado.
+    Ordena e renomeia os dados de renda já agregados pelo DuckDB.
     """
     if df_pnad is None or df_pnad.empty:
         return None
     
-    required_cols = ['Renda', 'Total']
+    required_cols = ['Renda', 'Total', 'Percentual']
     if not all(col in df_pnad.columns for col in required_cols):
         return None
     
@@ -23,16 +21,12 @@ def get_renda_data(df_pnad):
     ]
 
     # Converte a coluna 'Renda' para o tipo de dado Categoria com a ordem definida
-    df_pnad['Renda'] = pd.Categorical(df_pnad['Renda'], categories=ordem_renda, ordered=True)
+    df_agg = df_pnad.copy()
+    df_agg['Renda'] = pd.Categorical(df_agg['Renda'], categories=ordem_renda, ordered=True)
 
-    # Agrega os dados e o agrupamento respeitará a ordem definida
-    # Adicione observed=False para evitar o FutureWarning do pandas
-    df_agg = df_pnad.groupby('Renda', observed=False)['Total'].sum().reset_index()
-    total = df_agg['Total'].sum()
-    df_agg['Percentual'] = (df_agg['Total'] / total) * 100
-    df_agg.rename(columns={'Total': 'Renda Total'}, inplace=True)
-    
-    # Remove as categorias de renda que não existem nos dados filtrados
+    # Remove as categorias de renda que não existem na ordem definida
     df_agg = df_agg.dropna(subset=['Renda'])
+    df_agg = df_agg.sort_values('Renda').reset_index(drop=True)
+    df_agg.rename(columns={'Total': 'Renda Total'}, inplace=True)
     
     return df_agg
\ No newline at end of file
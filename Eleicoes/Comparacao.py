@@ -0,0 +1,32 @@
+import pandas as pd
+
+
+def get_comparacao_data(df_comparacao):
+    """
+    Coloca as eleições lado a lado: uma linha por partido, com votos e
+    percentual de cada ano e a variação em pontos percentuais entre a
+    primeira e a última eleição.
+    """
+    if df_comparacao is None or df_comparacao.empty:
+        return None
+
+    required_cols = ['ANO_ELEICAO', 'SG_PARTIDO', 'QT_VOTOS_NOMINAIS', 'Percentual']
+    if not all(col in df_comparacao.columns for col in required_cols):
+        return None
+
+    df_pivot = df_comparacao.pivot(
+        index='SG_PARTIDO', columns='ANO_ELEICAO',
+        values=['QT_VOTOS_NOMINAIS', 'Percentual'])
+    anos = sorted(df_comparacao['ANO_ELEICAO'].unique())
+
+    df_agg = pd.DataFrame(index=df_pivot.index)
+    for ano in anos:
+        df_agg[f'Votos {ano}'] = df_pivot[('QT_VOTOS_NOMINAIS', ano)].fillna(0).astype('int64')
+        df_agg[f'Percentual {ano}'] = df_pivot[('Percentual', ano)].fillna(0.0)
+    if len(anos) > 1:
+        df_agg['Variação (p.p.)'] = (
+            df_agg[f'Percentual {anos[-1]}'] - df_agg[f'Percentual {anos[0]}']).round(2)
+
+    df_agg = df_agg.sort_values(f'Percentual {anos[-1]}', ascending=False)
+    df_agg.index.name = 'Partido'
+    return df_agg.reset_index()
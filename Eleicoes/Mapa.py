@@ -0,0 +1,15 @@
+import pandas as pd
+
+
+def get_mapa_votacao_data(df_mapa):
+    """
+    Valida o percentual de votos do candidato por município usado no mapa.
+    """
+    if df_mapa is None or df_mapa.empty:
+        return None
+
+    required_cols = ['SG_UF', 'NM_MUNICIPIO', 'Valor']
+    if not all(col in df_mapa.columns for col in required_cols):
+        return None
+
+    return df_mapa
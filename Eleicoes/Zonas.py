@@ -0,0 +1,25 @@
+import pandas as pd
+
+
+def get_zonas_data(df_zonas):
+    """
+    Renomeia a página de candidatos por zona, já ranqueada pelo DuckDB e
+    recortada pelo motor. TOTAL_LINHAS é mantida para a paginação do app.
+    """
+    if df_zonas is None or df_zonas.empty:
+        return None
+
+    required_cols = ['NR_ZONA', 'Posicao', 'NM_URNA_CANDIDATO', 'SG_PARTIDO',
+                     'QT_VOTOS_NOMINAIS', 'Percentual', 'TOTAL_LINHAS']
+    if not all(col in df_zonas.columns for col in required_cols):
+        return None
+
+    df_agg = df_zonas.rename(columns={
+        'NR_ZONA': 'Zona',
+        'Posicao': 'Posição',
+        'NM_URNA_CANDIDATO': 'Candidatos',
+        'SG_PARTIDO': 'Partido',
+        'QT_VOTOS_NOMINAIS': 'Quantidade de Votos'
+    })
+
+    return df_agg
@@ -0,0 +1,83 @@
+import streamlit as st
+
+from Dados.Geometria import mapa, valores_por_codigo
+from Dados.Instrumentacao import medir
+from Dados.Motor import INDICADORES, get_motor
+
+# Dicionário de mapeamento de siglas para nomes de estados
+UF_NAMES = {
+    "AC": "Acre", "AL": "Alagoas", "AP": "Amapá", "AM": "Amazonas",
+    "BA": "Bahia", "CE": "Ceará", "DF": "Distrito Federal", "ES": "Espírito Santo",
+    "GO": "Goiás", "MA": "Maranhão", "MT": "Mato Grosso", "MS": "Mato Grosso do Sul",
+    "MG": "Minas Gerais", "PA": "Pará", "PB": "Paraíba", "PR": "Paraná",
+    "PE": "Pernambuco", "PI": "Piauí", "RJ": "Rio de Janeiro",
+    "RN": "Rio Grande do Norte", "RS": "Rio Grande do Sul", "RO": "Rondônia",
+    "RR": "Roraima", "SC": "Santa Catarina", "SP": "São Paulo",
+    "SE": "Sergipe", "TO": "Tocantins"
+}
+
+
+def _guardar_local():
+    st.session_state["local"] = st.session_state["_local"]
+
+
+def seletor_local(titulo):
+    """
+    Cabeçalho da página e seletor de local (Brasil ou estado). Cada página
+    tem o próprio widget; a escolha fica guardada em `local` na sessão e é
+    restaurada ao trocar de página. Retorna o local exibido, a sigla da UF
+    (None para o Brasil) e a coluna ao lado do seletor.
+    """
+    st.header(titulo)
+    if "local" in st.session_state:
+        st.session_state["_local"] = st.session_state["local"]
+
+    col1, col2 = st.columns(2)
+    with col1:
+        ufs_list = sorted(list(UF_NAMES.values()))
+        ufs_list.insert(0, "Brasil")
+        selecao_local = st.selectbox(
+            "Selecionar Local (País e Estados)",
+            ufs_list,
+            key="_local",
+            on_change=_guardar_local
+        )
+
+    uf = next((key for key, value in UF_NAMES.items() if value == selecao_local), None)
+    return selecao_local, uf, col2
+
+
+def carregar_indicador(nome, **filtros):
+    """
+    Carrega a tabela final de um indicador para os filtros selecionados
+    (Dados/Motor.py), exibindo o erro na página em caso de falha.
+    """
+    return resultado_indicador(nome, lambda: get_motor().carregar(nome, **filtros))
+
+
+def resultado_indicador(nome, obter):
+    """
+    Chama `obter()` (o cálculo ou o `result` de um futuro) e exibe o erro no
+    ponto atual da página em caso de falha.
+    """
+    try:
+        return obter()
+    except FileNotFoundError:
+        st.error(f"Erro: Conjunto de dados '{INDICADORES[nome][0]}' não encontrado.")
+        return None
+    except Exception as e:
+        st.error(f"Erro ao executar consulta no DuckDB: {e}")
+        return None
+
+
+def exibir_mapa(indice, geometria, nome, dataset, rotulo, **filtros):
+    """
+    Mapa coroplético do indicador por município, do Brasil ou da UF do
+    filtro. A geometria vem pronta e em cache (Dados/Geometria.py); a cada
+    seleção só os valores e as cores são recalculados.
+    """
+    uf = filtros.get("uf")
+    base, vista = geometria.base(indice, "uf" if uf else "brasil", uf)
+    valores = valores_por_codigo(carregar_indicador(nome, **filtros), indice, dataset)
+    with medir("renderizacao", indicador=nome):
+        st.pydeck_chart(mapa(base, vista, valores, rotulo))
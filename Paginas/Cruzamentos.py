@@ -0,0 +1,90 @@
+import numpy as np
+import streamlit as st
+
+from Dados.Cruzamento import get_cruzamento
+from Dados.Instrumentacao import medir
+from Dados.Motor import get_motor
+from Paginas.Comum import seletor_local
+
+
+def _numero(valor, formato):
+    # Sem municípios suficientes ou com uma variável constante, a reta não
+    # existe (NaN)
+    return "—" if np.isnan(valor) else formato.format(valor)
+
+
+# Conjuntos de dados, registrados como views em Dados/Conexao.py
+tse_genero_file = 'tse_genero'
+tse_idade_file = 'tse_idade'
+eleicoes_file = 'eleicoes'
+
+# Motor local ou, com ATLAS_MOTOR_URL, o serviço HTTP compartilhado
+motor = get_motor()
+
+# Conjuntos disponíveis e índice de UFs, turnos e cargos, do motor (ou do
+# serviço), refeito só quando os dados mudam
+indice = motor.indice()
+
+# --- Widgets de Seleção no topo da página
+selecao_local, uf_param_cruzamento, _ = seletor_local("Cruzamentos")
+
+st.markdown("---")
+st.caption("Fonte: TSE (Tribunal Superior Eleitoral)")
+if indice.disponivel(eleicoes_file) and (
+        indice.disponivel(tse_genero_file) or indice.disponivel(tse_idade_file)):
+    col_ano, col_turn, col_cargo = st.columns(3)
+    with col_ano:
+        selecao_ano = st.selectbox(
+            "Selecione a Eleição:", indice.anos(eleicoes_file), key="ano_cruzamento")
+    with col_turn:
+        selecao_turno = st.selectbox(
+            "Selecione o Turno:", indice.turnos(eleicoes_file), key="turno_cruzamento")
+    with col_cargo:
+        selecao_cargo = st.selectbox(
+            "Selecione o Cargo:", indice.cargos(eleicoes_file), key="cargo_cruzamento")
+
+    # Matrizes de perfil e de votação por município montadas uma vez
+    # (Dados/Cruzamento.py); cada seleção só recorta e multiplica
+    cruzamento = get_cruzamento(motor, indice)
+    try:
+        df_correlacoes = cruzamento.correlacoes(
+            selecao_ano, selecao_turno, selecao_cargo, uf=uf_param_cruzamento)
+    except Exception as e:
+        st.error(f"Erro ao executar consulta no DuckDB: {e}")
+        df_correlacoes = None
+
+    if df_correlacoes is not None and not df_correlacoes.empty:
+        st.subheader(f"Correlação entre Votos e Perfil do Eleitorado por Município")
+        with medir("renderizacao", indicador="cruzamento"):
+            st.dataframe(
+                df_correlacoes,
+                column_config={variavel: st.column_config.NumberColumn(format="%.2f")
+                               for variavel in cruzamento.variaveis},
+                use_container_width=True, hide_index=True)
+
+        col_candidato, col_variavel = st.columns(2)
+        with col_candidato:
+            candidato = st.selectbox(
+                "Candidato:", df_correlacoes['Candidato'].tolist(),
+                key="candidato_cruzamento")
+        with col_variavel:
+            variavel = st.selectbox(
+                "Perfil do eleitorado:", cruzamento.variaveis, key="variavel_cruzamento")
+
+        pontos, reta = cruzamento.dispersao(
+            selecao_ano, selecao_turno, selecao_cargo, candidato, variavel,
+            uf=uf_param_cruzamento)
+        col_r, col_r2, col_inclinacao, col_n = st.columns(4)
+        col_r.metric("Correlação (r)", _numero(reta['r'], "{:.2f}"))
+        col_r2.metric("R²", _numero(reta['r2'], "{:.2f}"))
+        col_inclinacao.metric("Inclinação (p.p. por p.p.)",
+                              _numero(reta['inclinacao'], "{:+.2f}"))
+        col_n.metric("Municípios", f"{reta['n']:,}")
+        with medir("renderizacao", indicador="dispersao"):
+            st.scatter_chart(pontos, x=variavel, y="Votos (%)")
+    else:
+        st.info(f"Não há dados de votação para a seleção atual.")
+else:
+    st.warning(
+        "Não foi possível carregar os dados de votação e de eleitorado. "
+        "Verifique os arquivos Parquet.")
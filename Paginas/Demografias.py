@@ -0,0 +1,156 @@
+import streamlit as st
+
+from Dados.Dimensoes import REGIOES_PNAD
+from Dados.Geometria import get_geometria
+from Dados.Instrumentacao import medir
+from Dados.Motor import carregar_em_paralelo, get_motor
+from Paginas.Comum import exibir_mapa, resultado_indicador, seletor_local
+
+# Conjuntos de dados, registrados como views em Dados/Conexao.py
+pnad_renda_file = 'pnad_renda'
+pnad_escolaridade_file = 'pnad_escolaridade'
+tse_genero_file = 'tse_genero'
+tse_idade_file = 'tse_idade'
+
+# Motor local ou, com ATLAS_MOTOR_URL, o serviço HTTP compartilhado
+motor = get_motor()
+
+# Conjuntos disponíveis e índice de UFs e municípios, do motor (ou do
+# serviço), refeito só quando os dados mudam
+indice = motor.indice()
+
+# Malha municipal simplificada; sem ela o mapa não é exibido
+geometria = get_geometria()
+
+# --- Widgets de Seleção no topo da página
+selecao_local, uf_param_tse, col2 = seletor_local("Demografias")
+titulo_local = selecao_local
+
+municipios_disponiveis = ["Todos"]
+if uf_param_tse:
+    municipios_disponiveis += indice.municipios(tse_genero_file, uf_param_tse)
+
+with col2:
+    selecao_municipio = st.selectbox(
+        "Selecionar Município",
+        municipios_disponiveis,
+        key="municipio_demografias"
+    )
+
+uf_param_pnad = None
+if selecao_local != "Brasil":
+    uf_param_pnad = selecao_local
+
+# As quatro seções são independentes: os contêineres são criados na ordem
+# da página, as consultas rodam em paralelo no pool do motor e cada tabela
+# é exibida assim que o seu resultado chega
+secoes = {}
+pedidos = {}
+
+# --- Seção de Gênero
+if indice.disponivel(tse_genero_file):
+    pedidos["sexo"] = dict(
+        uf=uf_param_tse,
+        municipio=indice.nome_no_dataset(tse_genero_file, uf_param_tse, selecao_municipio))
+
+    secoes["sexo"] = st.container(border=True)
+    with secoes["sexo"]:
+        st.subheader(f"Sexo")
+        st.caption("Fonte: TSE (Tribunal Superior Eleitoral) Mês atual")
+else:
+    st.warning(
+        "Não foi possível carregar os dados de gênero do TSE. Verifique o arquivo Parquet.")
+
+# --- Seção de Faixa Etária
+if indice.disponivel(tse_idade_file):
+    pedidos["idade"] = dict(
+        uf=uf_param_tse,
+        municipio=indice.nome_no_dataset(tse_idade_file, uf_param_tse, selecao_municipio))
+
+    secoes["idade"] = st.container(border=True)
+    with secoes["idade"]:
+        st.subheader(f"Faixa Etária")
+        st.caption("Fonte: TSE (Tribunal Superior Eleitoral) Mês atual")
+else:
+    st.warning(
+        "Não foi possível carregar os dados de faixa etária do TSE. Verifique o arquivo Parquet.")
+
+st.markdown("---")
+st.subheader("Análise Socioeconômica da PNAD")
+st.info("Os dados a seguir são por região e dependem apenas do Estado, ignorando a seleção de Município.")
+
+# Regiões da PNAD (Dados/Dimensoes.py), com "Todas as Regiões" como primeira opção
+regioes_map_simple_to_full = REGIOES_PNAD
+
+regioes_disponiveis = list(regioes_map_simple_to_full.keys())
+
+# Define a seleção padrão com base no local
+# Se "Brasil" ou "Todos" os municípios, a opção padrão é "Todas as Regiões"
+index_padrao = 0
+if selecao_local != "Brasil" and selecao_municipio != "Todos":
+    # Se um estado e um município são selecionados, a seleção padrão é "Capital"
+    # Esta é uma suposição, pode ser ajustado conforme a necessidade
+    index_padrao = regioes_disponiveis.index(
+        "Capital") if "Capital" in regioes_disponiveis else 0
+
+regiao_selecionada_simples = st.radio(
+    "Selecione a Região:",
+    regioes_disponiveis,
+    index=index_padrao,
+    key="regiao_pnad"
+)
+
+regioes_selecionadas_full_names = regioes_map_simple_to_full[regiao_selecionada_simples]
+
+if indice.disponivel(pnad_renda_file) and indice.disponivel(pnad_escolaridade_file):
+    pedidos["renda"] = dict(uf=uf_param_pnad, regioes=regioes_selecionadas_full_names)
+    pedidos["escolaridade"] = dict(uf=uf_param_pnad, regioes=regioes_selecionadas_full_names)
+
+    secoes["renda"] = st.container(border=True)
+    with secoes["renda"]:
+        st.subheader(f"Renda")
+        st.caption(
+            "Fonte: PNADc (Pesquisa Nacional por Amostra de Domicílios Contínua) 2023")
+
+    secoes["escolaridade"] = st.container(border=True)
+    with secoes["escolaridade"]:
+        st.subheader(f"Escolaridade")
+        st.caption(
+            "Fonte: PNADc (Pesquisa Nacional por Amostra de Domicílios Contínua) 2023")
+else:
+    st.warning(
+        "Não foi possível carregar os dados de renda ou escolaridade. Verifique os arquivos Parquet.")
+
+# Formato das colunas e mensagem sem dados de cada seção
+formatos = {
+    "sexo": ({'Eleitores': '{:,.0f}', 'Percentual': '{:,.1f}%'},
+             f"Não há dados de sexo disponíveis para {titulo_local} e o município selecionado."),
+    "idade": ({'Eleitores': '{:,.0f}', 'Percentual': '{:,.1f}%'},
+              f"Não há dados de faixa etária disponíveis para {titulo_local} e o município selecionado."),
+    "renda": ({'Renda Total': '{:,.2f}', 'Percentual': '{:,.1f}%'},
+              f"Não há dados de renda disponíveis para {titulo_local} e as regiões selecionadas."),
+    "escolaridade": ({'Escolaridade Total': '{:,.2f}', 'Percentual': '{:,.1f}%'},
+                     f"Não há dados de escolaridade disponíveis para {titulo_local} e as regiões selecionadas."),
+}
+
+# A renderização fica na thread do script; só as consultas vão para o pool
+resultados = {}
+for nome, futuro in carregar_em_paralelo(motor, pedidos):
+    formato, vazio = formatos[nome]
+    with secoes[nome]:
+        df = resultados[nome] = resultado_indicador(nome, futuro.result)
+        if df is not None:
+            with medir("renderizacao", indicador=nome):
+                st.dataframe(df.style.format(formato),
+                             use_container_width=True, hide_index=True)
+        else:
+            st.info(vazio)
+
+# --- Mapa da faixa etária por município
+if (geometria is not None and resultados.get("idade") is not None
+        and st.toggle("Mostrar mapa", key="mapa_demografias")):
+    faixas = resultados["idade"]['Faixa Etária'].tolist()
+    faixa_mapa = st.selectbox(
+        "Faixa etária no mapa:", faixas, index=len(faixas) - 1, key="faixa_mapa")
+    exibir_mapa(indice, geometria, "mapa_idade", tse_idade_file, faixa_mapa,
+                uf=uf_param_tse, faixa=faixa_mapa)
@@ -0,0 +1,162 @@
+import streamlit as st
+
+from Dados.Geometria import get_geometria
+from Dados.Instrumentacao import medir
+from Dados.Motor import get_motor
+from Paginas.Comum import carregar_indicador, exibir_mapa, seletor_local
+
+# Conjunto de dados, registrado como view em Dados/Conexao.py
+eleicoes_file = 'eleicoes'
+
+# Formatação das tabelas de votação, aplicada no navegador
+COLUNAS_VOTACAO = {
+    'Quantidade de Votos': st.column_config.NumberColumn(format="localized"),
+    'Percentual': st.column_config.NumberColumn(format="%.2f%%"),
+    'Zona': st.column_config.NumberColumn(format="%d"),
+}
+
+# Rótulos das ordenações da tabela de zonas (Dados/Consultas.py) e tamanho
+# da página
+ORDENS_ZONAS = {
+    "zona": "Zona",
+    "votos": "Votos",
+    "percentual": "Percentual",
+    "candidato": "Candidato",
+}
+LINHAS_POR_PAGINA = 50
+
+# Conjuntos disponíveis e índice de UFs, municípios, turnos e cargos, do
+# motor (ou, com ATLAS_MOTOR_URL, do serviço), refeito só quando os dados mudam
+indice = get_motor().indice()
+
+# Malha municipal simplificada; sem ela o mapa não é exibido
+geometria = get_geometria()
+
+# --- Widgets de Seleção no topo da página
+selecao_local, uf_param_eleicoes, _ = seletor_local("Eleições")
+
+st.markdown("---")
+st.caption("Fonte: TSE (Tribunal Superior Eleitoral)")
+if indice.disponivel(eleicoes_file):
+    # Os nomes exibidos são os mesmos da página de Demografias; o índice
+    # converte para a grafia do arquivo de votação na consulta
+    municipios_disponiveis_eleicoes = ["Todos"]
+    if uf_param_eleicoes:
+        municipios_disponiveis_eleicoes += indice.municipios(
+            eleicoes_file, uf_param_eleicoes)
+
+    col_ano, col_loc, col_turn, col_cargo = st.columns(4)
+    with col_ano:
+        anos_eleicoes = indice.anos(eleicoes_file)
+        selecao_ano = st.selectbox("Selecione a Eleição:", anos_eleicoes)
+    with col_loc:
+        selecao_municipio_eleicoes = st.selectbox(
+            "Selecionar Município",
+            municipios_disponiveis_eleicoes,
+            key="municipio_eleicoes"
+        )
+    with col_turn:
+        turnos = indice.turnos(eleicoes_file)
+        selecao_turno = st.selectbox("Selecione o Turno:", turnos)
+    with col_cargo:
+        ordem_cargos = indice.cargos(eleicoes_file)
+        selecao_cargo = st.selectbox(
+            "Selecione o Cargo:", ordem_cargos, index=0)
+
+    st.subheader(f"Resultados de Votação por Candidato")
+
+    df_votacao = carregar_indicador(
+        "votacao", uf=uf_param_eleicoes,
+        municipio=indice.nome_no_dataset(
+            eleicoes_file, uf_param_eleicoes, selecao_municipio_eleicoes),
+        turno=selecao_turno, cargo=selecao_cargo, ano=selecao_ano)
+
+    if df_votacao is not None and not df_votacao.empty:
+        # Formatação pelo column_config, aplicada no navegador sobre o
+        # Arrow, sem montar um Styler sobre a tabela inteira
+        with medir("renderizacao", indicador="votacao"):
+            st.dataframe(df_votacao, column_config=COLUNAS_VOTACAO,
+                         use_container_width=True, hide_index=True)
+    else:
+        st.info(f"Não há dados de votação para a seleção atual.")
+
+    # --- Mapa do percentual de um candidato por município
+    if (geometria is not None and df_votacao is not None and not df_votacao.empty
+            and st.toggle("Mostrar mapa", key="mapa_eleicoes")):
+        candidato_mapa = st.selectbox(
+            "Candidato no mapa:", df_votacao['Candidatos'].tolist(), key="candidato_mapa")
+        exibir_mapa(indice, geometria, "mapa_votacao", eleicoes_file, candidato_mapa,
+                    uf=uf_param_eleicoes, turno=selecao_turno, cargo=selecao_cargo,
+                    ano=selecao_ano, candidato=candidato_mapa)
+
+    # --- Detalhamento por zona eleitoral: ranking e ordenação feitos no
+    # DuckDB; trocar de página só recorta a tabela Arrow já calculada
+    if indice.tem_zonas(eleicoes_file) and st.toggle(
+            "Detalhar por zona eleitoral", key="detalhar_zonas"):
+        if uf_param_eleicoes:
+            col_top, col_ordem, col_pagina = st.columns(3)
+            with col_top:
+                top_zonas = st.number_input(
+                    "Candidatos por zona:", min_value=1, max_value=20, value=3,
+                    key="top_zonas")
+            with col_ordem:
+                ordem_zonas = st.selectbox(
+                    "Ordenar por:", list(ORDENS_ZONAS),
+                    format_func=ORDENS_ZONAS.get, key="ordem_zonas")
+            with col_pagina:
+                pagina_zonas = st.number_input(
+                    "Página:", min_value=1, value=1, key="pagina_zonas")
+
+            df_zonas = carregar_indicador(
+                "zonas", uf=uf_param_eleicoes,
+                municipio=indice.nome_no_dataset(
+                    eleicoes_file, uf_param_eleicoes, selecao_municipio_eleicoes),
+                turno=selecao_turno, cargo=selecao_cargo, ano=selecao_ano,
+                top=top_zonas, ordem=ordem_zonas, pagina=pagina_zonas - 1,
+                por_pagina=LINHAS_POR_PAGINA)
+
+            if df_zonas is not None:
+                total = int(df_zonas['TOTAL_LINHAS'].iat[0])
+                inicio = (pagina_zonas - 1) * LINHAS_POR_PAGINA
+                st.caption(
+                    f"Linhas {inicio + 1} a {inicio + len(df_zonas)} de {total} "
+                    f"(página {pagina_zonas} de {-(-total // LINHAS_POR_PAGINA)})")
+                with medir("renderizacao", indicador="zonas"):
+                    st.dataframe(df_zonas.drop(columns='TOTAL_LINHAS'),
+                                 column_config=COLUNAS_VOTACAO,
+                                 use_container_width=True, hide_index=True)
+            else:
+                st.info(f"Não há dados de zona para a seleção atual nesta página.")
+        else:
+            st.info("Selecione um estado para detalhar por zona eleitoral.")
+
+    # --- Comparação entre eleições, com o mesmo local, turno e cargo
+    if len(anos_eleicoes) > 1:
+        st.subheader(f"Comparação entre Eleições por Partido")
+        anos_comparacao = st.multiselect(
+            "Eleições comparadas:", anos_eleicoes,
+            default=anos_eleicoes[:2], key="anos_comparacao")
+
+        if len(anos_comparacao) > 1:
+            df_comparacao = carregar_indicador(
+                "comparacao", uf=uf_param_eleicoes,
+                municipio=indice.nome_no_dataset(
+                    eleicoes_file, uf_param_eleicoes, selecao_municipio_eleicoes),
+                turno=selecao_turno, cargo=selecao_cargo,
+                anos=sorted(anos_comparacao))
+
+            if df_comparacao is not None:
+                formato = {'Variação (p.p.)': '{:+,.2f}'}
+                for ano in anos_comparacao:
+                    formato[f'Votos {ano}'] = '{:,.0f}'
+                    formato[f'Percentual {ano}'] = '{:,.2f}%'
+                with medir("renderizacao", indicador="comparacao"):
+                    st.dataframe(df_comparacao.style.format(formato),
+                                 use_container_width=True, hide_index=True)
+            else:
+                st.info(f"Não há dados de votação nas eleições selecionadas.")
+        else:
+            st.info("Selecione ao menos duas eleições para comparar.")
+else:
+    st.warning(
+        "Não foi possível carregar os dados de votação. Verifique o arquivo Parquet.")
@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+from Benchmarks.Gerador import gerar
+from Dados.Conexao import GerenciadorConexoes
+from Dados.Dicionarios import construir_dicionarios
+from Dados.Rollups import construir_rollups
+
+# Eleições dos dados sintéticos; a última é a mais recente
+ANOS = [2018, 2022]
+
+
+@pytest.fixture(scope="session")
+def dados(tmp_path_factory):
+    """
+    Diretório com os dados sintéticos do benchmark (cerca de 280 municípios,
+    duas eleições), os rollups e as tabelas codificadas: os três caminhos
+    de consulta do painel sobre os mesmos arquivos.
+    """
+    destino = str(tmp_path_factory.mktemp("dados"))
+    gerar(destino, escala=0.05, zonas=2, anos=ANOS)
+    gerenciador = GerenciadorConexoes(data_dir=destino)
+    construir_rollups(gerenciador, os.path.join(destino, "rollups"))
+    gerenciador.fechar()
+    gerenciador = GerenciadorConexoes(data_dir=destino)
+    construir_dicionarios(gerenciador)
+    gerenciador.fechar()
+    return destino
+
+
+@pytest.fixture(scope="session")
+def gerenciador(dados):
+    gerenciador = GerenciadorConexoes(data_dir=dados)
+    yield gerenciador
+    gerenciador.fechar()
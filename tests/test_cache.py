@@ -0,0 +1,112 @@
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from Dados import Cache
+from Dados.Cache import ArmazemArrow, CacheResultados, tamanho_bytes
+
+
+class Relogio:
+    """
+    time.monotonic controlado pelo teste, para o TTL.
+    """
+
+    def __init__(self):
+        self.agora = 1000.0
+
+    def __call__(self):
+        return self.agora
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(Cache.time, "monotonic", relogio)
+    return relogio
+
+
+def test_lru_remove_a_entrada_menos_usada():
+    cache = CacheResultados(max_entradas=2)
+    cache.guardar("a", 1, "A")
+    cache.guardar("b", 1, "B")
+    # A leitura de "a" o torna o mais recente; "b" sai quando "c" entra
+    assert cache.obter("a", 1, lambda: pytest.fail("deveria estar em cache")) == "A"
+    cache.guardar("c", 1, "C")
+
+    assert cache.obter("b", 1, lambda: "B novo") == "B novo"
+    estatisticas = cache.estatisticas()
+    assert estatisticas["entradas"] == 2
+    assert estatisticas["remocoes"] == 2
+    assert estatisticas["acertos"] == 1
+
+
+def test_limite_de_bytes():
+    valor = "x" * 1000
+    tamanho = tamanho_bytes(valor)
+    cache = CacheResultados(max_bytes=2 * tamanho + tamanho // 2)
+    for chave in "abc":
+        cache.guardar(chave, 1, valor)
+
+    estatisticas = cache.estatisticas()
+    assert estatisticas["entradas"] == 2
+    assert estatisticas["bytes"] == 2 * tamanho
+    assert cache.obter("c", 1, lambda: pytest.fail("deveria estar em cache")) == valor
+    assert cache.obter("a", 1, lambda: "recalculado") == "recalculado"
+
+    # Um valor maior que o limite nem entra, e não tira os outros
+    antes = cache.estatisticas()
+    cache.guardar("grande", 1, "x" * (3 * tamanho))
+    depois = cache.estatisticas()
+    assert (depois["entradas"], depois["bytes"]) == (antes["entradas"], antes["bytes"])
+    assert cache.obter("grande", 1, lambda: "recalculado") == "recalculado"
+
+
+def test_ttl(relogio):
+    cache = CacheResultados(ttl=10)
+    cache.guardar("a", 1, "A")
+    relogio.agora += 9
+    assert cache.obter("a", 1, lambda: "A novo") == "A"
+    relogio.agora += 2
+    assert cache.obter("a", 1, lambda: "A novo") == "A novo"
+    assert cache.estatisticas()["invalidacoes"] == 1
+
+
+def test_versao_diferente_invalida():
+    cache = CacheResultados()
+    assert cache.obter("a", 1, lambda: "v1") == "v1"
+    assert cache.obter("a", 2, lambda: "v2") == "v2"
+    assert cache.obter("a", 2, lambda: "v3") == "v2"
+    estatisticas = cache.estatisticas()
+    assert (estatisticas["falhas"], estatisticas["acertos"], estatisticas["invalidacoes"]) == (2, 1, 1)
+
+
+def test_excecao_nao_fica_em_cache():
+    cache = CacheResultados()
+
+    def falhar():
+        raise ValueError("falhou")
+
+    with pytest.raises(ValueError):
+        cache.obter("a", 1, falhar)
+    assert cache.obter("a", 1, lambda: "A") == "A"
+    assert cache.estatisticas()["entradas"] == 1
+
+
+def test_tamanho_de_dataframe_e_tabela_arrow():
+    df = pd.DataFrame({"SG_UF": ["SP", "RJ"], "Valor": [1.0, 2.0]})
+    tabela = pa.Table.from_pandas(df)
+    assert tamanho_bytes(df) == int(df.memory_usage(deep=True).sum())
+    assert tamanho_bytes(tabela) == tabela.get_total_buffer_size()
+    assert tamanho_bytes(None) == 0
+
+
+def test_armazem_limita_so_bytes():
+    tabela = pa.table({"Valor": list(range(1000))})
+    tamanho = tamanho_bytes(tabela)
+    armazem = ArmazemArrow(max_bytes=3 * tamanho)
+    for i in range(5):
+        armazem.guardar((f"SELECT {i}", ()), 1, tabela)
+
+    residentes = armazem.residentes()
+    assert [r["consulta"] for r in residentes] == ["SELECT 4", "SELECT 3", "SELECT 2"]
+    assert armazem.estatisticas()["bytes"] == 3 * tamanho
@@ -0,0 +1,152 @@
+import pandas as pd
+import pytest
+
+from Dados.Consultas import (
+    REGIOES, _eleicao, _origem, _where, consulta_comparacao, consulta_escolaridade,
+    consulta_idade, consulta_mapa_idade, consulta_mapa_votacao, consulta_perfil_idade,
+    consulta_perfil_sexo, consulta_renda, consulta_sexo, consulta_votacao,
+    consulta_votos_municipios, consulta_zonas,
+)
+from Dados.Dicionarios import para_pandas
+from Dados.Dimensoes import IndiceGeografico
+from Dados.Geometria import valores_por_codigo
+
+from tests.conftest import ANOS
+
+# Substituído pelo primeiro município de SP dos dados sintéticos
+MUNICIPIO = object()
+
+CASOS = [
+    (consulta_sexo, {}),
+    (consulta_sexo, {"uf": "SP"}),
+    (consulta_sexo, {"uf": "SP", "municipio": MUNICIPIO}),
+    (consulta_idade, {}),
+    (consulta_idade, {"uf": "SP", "municipio": MUNICIPIO}),
+    (consulta_renda, {}),
+    (consulta_renda, {"uf": "São Paulo", "regioes": REGIOES[:1]}),
+    (consulta_renda, {"uf": "São Paulo", "regioes": REGIOES[:2]}),
+    (consulta_escolaridade, {"regioes": REGIOES}),
+    (consulta_votacao, {"turno": 1, "cargo": "Presidente"}),
+    (consulta_votacao, {"turno": 1, "cargo": "Presidente", "ano": ANOS[0]}),
+    (consulta_votacao, {"uf": "SP", "turno": 1, "cargo": "Governador", "ano": ANOS[-1]}),
+    (consulta_votacao, {"uf": "SP", "municipio": MUNICIPIO, "turno": 2,
+                        "cargo": "Presidente"}),
+    (consulta_comparacao, {"uf": "SP", "turno": 1, "cargo": "Presidente", "anos": ANOS}),
+    (consulta_zonas, {"uf": "SP", "turno": 1, "cargo": "Senador", "ordem": "votos"}),
+    (consulta_perfil_sexo, {}),
+    (consulta_perfil_idade, {}),
+    (consulta_votos_municipios, {"turno": 1, "cargo": "Governador"}),
+]
+
+
+@pytest.fixture(scope="module")
+def municipio(gerenciador):
+    return gerenciador.executar(
+        "SELECT MIN(NM_MUNICIPIO) FROM tse_genero WHERE SG_UF = 'SP'").iloc[0, 0]
+
+
+def executar(gerenciador, consulta, filtros, **opcoes):
+    query, params = consulta(**filtros, **opcoes)
+    df = para_pandas(gerenciador.executar_arrow(query, params))
+    # Empates na ordenação podem sair em qualquer ordem
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("consulta, filtros", CASOS,
+                         ids=[f"{c.__name__}-{i}" for i, (c, _) in enumerate(CASOS)])
+def test_rollup_e_codificada_iguais_a_agregacao_direta(gerenciador, municipio, consulta, filtros):
+    filtros = {chave: municipio if valor is MUNICIPIO else valor
+               for chave, valor in filtros.items()}
+    direta = executar(gerenciador, consulta, filtros)
+    assert not direta.empty
+    for opcoes in ({"rollup": True}, {"codificado": True}):
+        pd.testing.assert_frame_equal(
+            executar(gerenciador, consulta, filtros, **opcoes), direta,
+            check_dtype=False, rtol=1e-9, obj=f"{consulta.__name__} {opcoes}")
+
+
+@pytest.mark.parametrize("opcoes", [{}, {"rollup": True}, {"codificado": True}])
+def test_sem_ano_vale_a_eleicao_mais_recente(gerenciador, opcoes):
+    filtros = {"uf": "SP", "turno": 1, "cargo": "Governador"}
+    pd.testing.assert_frame_equal(
+        executar(gerenciador, consulta_votacao, filtros, **opcoes),
+        executar(gerenciador, consulta_votacao, dict(filtros, ano=ANOS[-1]), **opcoes))
+
+
+@pytest.mark.parametrize("consulta, filtros", [
+    (consulta_mapa_idade, {}),
+    (consulta_mapa_idade, {"uf": "SP", "faixa": "16 a 24 anos"}),
+    (consulta_mapa_votacao, {"turno": 1, "cargo": "Presidente"}),
+])
+def test_mapa_codificado_junta_pelo_codigo(gerenciador, consulta, filtros):
+    indice = IndiceGeografico(gerenciador)
+    dataset = "tse_idade" if consulta is consulta_mapa_idade else "eleicoes"
+    valores = {}
+    for codificado in (False, True):
+        df = executar(gerenciador, consulta, filtros, codificado=codificado)
+        assert ("CD_MUNICIPIO" in df.columns) == codificado
+        valores[codificado] = valores_por_codigo(df, indice, dataset).sort_index()
+    # O código sai como INTEGER das tabelas codificadas; `mapa` reindexa
+    # pelos códigos da geometria de qualquer forma
+    pd.testing.assert_series_equal(valores[True], valores[False], check_names=False,
+                                   check_index_type=False)
+
+
+def test_where_ignora_filtros_vazios():
+    where, params = _where([("SG_UF", "SP"), ("NM_MUNICIPIO", "Todos"), ("NR_TURNO", None),
+                            ("DS_CARGO", [])])
+    assert (where, params) == (" WHERE SG_UF = ?", ["SP"])
+    assert _where([("SG_UF", None)]) == ("", [])
+
+
+def test_where_listas_e_filtros_fixos():
+    where, params = _where([("ANO_ELEICAO", [2018, 2022])], fixas=["DS_GENERO <> 'X'"])
+    assert where == " WHERE DS_GENERO <> 'X' AND ANO_ELEICAO IN (?, ?)"
+    assert params == [2018, 2022]
+
+
+def test_where_eleicao_mais_recente():
+    where, params = _where([("ANO_ELEICAO", _eleicao(None, "fato_eleicoes")), ("NR_TURNO", 1)])
+    assert where == (" WHERE ANO_ELEICAO = (SELECT MAX(ANO_ELEICAO) FROM fato_eleicoes) "
+                     "AND NR_TURNO = ?")
+    assert params == [1]
+    assert _eleicao(2018, "eleicoes") == 2018
+
+
+def test_where_codificado_busca_o_codigo_na_dimensao():
+    where, params = _where([("SG_UF", "SP"), ("NM_MUNICIPIO", "SANTOS"),
+                            ("DS_CARGO", "Governador")], codificado=True)
+    assert where == (
+        " WHERE SG_UF = ?"
+        " AND CD_MUNICIPIO IN (SELECT CD_MUNICIPIO FROM dim_municipio_grafias"
+        " WHERE NM_MUNICIPIO = ? AND SG_UF = ?)"
+        " AND CD_CARGO IN (SELECT CD_CARGO FROM dim_cargo WHERE DS_CARGO = ?)")
+    assert params == ["SP", "SANTOS", "SP", "Governador"]
+
+
+def test_origem_direta():
+    origem, params = _origem("tse_genero", ["DS_GENERO"], "QT_ELEITORES_PERFIL",
+                             [("SG_UF", "SP")], ["DS_GENERO <> 'NÃO INFORMADO'"])
+    assert origem == "tse_genero WHERE DS_GENERO <> 'NÃO INFORMADO' AND SG_UF = ?"
+    assert params == ["SP"]
+
+
+def test_origem_codificada_pre_soma_pelos_codigos():
+    origem, params = _origem("tse_genero", ["DS_GENERO"], "QT_ELEITORES_PERFIL",
+                             [("SG_UF", "SP")], ["DS_GENERO <> 'NÃO INFORMADO'"],
+                             codificado=True)
+    assert origem == (
+        "(SELECT CD_GENERO, SUM(QT_ELEITORES_PERFIL) AS QT_ELEITORES_PERFIL "
+        "FROM fato_tse_genero WHERE SG_UF = ? GROUP BY CD_GENERO) "
+        "JOIN dim_genero USING (CD_GENERO) WHERE DS_GENERO <> 'NÃO INFORMADO'")
+    assert params == ["SP"]
+
+
+def test_origem_codificada_tira_a_uf_do_municipio():
+    # SG_UF é atributo do município e vem da dimensão, não da chave
+    origem, _ = _origem("tse_idade", ["SG_UF", "NM_MUNICIPIO"], "QT_ELEITORES_PERFIL", [],
+                        codificado=True)
+    assert origem == (
+        "(SELECT CD_MUNICIPIO, SUM(QT_ELEITORES_PERFIL) AS QT_ELEITORES_PERFIL "
+        "FROM fato_tse_idade GROUP BY CD_MUNICIPIO) "
+        "JOIN dim_municipio USING (CD_MUNICIPIO)")
@@ -0,0 +1,80 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Dados.Cache import ArmazemArrow, CacheResultados
+from Dados.Consultas import consulta_votacao
+from Dados.Cruzamento import Cruzamento, correlacoes
+from Dados.Dimensoes import IndiceGeografico
+from Dados.Motor import Motor
+
+from tests.conftest import ANOS
+
+
+def _corrwith(x, y):
+    # Referência do pandas: cada par usa só as linhas em que os dois existem
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return np.array([pd.DataFrame(x).corrwith(pd.Series(coluna)).to_numpy()
+                         for coluna in y.T])
+
+
+def test_correlacoes_igual_a_corrwith():
+    gerador = np.random.default_rng(7)
+    x = gerador.normal(size=(60, 3))
+    x[gerador.random(x.shape) < 0.1] = np.nan
+    y = np.column_stack([
+        0.5 * np.nan_to_num(x[:, 0]) + gerador.normal(size=60),
+        gerador.normal(size=60),
+        gerador.normal(size=60),
+    ])
+    # Um candidato que só concorreu nas 20 primeiras linhas (outra UF)
+    y[20:, 1] = np.nan
+
+    np.testing.assert_allclose(correlacoes(x, y), _corrwith(x, y), rtol=1e-9, atol=1e-12)
+
+
+def test_correlacoes_pares_indefinidos_ficam_nan():
+    gerador = np.random.default_rng(3)
+    x = gerador.normal(size=(10, 2))
+    y = np.column_stack([np.full(10, 5.0), gerador.normal(size=10)])
+    # Só 2 municípios em comum com a segunda variável
+    y[2:, 1] = np.nan
+
+    r = correlacoes(x, y)
+    assert np.isnan(r).all()
+
+
+@pytest.fixture(scope="module")
+def cruzamento(gerenciador):
+    motor = Motor(gerenciador, cache=CacheResultados(), armazem=ArmazemArrow())
+    return Cruzamento(motor, IndiceGeografico(gerenciador))
+
+
+@pytest.mark.parametrize("turno, cargo, uf", [
+    (1, "Presidente", None),
+    (1, "Governador", "SP"),
+    (2, "Presidente", "RJ"),
+    (1, "Senador", "RJ"),
+])
+def test_cruzamento_igual_a_corrwith(gerenciador, cruzamento, turno, cargo, uf):
+    ano = ANOS[-1]
+    df = cruzamento.correlacoes(ano, turno, cargo, uf)
+    assert not df.empty
+
+    # Só os candidatos votados no recorte
+    query, params = consulta_votacao(uf=uf, turno=turno, cargo=cargo, ano=ano)
+    votacao = gerenciador.executar(query, params)
+    assert sorted(df["Candidato"]) == sorted(
+        f"{nome} ({partido})"
+        for nome, partido in zip(votacao["NM_URNA_CANDIDATO"], votacao["SG_PARTIDO"]))
+
+    candidatos, votos = cruzamento.votacao(ano, turno, cargo)
+    mascara = cruzamento._mascara(uf)
+    colunas = [candidatos.index(candidato) for candidato in df["Candidato"]]
+    esperado = _corrwith(cruzamento.perfil[mascara], votos[mascara][:, colunas])
+    assert df.columns.tolist() == ["Candidato"] + cruzamento.variaveis
+    np.testing.assert_allclose(df[cruzamento.variaveis].to_numpy(), esperado,
+                               rtol=1e-9, atol=1e-12)
@@ -0,0 +1,99 @@
+import json
+import os
+
+import duckdb
+import pytest
+
+from Dados.Conexao import DATASETS, GerenciadorConexoes
+from Dados.Dimensoes import IndiceGeografico, codigo_provisorio, normalizar_nome
+
+
+def _gravar(destino, dataset, consulta):
+    duckdb.execute(f"COPY ({consulta}) TO '{os.path.join(destino, DATASETS[dataset])}' "
+                   "(FORMAT parquet)")
+
+
+@pytest.fixture(scope="module")
+def indice(tmp_path_factory):
+    """
+    Índice de um eleitorado com CD_MUNICIPIO e de uma votação antiga, sem a
+    coluna e com outras grafias: apóstrofo, acento, um apelido de APELIDOS e
+    um município que só existe na votação.
+    """
+    destino = str(tmp_path_factory.mktemp("grafias"))
+    _gravar(destino, "tse_genero", """
+        SELECT * FROM (VALUES
+            ('BA', 100, 'DIAS D''ÁVILA', 'FEMININO', 10),
+            ('PR', 200, 'MUNHOZ DE MELO', 'FEMININO', 20),
+            ('SP', 300, 'SÃO PAULO', 'FEMININO', 30)
+        ) t(SG_UF, CD_MUNICIPIO, NM_MUNICIPIO, DS_GENERO, QT_ELEITORES_PERFIL)
+    """)
+    _gravar(destino, "eleicoes", """
+        SELECT * FROM (VALUES
+            ('BA', 'DIAS D ÁVILA', 1, 'Governador', 'A', 'P1', 5),
+            ('PR', 'MUNHOZ DE MELLO', 1, 'Governador', 'B', 'P2', 6),
+            ('SP', 'SAO PAULO', 1, 'Presidente', 'C', 'P3', 7),
+            ('SP', 'NOVA CIDADE', 2, 'Presidente', 'C', 'P3', 8)
+        ) t(SG_UF, NM_MUNICIPIO, NR_TURNO, DS_CARGO, NM_URNA_CANDIDATO, SG_PARTIDO,
+            QT_VOTOS_NOMINAIS)
+    """)
+    _gravar(destino, "municipios_ibge", """
+        SELECT * FROM (VALUES (2910057, 100)) t(CD_MUNICIPIO_IBGE, CD_MUNICIPIO)
+    """)
+    gerenciador = GerenciadorConexoes(data_dir=destino)
+    yield IndiceGeografico(gerenciador)
+    gerenciador.fechar()
+
+
+def test_normalizar_nome():
+    assert normalizar_nome("Dias d'Ávila") == normalizar_nome("DIAS D ÁVILA") == "DIAS D AVILA"
+    assert normalizar_nome("  Pau-d’Arco ") == "PAU D ARCO"
+
+
+@pytest.mark.parametrize("uf, grafias, codigo", [
+    ("BA", ["DIAS D'ÁVILA", "DIAS D ÁVILA"], 100),
+    ("PR", ["MUNHOZ DE MELO", "MUNHOZ DE MELLO"], 200),
+    ("SP", ["SÃO PAULO", "SAO PAULO"], 300),
+])
+def test_grafias_levam_ao_codigo_do_tse(indice, uf, grafias, codigo):
+    assert [indice.codigo(uf, nome) for nome in grafias] == [codigo, codigo]
+    # O nome exibido é o do eleitorado, e o filtro usa a grafia da votação
+    assert indice.nome(codigo) == grafias[0]
+    assert indice.nome_no_dataset("eleicoes", uf, grafias[0]) == grafias[1]
+    assert indice.nome_no_dataset("tse_genero", uf, grafias[0]) == grafias[0]
+
+
+def test_municipio_sem_codigo_recebe_o_provisorio(indice):
+    codigo = indice.codigo("SP", "NOVA CIDADE")
+    assert codigo == codigo_provisorio("SP", "NOVA CIDADE") < 0
+    assert indice.municipios("eleicoes", "SP") == ["NOVA CIDADE", "SÃO PAULO"]
+    assert indice.municipios("tse_genero", "SP") == ["SÃO PAULO"]
+
+
+def test_codigos_de_outras_fontes(indice):
+    assert indice.codigo_normalizado("PR", "Munhoz de Mello") == 200
+    assert indice.codigo_normalizado("BA", "Dias d'Ávila") == 100
+    assert indice.codigo_normalizado("SP", "Outra Cidade") is None
+    assert indice.codigo_ibge(2910057) == 100
+    assert indice.codigo_ibge(3550308) is None
+
+
+def test_tabela_codigos_tem_a_grafia_do_conjunto_e_o_nome_exibido(indice):
+    tabela = indice.tabela_codigos("eleicoes")
+    pares = set(zip(tabela["NM_MUNICIPIO"], tabela["CODIGO"]))
+    assert {("SAO PAULO", 300), ("SÃO PAULO", 300), ("MUNHOZ DE MELLO", 200),
+            ("MUNHOZ DE MELO", 200)} <= pares
+
+
+def test_estado_exportado_refaz_o_indice(indice):
+    copia = IndiceGeografico.de_estado(json.loads(json.dumps(indice.exportar())))
+    # A versão do serviço faz o papel do snapshot no front-end
+    assert copia.snapshot == indice.versao()
+    assert copia.anos("eleicoes") == indice.anos("eleicoes") == [2022]
+    assert copia.cargos("eleicoes") == ["Presidente", "Governador"]
+    for uf in indice.ufs("eleicoes"):
+        assert copia.municipios("eleicoes", uf) == indice.municipios("eleicoes", uf)
+    assert copia.codigo("PR", "MUNHOZ DE MELLO") == 200
+    assert copia.codigo_normalizado("BA", "Dias d'Ávila") == 100
+    assert copia.codigo_ibge(2910057) == 100
+    assert copia.tabela_codigos("eleicoes").equals(indice.tabela_codigos("eleicoes"))